@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from home.models import User, Announcement
+from django.utils import timezone
+from home.models import User, Announcement, Job
 
 # Register your models here.
 # Register custome user model with extended UserAdmin
@@ -24,4 +25,21 @@ class CustomUserAdmin(UserAdmin):
 class AnnouncementAdmin(admin.ModelAdmin):
     list_display = ('title', 'posted_on')
     search_fields = ('title', 'content')
-    ordering = ('-posted_on',)
\ No newline at end of file
+    ordering = ('-posted_on',)
+
+
+# Background jobs (manage.py run_jobs)
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'max_attempts', 'run_after', 'finished_on', 'locked_by')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'idempotency_key')
+    ordering = ('-id',)
+    readonly_fields = ('created_on', 'finished_on', 'locked_by', 'locked_at', 'last_error')
+    actions = ['requeue']
+
+    @admin.action(description='Run selected jobs again')
+    def requeue(self, request, queryset):
+        count = (queryset.exclude(status='running')
+                 .update(status='queued', attempts=0, run_after=timezone.now(), finished_on=None))
+        self.message_user(request, f"{count} job(s) queued again.")
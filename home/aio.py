@@ -0,0 +1,35 @@
+"""
+Helpers for the async (ASGI) read views: homePage, public_request_status and
+the sales and manager dashboards.
+
+Independent reads are started together with `gather(name=coroutine, ...)`.
+Django runs async ORM calls on the request's database thread over its one
+connection, so the SQL still runs one statement at a time; what the view gains
+is that under ASGI no worker is held while it waits on the database, and the
+event loop serves other requests in the meantime. Under WSGI, Django runs
+async views through async_to_sync, so they keep working there too.
+
+Rendering goes through `arender`: context processors and the messages loop in
+base templates read the session and user tables with the sync ORM, so the
+template is rendered on the database thread as well.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import render
+
+
+async def gather(**awaitables):
+    """Await every keyword concurrently; returns {name: result}."""
+    results = await asyncio.gather(*awaitables.values())
+    return dict(zip(awaitables, results))
+
+
+async def alist(queryset):
+    """list(queryset) for async code."""
+    return [obj async for obj in queryset]
+
+
+async def arender(request, template_name, context=None):
+    """render() for async views."""
+    return await sync_to_async(render)(request, template_name, context)
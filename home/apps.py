@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class HomeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'home'
+
+    def ready(self):
+        # Invalidate cached public pages on content changes
+        from home import signals  # noqa: F401
+
+        # WAL, busy timeout etc. on every SQLite connection (settings.SQLITE_PRAGMAS)
+        from django.db.backends.signals import connection_created
+        from home.sqlite import tune_sqlite
+        connection_created.connect(tune_sqlite, dispatch_uid='home.tune_sqlite')
+
+        # Job handlers (@home.jobs.job) live in each app's jobs.py
+        from django.utils.module_loading import autodiscover_modules
+        autodiscover_modules('jobs')
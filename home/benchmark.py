@@ -0,0 +1,316 @@
+"""
+Request-path benchmarks: drive every page of home/manager/sales through the
+Django test client and record how long it takes, how many queries it runs
+and how much memory it allocates.
+
+    python manage.py benchmark_urls --scale 100k -o bench/main.json
+    python manage.py benchmark_urls --scale 100k -o bench/branch.json --compare bench/main.json
+
+Each scenario is measured as
+  - one cold request, with the cache cleared (time, queries, status code);
+  - one warm request under CaptureQueriesContext on the primary and replica
+    (queries per page as users see it),
+    next to the view's @query_budget and its duplicate queries;
+  - one warm request under tracemalloc (peak KiB allocated while serving it);
+  - `repeat` timed warm requests (p50/p90/p95/p99/max/mean in ms).
+
+POST scenarios (approvals, pickups, new requests) run inside a transaction
+that is rolled back, so every repetition sees the same data. Streaming
+responses (exports) are read to the end, so their time covers the whole file.
+
+The report is plain JSON with sorted keys, so two runs diff cleanly.
+"""
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from contextlib import ExitStack
+from datetime import timedelta
+from statistics import mean
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+
+from home.models import User
+from home.replicas import replica_alias
+from manager.snapshots import freeze_debtors, freeze_pending
+from sales.models import ChickRequest, Farmer, FeedRequest
+
+
+BENCHMARKED_APPS = ('home', 'manager', 'sales')
+PERCENTILES = (50, 90, 95, 99)
+# --scale presets: chick requests to seed; farmers and feed requests scale from it
+SCALES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+
+
+def parse_scale(value):
+    """'100k' -> 100000; plain integers are accepted too."""
+    value = str(value).strip().lower()
+    if value in SCALES:
+        return SCALES[value]
+    try:
+        n = int(value.replace('_', ''))
+    except ValueError:
+        raise ValueError(f"Unknown scale '{value}'. Use {', '.join(SCALES)} or a number of requests.")
+    if n < 1:
+        raise ValueError("Scale must be at least 1.")
+    return n
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    rank = max(1, -(-pct * len(ordered) // 100))  # ceil
+    return ordered[rank - 1]
+
+
+def seed_dataset(scale, seed):
+    """Seed `scale` chick requests, with farmers and feed requests in proportion."""
+    call_command('seed_demo', farmers=max(scale // 5, 10), chick_requests=scale,
+                 feed_requests=max(scale // 2, 1), days=365, seed=seed, verbosity=0)
+    # as after the nightly build_report_snapshots run
+    freeze_pending()
+    freeze_debtors()
+
+
+# -------------------- users & fixtures --------------------
+
+def bench_users():
+    """The accounts scenarios log in as. 'peter' is the recorder pickups hard-code."""
+    manager, _ = User.objects.get_or_create(
+        username='bench_manager', defaults={'role': 'brooder_manager', 'is_staff': True})
+    sales, _ = User.objects.get_or_create(username='bench_sales', defaults={'role': 'sales_rep'})
+    User.objects.get_or_create(username='peter', defaults={'role': 'sales_rep'})
+    return {'manager': manager, 'sales': sales}
+
+
+def bench_fixtures():
+    """Ids the parameterised URLs point at; None when the data has no such row."""
+    def first(qs):
+        return qs.order_by('id').values_list('id', flat=True).first()
+
+    farmer = Farmer.objects.order_by('id').values('id', 'nin').first() or {}
+    return {
+        'farmer_id': farmer.get('id'),
+        'farmer_nin': farmer.get('nin'),
+        'pending_chick_request': first(ChickRequest.objects.filter(status='pending')),
+        'unpicked_chick_request': first(ChickRequest.objects.filter(status='approved', is_picked=False)),
+        'pending_feed_request': first(FeedRequest.objects.filter(status='pending')),
+        'unpicked_feed_request': first(FeedRequest.objects.filter(status='approved', pickup_status='not_picked')),
+        'today': timezone.localdate(),
+    }
+
+
+def scenarios(fx):
+    """
+    (name, url name, who, method, args, query string, POST data) for every
+    page we benchmark. `who` is None for anonymous visitors. Entries whose
+    fixture is missing are returned with args=None and reported as skipped.
+    """
+    def needs(*keys):
+        return None if any(fx[k] is None for k in keys) else [fx[k] for k in keys]
+
+    month_ago = (fx['today'] - timedelta(days=30)).isoformat()
+    return [
+        # home (public)
+        ('homepage', 'homepage', None, 'get', [], '', None),
+        ('public_request_status', 'public_request_status', None, 'get', needs('farmer_nin') and [],
+         f"nin={fx['farmer_nin']}", None),
+        ('login', 'login', None, 'get', [], '', None),
+        ('cache_stats', 'cache_stats', 'manager', 'get', [], '', None),
+
+        # manager
+        ('manager_dashboard', 'manager_dashboard', 'manager', 'get', [], '', None),
+        ('manager_chick_stock', 'manager_chick_stock', 'manager', 'get', [], '', None),
+        ('review_chick_requests', 'review_chick_requests', 'manager', 'get', [], '', None),
+        ('review_chick_requests:approved', 'review_chick_requests', 'manager', 'get', [], 'tab=approved', None),
+        ('review_chick_requests:history', 'review_chick_requests', 'manager', 'get', [], 'tab=history', None),
+        ('approve_reject_request:approve', 'approve_reject_request', 'manager', 'post',
+         needs('pending_chick_request'), '', {'action': 'approve'}),
+        ('manager_farmers', 'manager_farmers', 'manager', 'get', [], '', None),
+        ('manager_farmer_request_history', 'manager_farmer_request_history', 'manager', 'get',
+         needs('farmer_nin'), '', None),
+        ('manager_feeds', 'manager_feeds', 'manager', 'get', [], '', None),
+        ('manager_feeds_tab:distributions', 'manager_feeds_tab', 'manager', 'get', ['distributions'], '', None),
+        ('manager_feeds_tab:stock', 'manager_feeds_tab', 'manager', 'get', ['stock'], '', None),
+        ('feed_stock_history', 'feed_stock_history', 'manager', 'get', [], '', None),
+        ('review_feed_requests', 'review_feed_requests', 'manager', 'get', [], '', None),
+        ('feed_requests_tab:pending', 'feed_requests_tab', 'manager', 'get', ['pending'], '', None),
+        ('feed_requests_tab:approved', 'feed_requests_tab', 'manager', 'get', ['approved'], '', None),
+        ('feed_requests_tab:all', 'feed_requests_tab', 'manager', 'get', ['all'], '', None),
+        ('approve_reject_feed_request:approve', 'approve_reject_feed_request', 'manager', 'post',
+         needs('pending_feed_request'), '', {'action': 'approve'}),
+        ('manager_reports', 'manager_reports', 'manager', 'get', [], '', None),
+        ('manager_export:payments.csv', 'manager_export', 'manager', 'get', ['payments'],
+         f"from={month_ago}&format=csv", None),
+        ('manager_export:distributions.xlsx', 'manager_export', 'manager', 'get', ['distributions'],
+         f"from={month_ago}&format=xlsx", None),
+        ('manager_announcements', 'manager_announcements', 'manager', 'get', [], '', None),
+        ('manager_user', 'manager_user', 'manager', 'get', [], '', None),
+
+        # sales
+        ('sales_dashboard', 'sales_dashboard', 'sales', 'get', [], '', None),
+        ('register_farmer', 'register_farmer', 'sales', 'get', [], '', None),
+        ('import_farmers', 'import_farmers', 'sales', 'get', [], '', None),
+        ('edit_farmer', 'edit_farmer', 'sales', 'get', needs('farmer_id'), '', None),
+        ('submit_chick_request', 'submit_chick_request', 'sales', 'get', [], '', None),
+        ('submit_chick_request:post', 'submit_chick_request', 'sales', 'post', needs('farmer_id') and [], '',
+         {'form_type': 'chick_request', 'farmer': fx['farmer_id'], 'chick_type': 'broiler_local',
+          'quantity': 100}),
+        ('sales_history', 'sales_history', 'sales', 'get', [], '', None),
+        ('sales_pickup', 'sales_pickup', 'sales', 'get', [], '', None),
+        ('mark_request_as_picked', 'mark_request_as_picked', 'sales', 'get',
+         needs('unpicked_chick_request'), '', None),
+        ('mark_request_as_picked:post', 'mark_request_as_picked', 'sales', 'post',
+         needs('unpicked_chick_request'), '', {'paid_chicks': '0', 'paid_feeds': '0'}),
+        ('sales_feed_pickup', 'sales_feed_pickup', 'sales', 'get', [], '', None),
+        ('mark_feed_request_as_picked', 'mark_feed_request_as_picked', 'sales', 'get',
+         needs('unpicked_feed_request'), '', None),
+        ('mark_feed_request_as_picked:post', 'mark_feed_request_as_picked', 'sales', 'post',
+         needs('unpicked_feed_request'), '', {'paid_feeds': '100000000'}),
+    ]
+
+
+def uncovered_urls(covered):
+    """Named URLs of the benchmarked apps that no scenario exercises (logout, deletes, ...)."""
+    names = set()
+    for pattern in get_resolver().url_patterns:
+        module = getattr(pattern, 'urlconf_name', None)
+        if getattr(module, '__name__', '').split('.')[0] in BENCHMARKED_APPS:
+            names.update(p.name for p in module.urlpatterns if getattr(p, 'name', None))
+    return sorted(names - set(covered))
+
+
+# -------------------- measuring --------------------
+
+def _request(client, method, url, data):
+    if method == 'get':
+        response = client.get(url)
+    else:
+        # roll back so the next repetition sees the same data
+        with transaction.atomic():
+            response = client.post(url, data)
+            transaction.set_rollback(True)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response
+
+
+def _count_queries(run):
+    """(run(), queries it ran on the primary and, when reports can use it, the replica)."""
+    aliases = {DEFAULT_DB_ALIAS, replica_alias()}
+    with ExitStack() as stack:
+        captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in aliases]
+        result = run()
+    # count now: the next request clears the query log
+    return result, sum(len(c) for c in captured)
+
+
+def measure(client, method, url, data=None, repeat=20):
+    """Timings (ms), query counts and peak memory (KiB) of one URL."""
+    cache.clear()
+    started = time.perf_counter()
+    response, cold_queries = _count_queries(lambda: _request(client, method, url, data))
+    cold_ms = (time.perf_counter() - started) * 1000
+
+    _, queries = _count_queries(lambda: _request(client, method, url, data))
+
+    tracemalloc.start()
+    try:
+        _request(client, method, url, data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _request(client, method, url, data)
+        samples.append((time.perf_counter() - started) * 1000)
+
+    profile = getattr(response, 'query_profile', None)  # set by QueryProfilingMiddleware
+    result = {
+        'status': response.status_code,
+        'budget': profile.budget if profile else None,
+        'duplicates': profile.duplicates if profile else None,
+        'cold_ms': round(cold_ms, 3),
+        'cold_queries': cold_queries,
+        'queries': queries,
+        'peak_kib': round(peak / 1024, 1),
+        'mean_ms': round(mean(samples), 3),
+        'max_ms': round(max(samples), 3),
+    }
+    for pct in PERCENTILES:
+        result[f'p{pct}_ms'] = round(percentile(samples, pct), 3)
+    return result
+
+
+def run_benchmarks(repeat=20, only=None, log=None):
+    """
+    Benchmark every scenario against the current database. Returns the
+    report sections: results by scenario, skipped scenarios with the reason,
+    and the named URLs no scenario covers. `only` is a list of substrings of
+    scenario names to keep.
+    """
+    users = bench_users()
+    clients = {None: Client()}
+    for who, user in users.items():
+        clients[who] = Client()
+        clients[who].force_login(user)
+
+    results, skipped = {}, {}
+    planned = scenarios(bench_fixtures())
+    for name, url_name, who, method, args, query, data in planned:
+        if only and not any(part in name for part in only):
+            continue
+        if args is None:
+            skipped[name] = 'no matching rows in the dataset'
+            continue
+        url = reverse(url_name, args=args) + (f'?{query}' if query else '')
+        results[name] = {'url': url, 'method': method.upper(), **measure(clients[who], method, url, data, repeat)}
+        if log:
+            log(name, results[name])
+    return {
+        'results': results,
+        'skipped': skipped,
+        'uncovered': uncovered_urls(url_name for _, url_name, *_ in planned),
+    }
+
+
+def report_meta(**extra):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=settings.BASE_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'created': timezone.now().isoformat(timespec='seconds'),
+        'database': connection.vendor,
+        'django': django.get_version(),
+        'python': platform.python_version(),
+        **extra,
+    }
+
+
+def write_report(path, report):
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(report, fh, indent=2, sort_keys=True)
+        fh.write('\n')
+
+
+def compare_reports(old, new, metrics=('p50_ms', 'p95_ms', 'queries', 'peak_kib')):
+    """[(scenario, metric, old value, new value)] for every scenario present in both reports."""
+    rows = []
+    for name in sorted(set(old['results']) & set(new['results'])):
+        for metric in metrics:
+            rows.append((name, metric, old['results'][name].get(metric), new['results'][name].get(metric)))
+    return rows
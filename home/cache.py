@@ -0,0 +1,95 @@
+"""
+Small versioned cache layer on top of Django's configured cache.
+
+Keys are namespaced and versioned: `cached('homepage', key, builder)` stores
+under `y4c:homepage:v<N>:<key>`. `invalidate('homepage')` bumps N, so every
+key of that namespace goes stale at once without having to know them.
+
+Async views use `acached(namespace, key, builder)`, where `builder` is a
+coroutine function; both share the same keys and counters.
+
+Hit/miss counters are kept per worker process for monitoring (`cache_stats()`).
+"""
+import threading
+from collections import defaultdict
+
+from django.core.cache import cache
+
+
+_stats_lock = threading.Lock()
+_stats = defaultdict(lambda: {'hits': 0, 'misses': 0})
+
+_MISSING = object()
+
+
+def _version_key(namespace):
+    return f"y4c:{namespace}:version"
+
+
+def namespace_version(namespace):
+    return cache.get_or_set(_version_key(namespace), 1, timeout=None)
+
+
+def invalidate(namespace):
+    """Make every cached entry of `namespace` stale."""
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        # version key evicted or never set
+        cache.set(_version_key(namespace), 2, timeout=None)
+
+
+def farmer_status_namespace(farmer_id):
+    """Namespace of one farmer's public status page."""
+    return f"farmer:{farmer_id}"
+
+
+def _count(namespace, hit):
+    with _stats_lock:
+        _stats[namespace]['hits' if hit else 'misses'] += 1
+
+
+def _full_key(namespace, version, key):
+    return f"y4c:{namespace}:v{version}:{key}"
+
+
+def cached(namespace, key, builder, timeout=300):
+    """Return the cached value for `key`, building (and storing) it on a miss."""
+    full_key = _full_key(namespace, namespace_version(namespace), key)
+    value = cache.get(full_key, _MISSING)
+    if value is not _MISSING:
+        _count(namespace, hit=True)
+        return value
+    _count(namespace, hit=False)
+    value = builder()
+    cache.set(full_key, value, timeout)
+    return value
+
+
+async def acached(namespace, key, builder, timeout=300):
+    """cached() for async views: `builder` is awaited on a miss."""
+    version = await cache.aget_or_set(_version_key(namespace), 1, timeout=None)
+    full_key = _full_key(namespace, version, key)
+    value = await cache.aget(full_key, _MISSING)
+    if value is not _MISSING:
+        _count(namespace, hit=True)
+        return value
+    _count(namespace, hit=False)
+    value = await builder()
+    await cache.aset(full_key, value, timeout)
+    return value
+
+
+def cache_stats():
+    """{namespace: {'hits', 'misses', 'hit_rate'}} for this worker process."""
+    with _stats_lock:
+        snapshot = {ns: dict(counts) for ns, counts in _stats.items()}
+    for counts in snapshot.values():
+        lookups = counts['hits'] + counts['misses']
+        counts['hit_rate'] = round(counts['hits'] / lookups, 4) if lookups else None
+    return snapshot
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
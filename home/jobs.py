@@ -0,0 +1,166 @@
+"""
+Database-backed background jobs.
+
+Work that doesn't have to finish before a response is sent is queued as a
+`home.models.Job` row and run later by `manage.py run_jobs`:
+
+    # manager/jobs.py (any app's jobs.py is imported at startup)
+    @job('manager.freeze_report_snapshots')
+    def freeze_report_snapshots():
+        freeze_pending()
+        freeze_debtors()
+
+    # manager.snapshots.queue_freeze(), on every pickup and payment
+    enqueue('manager.freeze_report_snapshots', key=f'report-snapshots:{date.today()}')
+
+`enqueue` writes the row in the caller's transaction (an outbox): if the
+request rolls back, the job was never queued, and the worker can't see it
+before the request's own writes are committed. A `key` makes enqueueing
+idempotent; a second job with the same key is not created.
+
+Workers claim a queued job with a conditional update, so two workers never
+run the same job. A failing handler is retried after JOBS_RETRY_DELAY_SECONDS,
+doubling each attempt, until max_attempts; then the job is marked failed with
+its traceback in last_error. A job left running by a worker that died is
+queued again after JOBS_LOCK_TIMEOUT_SECONDS (or failed, if out of attempts).
+Handlers therefore have to be safe to run more than once.
+"""
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from home.models import Job
+
+
+_handlers = {}
+
+
+def job(name):
+    """Register the decorated function as the handler of jobs called `name`."""
+    def register(func):
+        if name in _handlers and _handlers[name] is not func:
+            raise ValueError(f"Job {name!r} is already registered to {_handlers[name].__qualname__}.")
+        _handlers[name] = func
+        return func
+    return register
+
+
+def registered_jobs():
+    return dict(_handlers)
+
+
+def enqueue(name, payload=None, *, key=None, delay=0, max_attempts=None):
+    """
+    Queue `name(**payload)` to run in `delay` seconds (or as soon as a worker
+    is free). Returns the Job; with a `key` that is already queued or done,
+    the existing one.
+    """
+    if name not in _handlers:
+        raise LookupError(f"No job registered as {name!r}.")
+    fields = dict(
+        name=name,
+        payload=payload or {},
+        idempotency_key=key,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+    if key is None:
+        return Job.objects.create(**fields)
+    # callers queue the same keyed job on every write; most find it already there
+    existing = Job.objects.filter(idempotency_key=key).first()
+    if existing is not None:
+        return existing
+    try:
+        # savepoint: the duplicate key must not break the caller's transaction
+        with transaction.atomic():
+            return Job.objects.create(**fields)
+    except IntegrityError:
+        return Job.objects.get(idempotency_key=key)
+
+
+# -------------------- worker side --------------------
+
+def claim_next(worker):
+    """Mark the next due job as running by `worker` and return it (None if nothing is due)."""
+    while True:
+        with transaction.atomic():
+            candidate = (Job.objects
+                         .select_for_update(skip_locked=True)
+                         .filter(status='queued', run_after__lte=timezone.now())
+                         .order_by('run_after', 'id')
+                         .values_list('id', flat=True)
+                         .first())
+            if candidate is None:
+                return None
+            now = timezone.now()
+            claimed = (Job.objects
+                       .filter(id=candidate, status='queued')
+                       .update(status='running', attempts=F('attempts') + 1, locked_by=worker, locked_at=now))
+        if claimed:
+            return Job.objects.get(id=candidate)
+        # another worker got there first; try the next one
+
+
+def retry_delay(attempts):
+    return settings.JOBS_RETRY_DELAY_SECONDS * 2 ** max(attempts - 1, 0)
+
+
+def run_job(claimed):
+    """Run a claimed job and record the outcome. Returns True if it succeeded."""
+    handler = _handlers.get(claimed.name)
+    try:
+        if handler is None:
+            raise LookupError(f"No job registered as {claimed.name!r}.")
+        with transaction.atomic():
+            handler(**claimed.payload)
+    except Exception:
+        claimed.last_error = traceback.format_exc()
+        claimed.locked_by, claimed.locked_at = '', None
+        if claimed.attempts >= claimed.max_attempts:
+            claimed.status, claimed.finished_on = 'failed', timezone.now()
+        else:
+            claimed.status = 'queued'
+            claimed.run_after = timezone.now() + timedelta(seconds=retry_delay(claimed.attempts))
+        claimed.save(update_fields=['status', 'run_after', 'last_error', 'locked_by', 'locked_at', 'finished_on'])
+        return False
+
+    claimed.status, claimed.finished_on = 'done', timezone.now()
+    claimed.locked_by, claimed.locked_at = '', None
+    claimed.save(update_fields=['status', 'finished_on', 'locked_by', 'locked_at'])
+    return True
+
+
+def requeue_stale(timeout=None):
+    """Give back jobs whose worker stopped without finishing them. Returns how many."""
+    timeout = settings.JOBS_LOCK_TIMEOUT_SECONDS if timeout is None else timeout
+    now = timezone.now()
+    stale = Job.objects.filter(status='running', locked_at__lt=now - timedelta(seconds=timeout))
+    failed = (stale.filter(attempts__gte=F('max_attempts'))
+              .update(status='failed', finished_on=now, locked_by='', locked_at=None,
+                      last_error='Worker stopped while running the job.'))
+    queued = stale.update(status='queued', run_after=now, locked_by='', locked_at=None)
+    return failed + queued
+
+
+def run_pending(worker='inline', limit=None):
+    """Run due jobs until none is left (or `limit` ran). Returns (succeeded, failed)."""
+    succeeded = failed = 0
+    while limit is None or succeeded + failed < limit:
+        claimed = claim_next(worker)
+        if claimed is None:
+            break
+        if run_job(claimed):
+            succeeded += 1
+        else:
+            failed += 1
+    return succeeded, failed
+
+
+def job_counts():
+    """{status: number of jobs} for every status."""
+    counts = dict(Job.objects.values_list('status').annotate(n=Count('id')).order_by())
+    return {status: counts.get(status, 0) for status, _ in Job.STATUS_CHOICES}
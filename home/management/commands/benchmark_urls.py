@@ -0,0 +1,93 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings, setup_databases, teardown_databases
+
+from home.benchmark import (
+    SCALES, compare_reports, parse_scale, report_meta, run_benchmarks, seed_dataset, write_report,
+)
+
+
+class Command(BaseCommand):
+    help = ("Seed a dataset (1k/100k/1m chick requests) into a throwaway test database, request every "
+            "page of home/manager/sales with the test client and write latency percentiles, query "
+            "counts and peak memory per URL to a JSON report.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", default="1k",
+                            help=f"Dataset size: {', '.join(SCALES)} or a number of chick requests")
+        parser.add_argument("--repeat", type=int, default=20, help="Timed requests per URL")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for the dataset")
+        parser.add_argument("--only", action="append", default=[],
+                            help="Only scenarios whose name contains this (repeatable)")
+        parser.add_argument("-o", "--output", help="Write the JSON report to this file")
+        parser.add_argument("--compare", help="Earlier JSON report to print deltas against")
+        parser.add_argument("--use-current-db", action="store_true",
+                            help="Benchmark the configured database as it is (no test database, no seeding). "
+                                 "Adds the bench_manager/bench_sales/peter users if missing.")
+
+    def handle(self, *args, **opts):
+        try:
+            scale = parse_scale(opts["scale"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if opts["repeat"] < 1:
+            raise CommandError("--repeat must be at least 1.")
+        baseline = None
+        if opts["compare"]:
+            try:
+                with open(opts["compare"], encoding="utf-8") as fh:
+                    baseline = json.load(fh)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Can't read {opts['compare']}: {exc}")
+
+        # production-like: no query log kept, and let the test client's host through
+        serving = override_settings(DEBUG=False, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"])
+        serving.enable()
+        old_config = None
+        try:
+            if not opts["use_current_db"]:
+                # test databases for every alias; the replica alias mirrors the default one
+                old_config = setup_databases(verbosity=0, interactive=False)
+                self._seed(scale, opts["seed"])
+            self.stdout.write(self.style.MIGRATE_HEADING("Benchmarking URLs…"))
+            sections = run_benchmarks(opts["repeat"], opts["only"], log=self._log)
+        finally:
+            if old_config is not None:
+                teardown_databases(old_config, verbosity=0)
+            serving.disable()
+
+        report = {
+            "meta": report_meta(scale=None if opts["use_current_db"] else scale,
+                                seed=opts["seed"], repeat=opts["repeat"]),
+            **sections,
+        }
+        for name, reason in sections["skipped"].items():
+            self.stdout.write(self.style.WARNING(f"skipped {name}: {reason}"))
+        if opts["output"]:
+            write_report(opts["output"], report)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {opts['output']}."))
+        if baseline:
+            self._print_comparison(baseline, report)
+
+    def _seed(self, scale, seed):
+        started = time.perf_counter()
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Seeding {scale:,} chick requests…"))
+        seed_dataset(scale, seed)
+        self.stdout.write(f"  seeded in {time.perf_counter() - started:.1f}s")
+
+    def _log(self, name, result):
+        self.stdout.write(f"  {name:<40} {result['status']:>3}  p50 {result['p50_ms']:>9.2f} ms  "
+                          f"p95 {result['p95_ms']:>9.2f} ms  {result['queries']:>3} queries  "
+                          f"{result['peak_kib']:>9.1f} KiB")
+
+    def _print_comparison(self, old, new):
+        self.stdout.write("")
+        self.stdout.write(f"{'scenario':<40} {'metric':<9} {'before':>10} {'after':>10} {'change':>8}")
+        for name, metric, before, after in compare_reports(old, new):
+            if before is None or after is None:
+                continue
+            change = f"{(after - before) / before * 100:+.0f}%" if before else "-"
+            self.stdout.write(f"{name:<40} {metric:<9} {before:>10} {after:>10} {change:>8}")
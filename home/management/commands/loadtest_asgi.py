@@ -0,0 +1,334 @@
+import asyncio
+import io
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from queue import Queue
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from django.urls import reverse
+
+from home.benchmark import (
+    SCALES, bench_fixtures, bench_users, parse_scale, percentile, report_meta, seed_dataset, write_report,
+)
+
+
+class Command(BaseCommand):
+    help = ("Load-test the async read views (homepage, public request status, sales and manager dashboards) "
+            "through Django's WSGI and ASGI handlers with the same number of workers, in-process, and "
+            "compare throughput and latency.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4,
+                            help="WSGI: threads serving one request each at a time. ASGI: event loops.")
+        parser.add_argument("--clients", type=int, default=32,
+                            help="Concurrent clients sending requests back to back")
+        parser.add_argument("--duration", type=float, default=10, help="Seconds of load per handler")
+        parser.add_argument("--db-latency-ms", type=float, default=0,
+                            help="Add this much latency to every query, like a database across the network")
+        parser.add_argument("--scale", default="1k",
+                            help=f"Dataset size: {', '.join(SCALES)} or a number of chick requests")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for the dataset")
+        parser.add_argument("-o", "--output", help="Write the JSON report to this file")
+        parser.add_argument("--use-current-db", action="store_true",
+                            help="Load the configured database as it is (no test database, no seeding). "
+                                 "Adds the bench_manager/bench_sales users if missing.")
+
+    def handle(self, *args, **opts):
+        try:
+            scale = parse_scale(opts["scale"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if opts["workers"] < 1 or opts["clients"] < 1:
+            raise CommandError("--workers and --clients must be at least 1.")
+        if opts["duration"] <= 0:
+            raise CommandError("--duration must be positive.")
+
+        serving = override_settings(DEBUG=False, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"])
+        serving.enable()
+        old_config = None
+        results = {}
+        try:
+            if not opts["use_current_db"]:
+                old_config = setup_databases(verbosity=0, interactive=False)
+                self.stdout.write(self.style.MIGRATE_HEADING(f"Seeding {scale:,} chick requests…"))
+                seed_dataset(scale, opts["seed"])
+            targets = self._targets()
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{opts['workers']} workers, {opts['clients']} clients, {opts['duration']:g}s per handler"
+                + (f", +{opts['db_latency_ms']:g} ms per query" if opts["db_latency_ms"] else "")))
+            with _query_latency(opts["db_latency_ms"] / 1000):
+                for label, run in (("wsgi", self._run_wsgi), ("asgi", self._run_asgi)):
+                    self.stdout.write(f"  {label}…")
+                    results[label] = run(targets, opts["workers"], opts["clients"], opts["duration"])
+        finally:
+            if old_config is not None:
+                teardown_databases(old_config, verbosity=0)
+            serving.disable()
+
+        self._report(results, targets)
+        if opts["output"]:
+            write_report(opts["output"], {
+                "meta": report_meta(scale=None if opts["use_current_db"] else scale, seed=opts["seed"],
+                                    workers=opts["workers"], clients=opts["clients"],
+                                    duration=opts["duration"], db_latency_ms=opts["db_latency_ms"]),
+                "results": results,
+            })
+            self.stdout.write(self.style.SUCCESS(f"Report written to {opts['output']}."))
+
+    # -------------------- targets --------------------
+
+    def _targets(self):
+        """(name, path, query string, cookie header) the clients cycle through."""
+        users = bench_users()
+        cookies = {}
+        for who, user in users.items():
+            client = Client()
+            client.force_login(user)
+            cookies[who] = f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+        nin = bench_fixtures()["farmer_nin"]
+        targets = [
+            ("homepage", reverse("homepage"), "", ""),
+            ("sales_dashboard", reverse("sales_dashboard"), "", cookies["sales"]),
+            ("manager_dashboard", reverse("manager_dashboard"), "", cookies["manager"]),
+        ]
+        if nin:
+            targets.append(("public_request_status", reverse("public_request_status"), f"nin={nin}", ""))
+        return targets
+
+    # -------------------- handlers --------------------
+
+    def _run_wsgi(self, targets, workers, clients, duration):
+        """`workers` threads take requests off one queue, like a threaded WSGI server."""
+        app = get_wsgi_application()
+        jobs = Queue()
+
+        def worker():
+            try:
+                while (job := jobs.get()) is not None:
+                    environ, future = job
+                    future.set_result(_wsgi_get(app, environ))
+            finally:
+                connections.close_all()
+
+        def client(recorder, deadline, offset):
+            i = offset
+            while time.perf_counter() < deadline:
+                name, path, query, cookie = targets[i % len(targets)]
+                i += 1
+                started = time.perf_counter()
+                future = Future()
+                jobs.put((_environ(path, query, cookie), future))
+                recorder.add(name, future.result(), time.perf_counter() - started)
+
+        pool = [threading.Thread(target=worker) for _ in range(workers)]
+        for t in pool:
+            t.start()
+        try:
+            return _drive(targets, clients, duration,
+                          lambda recorder, deadline: [threading.Thread(target=client, args=(recorder, deadline, i))
+                                                      for i in range(clients)])
+        finally:
+            for _ in pool:
+                jobs.put(None)
+            for t in pool:
+                t.join()
+
+    def _run_asgi(self, targets, workers, clients, duration):
+        """`workers` event loops, each serving its share of the clients concurrently."""
+        app = get_asgi_application()
+
+        def event_loop(recorder, deadline, offsets):
+            async def client(offset):
+                i = offset
+                while time.perf_counter() < deadline:
+                    name, path, query, cookie = targets[i % len(targets)]
+                    i += 1
+                    started = time.perf_counter()
+                    status = await _asgi_get(app, path, query, cookie)
+                    recorder.add(name, status, time.perf_counter() - started)
+
+            async def main():
+                await asyncio.gather(*(client(offset) for offset in offsets))
+            asyncio.run(main())
+
+        # each request's ORM calls run on their own thread under ASGI, so its
+        # connection can't be reused by the next request (see young4chicks/asgi.py)
+        with _conn_max_age(0):
+            return _drive(targets, clients, duration,
+                          lambda recorder, deadline: [
+                              threading.Thread(target=event_loop,
+                                               args=(recorder, deadline, range(w, clients, workers)))
+                              for w in range(min(workers, clients))])
+
+    # -------------------- report --------------------
+
+    def _report(self, results, targets):
+        rows = [
+            ("requests", "requests", "{:,}"),
+            ("errors", "errors", "{:,}"),
+            ("requests / s", "rps", "{:.1f}"),
+            ("p50 ms", "p50_ms", "{:.1f}"),
+            ("p95 ms", "p95_ms", "{:.1f}"),
+            ("p99 ms", "p99_ms", "{:.1f}"),
+        ]
+        rows += [(f"{name} p50 ms", name, "{:.1f}") for name, *_ in targets]
+        wsgi, asgi = results["wsgi"], results["asgi"]
+        self.stdout.write("")
+        self.stdout.write(f"{'':<32} {'wsgi':>10} {'asgi':>10}")
+        for title, key, fmt in rows:
+            before = wsgi.get(key, wsgi["views"].get(key, {}).get("p50_ms"))
+            after = asgi.get(key, asgi["views"].get(key, {}).get("p50_ms"))
+            if before is None or after is None:
+                continue
+            self.stdout.write(f"{title:<32} {fmt.format(before):>10} {fmt.format(after):>10}")
+
+
+# -------------------- requests --------------------
+
+def _environ(path, query, cookie):
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "SCRIPT_NAME": "",
+        "SERVER_NAME": "testserver",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "REMOTE_ADDR": "127.0.0.1",
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+    }
+    if cookie:
+        environ["HTTP_COOKIE"] = cookie
+    return environ
+
+
+def _wsgi_get(app, environ):
+    status = []
+    body = app(environ, lambda line, headers, exc_info=None: status.append(int(line[:3])))
+    try:
+        b"".join(body)
+    finally:
+        body.close()  # request_finished: the connection is kept or closed here
+    return status[0]
+
+
+async def _asgi_get(app, path, query, cookie):
+    headers = [(b"host", b"testserver")]
+    if cookie:
+        headers.append((b"cookie", cookie.encode()))
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "headers": headers, "client": ("127.0.0.1", 0), "server": ("testserver", 80),
+    }
+    requested = False
+    status = []
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()  # the client never disconnects
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+# -------------------- measuring --------------------
+
+class _Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.errors = 0
+
+    def add(self, name, status, seconds):
+        with self.lock:
+            self.samples.setdefault(name, []).append(seconds * 1000)
+            self.errors += status != 200
+
+
+def _drive(targets, clients, duration, make_threads):
+    """Warm the pages up with one thread, then run every client for `duration` seconds."""
+    warmup = make_threads(_Recorder(), time.perf_counter() + min(duration / 10, 1))[0]
+    warmup.start()
+    warmup.join()
+
+    recorder = _Recorder()
+    threads = make_threads(recorder, time.perf_counter() + duration)
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    everything = [ms for samples in recorder.samples.values() for ms in samples]
+    if not everything:
+        raise CommandError("No request finished; raise --duration.")
+    return {
+        "requests": len(everything),
+        "errors": recorder.errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(len(everything) / elapsed, 2),
+        "p50_ms": round(percentile(everything, 50), 3),
+        "p95_ms": round(percentile(everything, 95), 3),
+        "p99_ms": round(percentile(everything, 99), 3),
+        "views": {name: {"requests": len(samples), "p50_ms": round(percentile(samples, 50), 3)}
+                  for name, samples in sorted(recorder.samples.items())},
+    }
+
+
+@contextmanager
+def _conn_max_age(seconds):
+    """Set CONN_MAX_AGE of every alias for the connections opened meanwhile."""
+    saved = {alias: connections.settings[alias].get("CONN_MAX_AGE") for alias in connections}
+    for alias in connections:
+        # connection wrappers in every thread share this dict
+        connections.settings[alias]["CONN_MAX_AGE"] = seconds
+    try:
+        yield
+    finally:
+        for alias, value in saved.items():
+            connections.settings[alias]["CONN_MAX_AGE"] = value
+
+
+@contextmanager
+def _query_latency(seconds):
+    """Sleep `seconds` before every query on connections opened meanwhile."""
+    if not seconds:
+        yield
+        return
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def add_delay(sender, connection, **kwargs):
+        if delay not in connection.execute_wrappers:
+            # first: execute_wrapper() blocks pop the last entry when they exit, and
+            # a connection opened inside one would otherwise lose the delay with it
+            connection.execute_wrappers.insert(0, delay)
+
+    connection_created.connect(add_delay, dispatch_uid="loadtest_asgi.query_latency")
+    try:
+        yield
+    finally:
+        connection_created.disconnect(dispatch_uid="loadtest_asgi.query_latency")
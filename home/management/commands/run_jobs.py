@@ -0,0 +1,72 @@
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from home.jobs import claim_next, registered_jobs, requeue_stale, run_job
+
+
+class Command(BaseCommand):
+    help = ("Run queued background jobs (home.jobs). Polls the jobs table until stopped "
+            "with Ctrl-C or SIGTERM; the job being run is finished first.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run the jobs that are due, then exit")
+        parser.add_argument("--sleep", type=float, default=2, help="Seconds to wait when the queue is empty")
+        parser.add_argument("--max-jobs", type=int, default=0,
+                            help="Exit after this many jobs (0: no limit), e.g. to recycle the process")
+        parser.add_argument("--worker", default=f"{socket.gethostname()}:{os.getpid()}",
+                            help="Name recorded on the jobs this worker claims")
+
+    def handle(self, *args, **opts):
+        if opts["sleep"] <= 0:
+            raise CommandError("--sleep must be positive.")
+        self.stopping = False
+        previous = {sig: signal.signal(sig, self._stop) for sig in (signal.SIGTERM, signal.SIGINT)}
+        try:
+            self._work(opts)
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+
+    def _work(self, opts):
+        worker = opts["worker"]
+        self.stdout.write(f"Worker {worker}: {', '.join(sorted(registered_jobs())) or 'no jobs registered'}")
+        succeeded = failed = 0
+        last_sweep = None
+        while not self.stopping:
+            close_old_connections()
+            if last_sweep is None or time.monotonic() - last_sweep > 60:
+                if requeued := requeue_stale():
+                    self.stdout.write(self.style.WARNING(f"Requeued {requeued} abandoned job(s)."))
+                last_sweep = time.monotonic()
+
+            claimed = claim_next(worker)
+            if claimed is None:
+                if opts["once"]:
+                    break
+                time.sleep(opts["sleep"])
+                continue
+
+            started = time.perf_counter()
+            ok = run_job(claimed)
+            ms = (time.perf_counter() - started) * 1000
+            if ok:
+                succeeded += 1
+                self.stdout.write(f"  {claimed} in {ms:.0f} ms")
+            else:
+                failed += 1
+                self.stdout.write(self.style.ERROR(
+                    f"  {claimed} failed (attempt {claimed.attempts}/{claimed.max_attempts}): "
+                    f"{claimed.last_error.strip().splitlines()[-1]}"))
+            if opts["max_jobs"] and succeeded + failed >= opts["max_jobs"]:
+                break
+
+        close_old_connections()
+        self.stdout.write(self.style.SUCCESS(f"Ran {succeeded + failed} job(s), {failed} failed."))
+
+    def _stop(self, signum, frame):
+        self.stopping = True
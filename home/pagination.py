@@ -0,0 +1,210 @@
+"""
+Keyset (cursor) pagination.
+
+Instead of OFFSET, each page asks for the rows that come strictly after the
+last row of the previous page in the ordering. For ('-submitted_on', '-id'):
+
+    WHERE submitted_on < :s OR (submitted_on = :s AND id < :id)
+
+so page 1000 costs the same as page 1 and there is no COUNT(*). The cursor
+handed to the browser is an opaque url-safe token of those key values (plus
+the direction, for "Previous" links).
+
+The ordering must end with a unique column (normally 'id') and only use
+non-null model fields or annotations (Coalesce nullable dates first).
+
+Views normally call `paginate(request, queryset, ordering)`, which reads the
+cursor from the query string and fills in `page.prev_url` / `page.next_url`.
+Totals are optional: `count=True` adds `page.count_label`, an exact count for
+small results and an estimate (or "1,000+") for big ones.
+"""
+import base64
+import binascii
+import datetime
+import json
+import uuid
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+
+
+COUNT_CAP = 1000  # beyond this many rows an exact COUNT(*) isn't worth it
+
+
+class KeysetPage:
+    """One page of rows plus the cursors of its neighbours (None at either end)."""
+
+    def __init__(self, items, next_cursor, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.next_url = None
+        self.prev_url = None
+        self.count = None
+        self.count_kind = None   # 'exact', 'estimate' or 'at_least'
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    @property
+    def count_label(self):
+        if self.count is None:
+            return ''
+        if self.count_kind == 'estimate':
+            return f"~{self.count:,}"
+        if self.count_kind == 'at_least':
+            return f"{self.count:,}+"
+        return f"{self.count:,}"
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+# -------------------- cursors --------------------
+
+def _key_to_json(value):
+    # Full precision on purpose: DjangoJSONEncoder drops microseconds, which
+    # would make rows sharing a millisecond repeat or vanish between pages.
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f"Cannot use {type(value).__name__} as a keyset pagination key")
+
+
+def encode_cursor(values, backwards=False):
+    payload = {'k': values, 'b': 1} if backwards else {'k': values}
+    raw = json.dumps(payload, default=_key_to_json, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """(key values, backwards) inside `token`, or (None, False) if it is missing or tampered with."""
+    if not token:
+        return None, False
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (binascii.Error, ValueError):
+        return None, False
+    if not isinstance(payload, dict) or not isinstance(payload.get('k'), list):
+        return None, False
+    return payload['k'], bool(payload.get('b'))
+
+
+# -------------------- pages --------------------
+
+def _parse_ordering(ordering):
+    return [(key.lstrip('-'), key.startswith('-')) for key in ordering]
+
+
+def _after(keys, values):
+    """Rows strictly after `values` in the ordering described by `keys`."""
+    condition = Q()
+    for i, (field, descending) in enumerate(keys):
+        step = Q(**{f'{field}__lt' if descending else f'{field}__gt': values[i]})
+        for (prev_field, _), prev_value in zip(keys[:i], values):
+            step &= Q(**{prev_field: prev_value})
+        condition |= step
+    return condition
+
+
+def _cursor_of(row, keys, backwards=False):
+    return encode_cursor([getattr(row, field) for field, _ in keys], backwards)
+
+
+def keyset_page(queryset, ordering, cursor=None, per_page=25):
+    """
+    Return the KeysetPage of `queryset` (ordered by `ordering`) that follows
+    (or, for a "previous" cursor, precedes) `cursor`. An unreadable cursor
+    just gives the first page.
+    """
+    keys = _parse_ordering(ordering)
+    values, backwards = decode_cursor(cursor)
+    if values is None or len(values) != len(keys):
+        values, backwards = None, False
+
+    # walking backwards = walking forwards over the reversed ordering
+    walk_keys = [(field, not desc) for field, desc in keys] if backwards else keys
+    qs = queryset.order_by(*[('-' if desc else '') + field for field, desc in walk_keys])
+    if values is not None:
+        try:
+            qs = qs.filter(_after(walk_keys, values))
+        except (ValueError, TypeError, ValidationError):
+            values, backwards = None, False  # well-formed token, nonsense values: first page
+            qs = queryset.order_by(*ordering)
+
+    rows = list(qs[:per_page + 1])
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    if not rows:
+        return KeysetPage(rows, None)
+    if backwards:
+        next_cursor = _cursor_of(rows[-1], keys)
+        prev_cursor = _cursor_of(rows[0], keys, backwards=True) if more else None
+    else:
+        next_cursor = _cursor_of(rows[-1], keys) if more else None
+        prev_cursor = _cursor_of(rows[0], keys, backwards=True) if values is not None else None
+    return KeysetPage(rows, next_cursor, prev_cursor)
+
+
+# -------------------- counts --------------------
+
+def estimate_count(queryset, cap=COUNT_CAP):
+    """
+    (count, kind) without a full COUNT(*) on big tables. PostgreSQL uses the
+    planner's estimate; elsewhere rows are counted up to `cap` and anything
+    beyond is reported as 'at_least'.
+    """
+    conn = connections[queryset.db]
+    if conn.vendor == 'postgresql':
+        sql, params = queryset.order_by().query.sql_with_params()
+        with conn.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimate = int(plan[0]['Plan']['Plan Rows'])
+        if estimate > cap:
+            return estimate, 'estimate'
+
+    counted = queryset.order_by().values('pk')[:cap + 1].count()
+    if counted > cap:
+        return cap, 'at_least'
+    return counted, 'exact'
+
+
+# -------------------- views --------------------
+
+def paginate(request, queryset, ordering, per_page=25, param='cursor', count=False, url='', params=None):
+    """
+    keyset_page() driven by `request.GET[param]`, with prev/next links that keep
+    the other query parameters (or `params`, a QueryDict, when given). `url`
+    prefixes the links (default: same page).
+    """
+    page = keyset_page(queryset, ordering, request.GET.get(param), per_page)
+    base = request.GET if params is None else params
+    for attr, cursor in (('next_url', page.next_cursor), ('prev_url', page.prev_cursor)):
+        if cursor is not None:
+            params = base.copy()
+            params[param] = cursor
+            setattr(page, attr, f"{url}?{params.urlencode()}")
+    if count:
+        page.count, page.count_kind = estimate_count(queryset)
+    return page
@@ -0,0 +1,233 @@
+"""
+Per-view query profiling.
+
+QueryProfilingMiddleware wraps every request with a database execute_wrapper
+and records, per resolved view name:
+  - the number of queries and the time spent in SQL;
+  - duplicate-query fingerprints (the same SQL run more than once in one
+    request, the signature of an N+1 loop);
+  - template render time and total time.
+
+In DEBUG (or with QUERY_PROFILING_HEADERS = True) each response carries the
+numbers as X-Queries / X-SQL-Time / X-Duplicate-Queries / X-Render-Time and
+a Server-Timing header the browser dev tools show. Running totals per view
+are kept per worker process (`query_stats()`, staff-only JSON at
+/profiling/stats/), views over their budget are logged to `home.profiling`,
+and request latency/query counts go to the /metrics series (home.prometheus).
+
+Budgets are declared on the view:
+
+    @login_required
+    @query_budget(14)
+    def dashboard_view(request): ...
+
+and checked in tests with home.testing.QueryBudgetMixin. Budgets count every
+query of the request, including the session and user lookups.
+
+The middleware runs natively under ASGI too. There the ORM runs on the
+request's database thread, whose connections are not the event loop's, so
+the execute wrappers are installed from that thread.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import Template as DjangoTemplate
+
+from home.prometheus import observe_request
+
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('query_profile', default=None)
+
+_stats_lock = threading.Lock()
+_stats = defaultdict(lambda: {'requests': 0, 'queries': 0, 'max_queries': 0, 'sql_ms': 0.0,
+                              'render_ms': 0.0, 'total_ms': 0.0, 'duplicates': 0, 'over_budget': 0})
+
+_IN_LIST = re.compile(r'\bIN \((?:%s, )*%s\)')
+_SPACES = re.compile(r'\s+')
+
+
+def query_budget(max_queries):
+    """Declare the most queries a view may run per request (auth lookups included)."""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def fingerprint(sql):
+    """SQL with parameter lists collapsed, so `id IN (%s, %s)` and `id IN (%s)` match."""
+    return _IN_LIST.sub('IN (...)', _SPACES.sub(' ', sql)).strip()
+
+
+class QueryProfile:
+    """What one request did: filled in by the execute wrapper and the render hook."""
+
+    def __init__(self):
+        self.view = None
+        self.budget = None
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.render_ms = 0.0
+        self.total_ms = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # django.db execute_wrapper
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_ms += (time.perf_counter() - started) * 1000
+            self.queries += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """Queries beyond the first run of each fingerprint."""
+        return sum(n - 1 for n in self.fingerprints.values() if n > 1)
+
+    def top_duplicates(self, limit=5):
+        return [(n, sql) for sql, n in self.fingerprints.most_common(limit) if n > 1]
+
+    @property
+    def over_budget(self):
+        return self.budget is not None and self.queries > self.budget
+
+
+def _timed_render(render):
+    def wrapper(self, *args, **kwargs):
+        profile = _current.get()
+        if profile is None:
+            return render(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            profile.render_ms += (time.perf_counter() - started) * 1000
+    wrapper.profiled = True
+    return wrapper
+
+
+def _install_render_hook():
+    # top-level template renders only; {% include %}s happen inside this call
+    if not getattr(DjangoTemplate.render, 'profiled', False):
+        DjangoTemplate.render = _timed_render(DjangoTemplate.render)
+
+
+def _wrap_connections(stack, profile):
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(profile))
+
+
+class QueryProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        _install_render_hook()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        profile = QueryProfile()
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                _wrap_connections(stack, profile)
+                response = self.get_response(request)
+        finally:
+            profile.total_ms = (time.perf_counter() - started) * 1000
+            _current.reset(token)
+        return self._finish(request, response, profile)
+
+    async def __acall__(self, request):
+        profile = QueryProfile()
+        token = _current.set(profile)
+        started = time.perf_counter()
+        stack = ExitStack()
+        try:
+            await sync_to_async(_wrap_connections)(stack, profile)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            profile.total_ms = (time.perf_counter() - started) * 1000
+            _current.reset(token)
+        return self._finish(request, response, profile)
+
+    def _finish(self, request, response, profile):
+        if profile.view is None and getattr(request, 'resolver_match', None):
+            profile.view = request.resolver_match.view_name
+        if profile.view:
+            _record(profile)
+            observe_request(profile.view, request.method, response.status_code, profile.total_ms / 1000,
+                            profile.queries, profile.sql_ms / 1000)
+        response.query_profile = profile
+        if settings.DEBUG or getattr(settings, 'QUERY_PROFILING_HEADERS', False):
+            _add_headers(response, profile)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = _current.get()
+        if profile is not None:
+            profile.view = request.resolver_match.view_name
+            profile.budget = getattr(view_func, 'query_budget', None)
+
+
+def _add_headers(response, profile):
+    response['X-Queries'] = str(profile.queries)
+    response['X-SQL-Time'] = f"{profile.sql_ms:.1f}ms"
+    response['X-Duplicate-Queries'] = str(profile.duplicates)
+    response['X-Render-Time'] = f"{profile.render_ms:.1f}ms"
+    response['Server-Timing'] = (f'sql;desc="{profile.queries} queries";dur={profile.sql_ms:.1f}, '
+                                 f'render;dur={profile.render_ms:.1f}, total;dur={profile.total_ms:.1f}')
+
+
+def _record(profile):
+    with _stats_lock:
+        stats = _stats[profile.view]
+        stats['requests'] += 1
+        stats['queries'] += profile.queries
+        stats['max_queries'] = max(stats['max_queries'], profile.queries)
+        stats['sql_ms'] += profile.sql_ms
+        stats['render_ms'] += profile.render_ms
+        stats['total_ms'] += profile.total_ms
+        stats['duplicates'] += profile.duplicates
+        stats['over_budget'] += profile.over_budget
+        stats['budget'] = profile.budget
+    if profile.over_budget:
+        logger.warning("%s ran %d queries (budget %d)", profile.view, profile.queries, profile.budget)
+
+
+def query_stats():
+    """{view: totals and per-request averages} for this worker process."""
+    with _stats_lock:
+        snapshot = {view: dict(stats) for view, stats in _stats.items()}
+    for stats in snapshot.values():
+        n = stats['requests']
+        for key in ('queries', 'sql_ms', 'render_ms', 'total_ms'):
+            stats[f'avg_{key}'] = round(stats[key] / n, 3)
+        for key in ('sql_ms', 'render_ms', 'total_ms'):
+            stats[key] = round(stats[key], 3)
+    return snapshot
+
+
+def reset_query_stats():
+    with _stats_lock:
+        _stats.clear()
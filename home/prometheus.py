@@ -0,0 +1,168 @@
+"""
+/metrics in the Prometheus text exposition format, without a client library.
+
+Performance series are counted in-process as requests are served:
+  - y4c_http_requests_total{view,method,status}
+  - y4c_http_request_duration_seconds{view} (histogram)
+  - y4c_db_queries_total{view}, y4c_db_query_seconds_total{view}
+  - y4c_cache_requests_total{namespace,result} (from home.cache)
+
+QueryProfilingMiddleware feeds the request series, so nothing is measured
+twice. Like the cache stats they are per worker process; Prometheus tells
+the workers apart by scrape target, and rate() copes with restarts.
+
+Business series (stock by chick_type/feed_type, pending and awaiting-pickup
+queues, pickups so far) come from manager.metrics.business_gauges(), and
+background jobs by status from home.jobs.job_counts(). They
+are rebuilt at most every METRICS_REFRESH_SECONDS through the shared cache,
+so scrapes don't run the dashboard queries each time, and read from the
+replica when there is one.
+"""
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+from home.cache import cache_stats, cached
+from home.jobs import job_counts
+from home.replicas import use_replica
+from manager.metrics import business_gauges
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+
+_lock = threading.Lock()
+_requests = defaultdict(int)      # (view, method, status) -> count
+_latency = {}                     # view -> [bucket counts..., +Inf count, sum]
+_queries = defaultdict(int)       # view -> queries
+_query_seconds = defaultdict(float)
+
+
+def observe_request(view, method, status, seconds, queries, query_seconds):
+    """Count one served request (called by QueryProfilingMiddleware)."""
+    with _lock:
+        _requests[(view, method, str(status))] += 1
+        buckets = _latency.setdefault(view, [0] * (len(LATENCY_BUCKETS) + 1) + [0.0])
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                buckets[i] += 1
+        buckets[len(LATENCY_BUCKETS)] += 1
+        buckets[-1] += seconds
+        _queries[view] += queries
+        _query_seconds[view] += query_seconds
+
+
+def reset_metrics():
+    with _lock:
+        _requests.clear()
+        _latency.clear()
+        _queries.clear()
+        _query_seconds.clear()
+
+
+def _business_snapshot():
+    with use_replica():
+        return {'refreshed': time.time(), **business_gauges(), 'jobs': job_counts()}
+
+
+def business_snapshot():
+    return cached('metrics', 'business', _business_snapshot, timeout=settings.METRICS_REFRESH_SECONDS)
+
+
+# -------------------- exposition --------------------
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _number(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(int(value))
+
+
+class _Writer:
+    def __init__(self):
+        self.lines = []
+
+    def family(self, name, kind, help_text):
+        self.lines.append(f'# HELP {name} {help_text}')
+        self.lines.append(f'# TYPE {name} {kind}')
+
+    def sample(self, name, value, **labels):
+        self.lines.append(f'{name}{_labels(**labels)} {_number(value)}')
+
+    def text(self):
+        return '\n'.join(self.lines) + '\n'
+
+
+def render_metrics():
+    """Every series as Prometheus text."""
+    with _lock:
+        requests = dict(_requests)
+        latency = {view: list(buckets) for view, buckets in _latency.items()}
+        queries = dict(_queries)
+        query_seconds = dict(_query_seconds)
+    out = _Writer()
+
+    out.family('y4c_http_requests_total', 'counter', 'Requests served, by view, method and status.')
+    for (view, method, status), count in sorted(requests.items()):
+        out.sample('y4c_http_requests_total', count, view=view, method=method, status=status)
+
+    out.family('y4c_http_request_duration_seconds', 'histogram', 'Time to serve a request, by view.')
+    for view, buckets in sorted(latency.items()):
+        for bound, count in zip(LATENCY_BUCKETS, buckets):
+            out.sample('y4c_http_request_duration_seconds_bucket', count, view=view, le=bound)
+        out.sample('y4c_http_request_duration_seconds_bucket', buckets[len(LATENCY_BUCKETS)], view=view, le='+Inf')
+        out.sample('y4c_http_request_duration_seconds_sum', buckets[-1], view=view)
+        out.sample('y4c_http_request_duration_seconds_count', buckets[len(LATENCY_BUCKETS)], view=view)
+
+    out.family('y4c_db_queries_total', 'counter', 'Database queries run while serving requests, by view.')
+    for view, count in sorted(queries.items()):
+        out.sample('y4c_db_queries_total', count, view=view)
+    out.family('y4c_db_query_seconds_total', 'counter', 'Time spent in SQL while serving requests, by view.')
+    for view, seconds in sorted(query_seconds.items()):
+        out.sample('y4c_db_query_seconds_total', float(seconds), view=view)
+
+    out.family('y4c_cache_requests_total', 'counter', 'Versioned cache lookups, by namespace and result.')
+    for namespace, counts in sorted(cache_stats().items()):
+        out.sample('y4c_cache_requests_total', counts['hits'], namespace=namespace, result='hit')
+        out.sample('y4c_cache_requests_total', counts['misses'], namespace=namespace, result='miss')
+
+    snapshot = business_snapshot()
+    out.family('y4c_chick_stock', 'gauge', 'Chicks in stock, by chick type.')
+    for chick_type, quantity in sorted(snapshot['chick_stock'].items()):
+        out.sample('y4c_chick_stock', quantity, chick_type=chick_type)
+    out.family('y4c_feed_stock_bags', 'gauge', 'Feed bags in stock, by feed type.')
+    for feed_type, bags in sorted(snapshot['feed_stock'].items()):
+        out.sample('y4c_feed_stock_bags', bags, feed_type=feed_type)
+
+    kinds = (('chick', snapshot['chick_requests']), ('feed', snapshot['feed_requests']))
+    out.family('y4c_pending_requests', 'gauge', 'Requests waiting for a manager decision.')
+    for kind, row in kinds:
+        out.sample('y4c_pending_requests', row['pending'], kind=kind)
+    out.family('y4c_awaiting_pickup_requests', 'gauge', 'Approved requests not picked up yet.')
+    for kind, row in kinds:
+        out.sample('y4c_awaiting_pickup_requests', row['awaiting_pickup'], kind=kind)
+    out.family('y4c_pickups_total', 'counter', 'Requests picked up so far.')
+    for kind, row in kinds:
+        out.sample('y4c_pickups_total', row['picked'], kind=kind)
+    out.family('y4c_picked_chicks_total', 'counter', 'Chicks handed over at pickup so far.')
+    out.sample('y4c_picked_chicks_total', snapshot['chick_requests']['picked_chicks'])
+    out.family('y4c_picked_feed_bags_total', 'counter', 'Feed bags handed over at purchase pickups so far.')
+    out.sample('y4c_picked_feed_bags_total', snapshot['feed_requests']['picked_bags'])
+    out.family('y4c_jobs', 'gauge', 'Background jobs, by status.')
+    for status, count in snapshot['jobs'].items():
+        out.sample('y4c_jobs', count, status=status)
+    out.family('y4c_business_metrics_refreshed_seconds', 'gauge', 'Unix time the business series were computed.')
+    out.sample('y4c_business_metrics_refreshed_seconds', float(snapshot['refreshed']))
+
+    return out.text()
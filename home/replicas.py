@@ -0,0 +1,78 @@
+"""
+Read-replica routing for report and dashboard reads.
+
+Only code that opts in reads from the `replica` alias. That is either a
+view decorated with @replica_reads or a block inside `with use_replica():`.
+Everything else, including every write, stays on `default`. Reports can
+live with a few seconds of replication lag; forms that redirect back to what
+they just saved can't.
+
+Reads also stay on `default` while a transaction is open there, so a
+request sees its own uncommitted writes. TestCase wraps each test in a
+transaction, so it never touches the replica; TransactionTestCase does.
+
+Without a `replica` entry in DATABASES everything goes to `default`.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+REPLICA_DB_ALIAS = 'replica'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def replica_alias():
+    """The alias report reads should use right now."""
+    if REPLICA_DB_ALIAS in settings.DATABASES and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return REPLICA_DB_ALIAS
+    return DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def use_replica():
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def replica_reads(view):
+    """Run a read-only view's queries against the replica."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(*args, **kwargs):
+            # the async ORM's worker thread starts from a copy of this context
+            with use_replica():
+                return await view(*args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with use_replica():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get():
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        # rows read from the replica are saved to the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # same data on both aliases
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_DB_ALIAS  # the replica gets its schema through replication
@@ -0,0 +1,31 @@
+"""
+Invalidate cached public pages when the content behind them changes.
+Covers the admin, the manager create_*/delete_* views and any other ORM write.
+queryset.update()/bulk_create() skip signals; sales.inventory and the pickup
+views invalidate the farmer status page themselves.
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from home.cache import invalidate, farmer_status_namespace
+from home.models import Announcement, Training, FarmerTip, QuoteOfTheWeek
+from sales.models import ChickRequest, FeedRequest, FeedDistribution, Payment
+
+
+@receiver([post_save, post_delete], sender=Announcement)
+@receiver([post_save, post_delete], sender=Training)
+@receiver([post_save, post_delete], sender=FarmerTip)
+@receiver([post_save, post_delete], sender=QuoteOfTheWeek)
+def homepage_content_changed(sender, **kwargs):
+    invalidate('homepage')
+
+
+@receiver([post_save, post_delete], sender=ChickRequest)
+@receiver([post_save, post_delete], sender=FeedRequest)
+@receiver([post_save, post_delete], sender=FeedDistribution)
+@receiver([post_save, post_delete], sender=Payment)
+def farmer_activity_changed(sender, instance, **kwargs):
+    # after commit, so a concurrent lookup cannot re-cache the pre-commit state
+    namespace = farmer_status_namespace(instance.farmer_id)
+    transaction.on_commit(lambda: invalidate(namespace))
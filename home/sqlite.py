@@ -0,0 +1,36 @@
+"""
+SQLite tuning for sites that stay on SQLite.
+
+`tune_sqlite` is connected to `connection_created` (HomeConfig.ready) and
+runs settings.SQLITE_PRAGMAS on every new SQLite connection:
+
+  journal_mode=WAL       readers no longer block the writer or the other way round
+  synchronous=NORMAL     fsync at checkpoints only (safe with WAL)
+  busy_timeout           wait this many ms for the write lock instead of
+                         failing with "database is locked"
+  mmap_size / cache_size bigger page cache, reads through mmap
+  temp_store=MEMORY      sorts and temp tables stay off disk
+
+settings.py also opens SQLite transactions as BEGIN IMMEDIATE, so a pickup
+takes the write lock when its atomic() block starts. With the default
+deferred BEGIN, two pickups that have both read stock deadlock when they
+upgrade to writing, and one fails at once whatever the busy timeout is.
+
+The pragmas go straight to the sqlite3 connection, so they don't show up
+as queries in the profiler or in assertNumQueries.
+"""
+from django.conf import settings
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    for name, value in pragmas.items():
+        dbapi_connection.execute(f"PRAGMA {name} = {value}")
+
+
+def current_pragmas(dbapi_connection, names):
+    return {name: dbapi_connection.execute(f"PRAGMA {name}").fetchone()[0] for name in names}
+
+
+def tune_sqlite(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite':
+        apply_pragmas(connection.connection, settings.SQLITE_PRAGMAS)
@@ -0,0 +1,25 @@
+"""Test helpers shared by the app test suites."""
+
+
+class QueryBudgetMixin:
+    """
+    For TestCase subclasses: fail when a response's view ran more queries
+    than its @query_budget allows.
+
+        response = self.client.get(reverse('manager_dashboard'))
+        self.assertWithinQueryBudget(response)
+    """
+
+    def assertWithinQueryBudget(self, response, max_duplicates=None):
+        profile = getattr(response, 'query_profile', None)
+        if profile is None:
+            self.fail("Response has no query profile; is QueryProfilingMiddleware installed?")
+        if profile.budget is None:
+            self.fail(f"View '{profile.view}' declares no @query_budget.")
+        details = "".join(f"\n  {n}x {sql[:200]}" for n, sql in profile.top_duplicates())
+        if profile.over_budget:
+            self.fail(f"View '{profile.view}' ran {profile.queries} queries, "
+                      f"over its budget of {profile.budget}.{details}")
+        if max_duplicates is not None and profile.duplicates > max_duplicates:
+            self.fail(f"View '{profile.view}' repeated {profile.duplicates} queries "
+                      f"(allowed {max_duplicates}).{details}")
@@ -1,3 +1,419 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections, router, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from home.benchmark import parse_scale, percentile, run_benchmarks
+from home.cache import cache_stats, reset_cache_stats
+from home.jobs import claim_next, enqueue, job, requeue_stale, run_job, run_pending
+from home.models import User, Announcement, FarmerTip, Job
+from home.prometheus import reset_metrics
+from home.replicas import use_replica
+from home.sqlite import apply_pragmas, current_pragmas, tune_sqlite
+from home.profiling import QueryProfile, fingerprint, query_stats, reset_query_stats
+from home.testing import QueryBudgetMixin
+from sales.models import Farmer, ChickRequest, Payment
+
+
+class HomepageCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        reset_cache_stats()
+        self.url = reverse('homepage')
+
+    def test_homepage_is_served_from_cache(self):
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+        self.assertEqual(cache_stats()['homepage'], {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_content_changes_invalidate_the_cache(self):
+        self.client.get(self.url)
+        Announcement.objects.create(title='Vaccination day', content='Bring your chicks')
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['latest_announcement'].title, 'Vaccination day')
+
+        manager = User.objects.create_user(username='manager', password='pw', role='brooder_manager')
+        self.client.force_login(manager)
+        self.client.post(reverse('create_tip'), {'text': 'Keep the brooder warm'})
+        response = self.client.get(self.url)
+        self.assertEqual([t.text for t in response.context['farmer_tips']], ['Keep the brooder warm'])
+
+        self.client.post(reverse('delete_tip', args=[FarmerTip.objects.get().pk]))
+        self.assertEqual(list(self.client.get(self.url).context['farmer_tips']), [])
+
+    def test_stats_endpoint_is_staff_only(self):
+        self.assertEqual(self.client.get(reverse('cache_stats')).status_code, 302)
+        staff = User.objects.create_user(username='ops', password='pw', is_staff=True, dob=date(1990, 1, 1))
+        self.client.force_login(staff)
+        self.client.get(self.url)
+        self.assertIn('homepage', self.client.get(reverse('cache_stats')).json())
+
+
+class PublicRequestStatusTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('public_request_status')
+        self.farmer = Farmer.objects.create(
+            name='Grace', dob=date(2001, 5, 5), gender='F', nin='cf123456789012',
+            recommender='Stella', recommender_nin='CF999999999999', contact='0700000001',
+        )
+        ChickRequest.objects.create(farmer=self.farmer, chick_type='layer_local', quantity=100,
+                                    status='approved', is_picked=True, picked_on=date.today())
+        for amount, pfor in [('50000', 'chicks'), ('20000', 'feeds'), ('10000', 'both')]:
+            Payment.objects.create(farmer=self.farmer, amount=Decimal(amount), payment_for=pfor)
+
+    def test_nin_is_stored_uppercased_and_looked_up_case_insensitively(self):
+        self.assertEqual(self.farmer.nin, 'CF123456789012')
+        response = self.client.get(self.url, {'nin': ' cf123456789012 '})
+        self.assertEqual(response.context['farmer'], self.farmer)
+
+    def test_summary_numbers(self):
+        summary = self.client.get(self.url, {'nin': self.farmer.nin}).context['feed_summary']
+        self.assertEqual(summary['picked_chick_requests'], 1)
+        self.assertEqual(summary['picked_chicks'], 100)
+        self.assertEqual(summary['expected_chicks_amount'], 165000)
+        self.assertEqual(summary['paid_chicks'], Decimal('50000'))
+        self.assertEqual(summary['paid_feeds'], Decimal('20000'))
+        self.assertEqual(summary['paid_both'], Decimal('10000'))
+        self.assertEqual(summary['payments_total_feeds'], Decimal('30000'))
+        self.assertEqual(summary['total_paid'], Decimal('80000'))
+        self.assertEqual(summary['outstanding'], Decimal('85000'))
+        self.assertEqual(summary['allocated_bags'], 0)
+
+    def test_status_is_cached_per_farmer_and_invalidated_on_payment(self):
+        # farmer lookup, one aggregate per table, the three lists; then only the lookup
+        with self.assertNumQueries(7):
+            self.client.get(self.url, {'nin': self.farmer.nin})
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {'nin': self.farmer.nin})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.create(farmer=self.farmer, amount=Decimal('5000'), payment_for='chicks')
+        response = self.client.get(self.url, {'nin': self.farmer.nin})
+        self.assertEqual(response.context['feed_summary']['total_paid'], Decimal('85000'))
+        self.assertEqual(len(response.context['payments']), 4)
+
+
+class BenchmarkTests(TestCase):
+
+    def setUp(self):
+        Farmer.objects.create(name='Bench', dob=date(2000, 1, 1), gender='F', nin='CF123456789012',
+                              recommender='R', recommender_nin='CM123456789012', contact='0700000000')
+
+    def test_helpers(self):
+        self.assertEqual(parse_scale('100k'), 100_000)
+        self.assertEqual(parse_scale('2500'), 2500)
+        with self.assertRaises(ValueError):
+            parse_scale('huge')
+        samples = list(range(1, 101))
+        self.assertEqual([percentile(samples, p) for p in (50, 95, 100)], [50, 95, 100])
+
+    def test_scenarios_are_measured_and_missing_rows_skipped(self):
+        report = run_benchmarks(repeat=2, only=['public_request_status', 'manager_farmers', 'mark_request'])
+        status = report['results']['public_request_status']
+        self.assertEqual(status['status'], 200)
+        self.assertEqual(status['url'], '/status/?nin=CF123456789012')
+        self.assertGreaterEqual(status['cold_queries'], status['queries'])
+        self.assertGreater(report['results']['manager_farmers']['queries'], 0)
+        self.assertIn('mark_request_as_picked', report['skipped'])  # no approved request yet
+        self.assertIn('logout', report['uncovered'])
+
+    def test_command_writes_a_json_report(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.json')
+            call_command('benchmark_urls', '--use-current-db', '--only', 'homepage', '--repeat', '1',
+                         '-o', path, stdout=io.StringIO())
+            with open(path) as fh:
+                report = json.load(fh)
+        self.assertEqual(list(report['results']), ['homepage'])
+        self.assertEqual(report['meta']['database'], 'sqlite')
+        for key in ('p50_ms', 'p99_ms', 'queries', 'peak_kib'):
+            self.assertIn(key, report['results']['homepage'])
+
+
+class QueryProfilingTests(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        reset_query_stats()
+        cache.clear()
+        self.manager = User.objects.create_user(username='manager', password='pw', role='brooder_manager',
+                                                is_staff=True)
+        self.client.force_login(self.manager)
+
+    def test_fingerprints_collapse_in_lists(self):
+        self.assertEqual(fingerprint('SELECT * FROM t WHERE id IN (%s, %s,  %s)'),
+                         fingerprint('SELECT * FROM t WHERE id IN (%s)'))
+
+    def test_headers_in_debug_only(self):
+        response = self.client.get(reverse('manager_farmers'))
+        self.assertNotIn('X-Queries', response)
+        with override_settings(DEBUG=True):
+            response = self.client.get(reverse('manager_farmers'))
+        self.assertEqual(response['X-Queries'], str(response.query_profile.queries))
+        self.assertIn('X-SQL-Time', response)
+        self.assertIn('X-Render-Time', response)
+        self.assertIn('sql;desc=', response['Server-Timing'])
+
+    def test_stats_are_aggregated_per_view(self):
+        self.client.get(reverse('manager_farmers'))
+        response = self.client.get(reverse('manager_farmers'))
+        self.assertGreater(response.query_profile.render_ms, 0)
+        stats = self.client.get(reverse('query_stats')).json()
+        self.assertEqual(stats['manager_farmers']['requests'], 2)
+        self.assertEqual(stats['manager_farmers']['budget'], 5)
+        self.assertEqual(stats['manager_farmers']['over_budget'], 0)
+
+    def test_stats_page_is_staff_only(self):
+        self.client.force_login(User.objects.create_user(username='rep', password='pw', role='sales_rep'))
+        self.assertEqual(self.client.get(reverse('query_stats')).status_code, 302)
+
+    def test_pages_stay_within_their_query_budget(self):
+        farmer = Farmer.objects.create(name='Amina', dob=date(2000, 1, 1), gender='F', nin='CF123456789012',
+                                       recommender='R', recommender_nin='CM123456789012', contact='0700000000')
+        ChickRequest.objects.create(farmer=farmer, chick_type='broiler_local', quantity=100)
+        for name in ('manager_dashboard', 'manager_chick_stock', 'review_chick_requests', 'manager_farmers',
+                     'manager_feeds', 'feed_stock_history', 'review_feed_requests', 'manager_reports',
+                     'sales_dashboard', 'sales_pickup', 'sales_feed_pickup', 'homepage'):
+            with self.subTest(name):
+                self.assertWithinQueryBudget(self.client.get(reverse(name)), max_duplicates=1)
+
+    def test_over_budget_fails(self):
+        profile = QueryProfile()
+        profile.view, profile.budget = 'some_view', 1
+        for _ in range(3):
+            profile(lambda *args: None, 'SELECT 1 FROM t WHERE id = %s', (1,), False, {})
+
+        class Response:
+            query_profile = profile
+        with self.assertRaisesMessage(AssertionError, 'ran 3 queries, over its budget of 1'):
+            self.assertWithinQueryBudget(Response())
+        self.assertEqual(profile.duplicates, 2)
+
+
+class AsyncViewTests(QueryBudgetMixin, TestCase):
+    """The async read views served through the ASGI request handler."""
+
+    def setUp(self):
+        cache.clear()
+        self.manager = User.objects.create_user(username='manager', password='pw', role='brooder_manager')
+        self.rep = User.objects.create_user(username='rep', password='pw', role='sales_rep')
+        self.farmer = Farmer.objects.create(name='Amina', dob=date(2000, 1, 1), gender='F', nin='CF123456789012',
+                                            recommender='R', recommender_nin='CM123456789012',
+                                            contact='0700000000')
+        ChickRequest.objects.create(farmer=self.farmer, chick_type='broiler_local', quantity=100,
+                                    status='approved')
+        Payment.objects.create(farmer=self.farmer, amount=Decimal('5000'), payment_for='chicks')
+
+    async def test_pages_render_within_their_query_budget(self):
+        pages = [
+            (None, reverse('homepage'), 'Upcoming Trainings'),
+            (None, reverse('public_request_status') + '?nin=cf123456789012', 'Amina'),
+            (self.rep, reverse('sales_dashboard'), 'Amina'),
+            (self.manager, reverse('manager_dashboard'), 'manager'),
+        ]
+        for user, url, text in pages:
+            with self.subTest(url):
+                if user:
+                    await self.async_client.aforce_login(user)
+                response = await self.async_client.get(url)
+                self.assertContains(response, text)
+                self.assertWithinQueryBudget(response, max_duplicates=1)
+                # the profiler sees queries run on the async ORM's thread
+                self.assertGreater(response.query_profile.queries, 0)
+                self.assertGreater(response.query_profile.render_ms, 0)
+
+    async def test_login_is_still_required(self):
+        response = await self.async_client.get(reverse('sales_dashboard'))
+        self.assertEqual(response.status_code, 302)
+
+
+@override_settings(METRICS_TOKEN='s3cret')
+class MetricsEndpointTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        reset_cache_stats()
+        reset_metrics()
+        self.auth = {'HTTP_AUTHORIZATION': 'Bearer s3cret'}
+        self.farmer = Farmer.objects.create(name='Amina', dob=date(2000, 1, 1), gender='F', nin='CF123456789012',
+                                            recommender='R', recommender_nin='CM123456789012',
+                                            contact='0700000000')
+        ChickRequest.objects.create(farmer=self.farmer, chick_type='broiler_local', quantity=100)
+        ChickRequest.objects.create(farmer=self.farmer, chick_type='layer_local', quantity=50,
+                                    status='approved', is_picked=True, picked_on=date.today())
+
+    def test_requires_the_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer nope').status_code, 403)
+
+    def test_staff_only_without_a_token(self):
+        with override_settings(METRICS_TOKEN=''):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+            self.client.force_login(User.objects.create_user(username='admin', password='pw', is_staff=True))
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+    def test_exposition(self):
+        self.client.get(reverse('homepage'))
+        response = self.client.get(reverse('metrics'), **self.auth)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        body = response.content.decode()
+        self.assertIn('y4c_http_requests_total{view="homepage",method="GET",status="200"} 1', body)
+        self.assertIn('y4c_http_request_duration_seconds_bucket{view="homepage",le="+Inf"} 1', body)
+        self.assertIn('y4c_cache_requests_total{namespace="homepage",result="miss"} 1', body)
+        self.assertIn('y4c_pending_requests{kind="chick"} 1', body)
+        self.assertIn('y4c_pickups_total{kind="chick"} 1', body)
+        self.assertIn('y4c_picked_chicks_total 50', body)
+        self.assertIn('y4c_chick_stock{chick_type="broiler_local"} 0', body)
+        self.assertIn('y4c_jobs{status="queued"} 0', body)
+
+    def test_business_series_are_not_recomputed_on_every_scrape(self):
+        self.client.get(reverse('metrics'), **self.auth)
+        with self.assertNumQueries(0):
+            body = self.client.get(reverse('metrics'), **self.auth).content.decode()
+        self.assertIn('y4c_pending_requests{kind="chick"} 1', body)
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.manager = User.objects.create_user(username='manager', password='pw', role='brooder_manager')
+
+    def test_only_opted_in_reads_use_the_replica(self):
+        self.assertEqual(router.db_for_read(Farmer), 'default')
+        with use_replica():
+            self.assertEqual(router.db_for_read(Farmer), 'replica')
+            self.assertEqual(router.db_for_write(Farmer), 'default')
+            farmer = Farmer.objects.create(name='Amina', dob=date(2000, 1, 1), gender='F',
+                                           nin='CF123456789012', recommender='R',
+                                           recommender_nin='CM123456789012', contact='0700000000')
+            self.assertEqual(farmer._state.db, 'default')
+            self.assertEqual(Farmer.objects.get().nin, 'CF123456789012')
+
+    def test_reads_stay_on_the_primary_inside_a_transaction(self):
+        with use_replica(), transaction.atomic():
+            self.assertEqual(router.db_for_read(Farmer), 'default')
+
+    def test_dashboard_and_report_read_from_the_replica(self):
+        self.client.force_login(self.manager)
+        for name in ('manager_dashboard', 'manager_reports'):
+            with self.subTest(name):
+                with CaptureQueriesContext(connections['replica']) as replica:
+                    response = self.client.get(reverse(name))
+                    replica_queries = len(replica)
+                self.assertEqual(response.status_code, 200)
+                self.assertGreater(replica_queries, 0)
+
+    def test_other_pages_stay_on_the_primary(self):
+        self.client.force_login(self.manager)
+        with CaptureQueriesContext(connections['replica']) as replica:
+            self.client.get(reverse('manager_farmers'))
+            self.assertEqual(len(replica), 0)
+
+
+class SqliteTuningTests(TestCase):
+
+    @skipUnless(settings.SQLITE_PRAGMAS, "SQLITE_TUNING=0")
+    def test_new_connections_get_the_pragmas(self):
+        pragmas = current_pragmas(connection.connection, ('busy_timeout', 'synchronous', 'temp_store'))
+        self.assertEqual(pragmas, {'busy_timeout': 5000, 'synchronous': 1, 'temp_store': 2})
+
+    def test_pragmas_are_not_counted_as_queries(self):
+        original = current_pragmas(connection.connection, ('busy_timeout',))
+        self.addCleanup(apply_pragmas, connection.connection, original)
+        with override_settings(SQLITE_PRAGMAS={'busy_timeout': 1234}), \
+                CaptureQueriesContext(connection) as queries:
+            tune_sqlite(sender=None, connection=connection)
+            self.assertEqual(len(queries), 0)
+        self.assertEqual(current_pragmas(connection.connection, ('busy_timeout',)), {'busy_timeout': 1234})
+
+
+_job_calls = []
+
+
+@job('home.tests.record')
+def _record_job(value, fail=0):
+    _job_calls.append(value)
+    if len(_job_calls) <= fail:
+        raise RuntimeError('flaky')
+
+
+@override_settings(JOBS_MAX_ATTEMPTS=3, JOBS_RETRY_DELAY_SECONDS=10)
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        _job_calls.clear()
+
+    def test_enqueue_is_idempotent_per_key(self):
+        first = enqueue('home.tests.record', {'value': 1}, key='once')
+        again = enqueue('home.tests.record', {'value': 2}, key='once')
+        self.assertEqual(first.pk, again.pk)
+        self.assertEqual(run_pending(), (1, 0))
+        self.assertEqual(_job_calls, [1])
+        with self.assertRaises(LookupError):
+            enqueue('no.such.job')
+
+    def test_jobs_are_committed_with_the_callers_transaction(self):
+        try:
+            with transaction.atomic():
+                enqueue('home.tests.record', {'value': 1})
+                raise RuntimeError('request failed')
+        except RuntimeError:
+            pass
+        self.assertFalse(Job.objects.exists())
+
+    def test_failures_are_retried_with_backoff_then_given_up(self):
+        queued = enqueue('home.tests.record', {'value': 1, 'fail': 5})
+        self.assertEqual(run_pending(), (0, 1))
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('queued', 1))
+        self.assertIn('RuntimeError: flaky', queued.last_error)
+        self.assertIsNone(claim_next('w'))  # not due for 10s
+
+        for attempt, delay in ((2, 20), (3, None)):
+            Job.objects.update(run_after=queued.run_after - timedelta(seconds=60))
+            before = timezone.now()
+            run_pending()
+            queued.refresh_from_db()
+            self.assertEqual(queued.attempts, attempt)
+            if delay:
+                self.assertGreaterEqual(queued.run_after, before + timedelta(seconds=delay))
+        self.assertEqual(queued.status, 'failed')
+        self.assertIsNotNone(queued.finished_on)
+
+    def test_a_claimed_job_is_not_claimed_twice_and_stale_ones_come_back(self):
+        enqueue('home.tests.record', {'value': 1})
+        claimed = claim_next('w1')
+        self.assertEqual((claimed.status, claimed.locked_by), ('running', 'w1'))
+        self.assertIsNone(claim_next('w2'))
+
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale(), 1)
+        again = claim_next('w2')
+        self.assertEqual((again.pk, again.attempts), (claimed.pk, 2))
+        self.assertTrue(run_job(again))
+        self.assertEqual(Job.objects.get().status, 'done')
+
+    def test_run_jobs_command(self):
+        enqueue('home.tests.record', {'value': 1})
+        out = io.StringIO()
+        call_command('run_jobs', once=True, stdout=out)
+        self.assertEqual(_job_calls, [1])
+        self.assertIn('Ran 1 job(s), 0 failed.', out.getvalue())
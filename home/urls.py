@@ -1,9 +1,12 @@
 from django.urls import path
-from home.views import homePage, public_request_status, user_login, logout_view
+from home.views import homePage, public_request_status, user_login, logout_view, cache_stats_view, query_stats_view, metrics_view
 
 urlpatterns = [
     path('', homePage, name='homepage'),
     path('status/', public_request_status, name='public_request_status'),
     path('login/', user_login, name='login'),
     path('logout/', logout_view, name='logout'),
+    path('cache/stats/', cache_stats_view, name='cache_stats'),
+    path('profiling/stats/', query_stats_view, name='query_stats'),
+    path('metrics', metrics_view, name='metrics'),  # Prometheus' default scrape path
 ]
@@ -1,31 +1,69 @@
 from django.shortcuts import render
 from datetime import date
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from django.utils import timezone
-from django.db.models import Q, Sum
+from django.utils.crypto import constant_time_compare
+from django.db.models import Q, Sum, Count, Value, DecimalField
+from django.db.models.functions import Coalesce
 from home.models import Announcement, Training, FarmerTip, QuoteOfTheWeek
 from django.contrib import messages
 from django.shortcuts import render
 from django.db.models import Q
 from sales.models import Farmer, ChickRequest, FeedRequest, Payment, FeedDistribution
+from home.aio import alist, arender, gather
+from home.cache import acached, cache_stats, farmer_status_namespace
+from home.profiling import query_budget, query_stats
+from home.prometheus import CONTENT_TYPE, render_metrics
 
-def homePage(request):
-    today = timezone.now().date()
-    latest_announcement = Announcement.objects.order_by('-posted_on').first()
-    upcoming_trainings = Training.objects.filter(date__gte=today).order_by('date')[:3]
-    farmer_tips = FarmerTip.objects.order_by('-created_on')[:3]
-
+async def _homepage_context(today):
+    """Landing page fragments, materialized so they can be cached."""
     current_quote = (QuoteOfTheWeek.objects
                      .filter(effective_from__lte=today)
                      .filter(Q(effective_to__isnull=True) | Q(effective_to__gte=today))
-                     .order_by('-effective_from', '-posted_on')
-                     .first())
-
-    return render(request, 'index.html', {
-        'latest_announcement': latest_announcement,
-        'upcoming_trainings': upcoming_trainings,
-        'farmer_tips': farmer_tips,
-        'current_quote': current_quote
-    })
+                     .order_by('-effective_from', '-posted_on'))
+
+    return await gather(
+        latest_announcement=Announcement.objects.order_by('-posted_on').afirst(),
+        upcoming_trainings=alist(Training.objects.filter(date__gte=today).order_by('date')[:3]),
+        farmer_tips=alist(FarmerTip.objects.order_by('-created_on')[:3]),
+        current_quote=current_quote.afirst(),
+    )
+
+
+@query_budget(4)
+async def homePage(request):
+    today = timezone.now().date()
+    # keyed by day: trainings and the quote of the week depend on the date
+    context = await acached('homepage', today.isoformat(),
+                            lambda: _homepage_context(today),
+                            timeout=settings.HOMEPAGE_CACHE_TIMEOUT)
+    return await arender(request, 'index.html', context)
+
+
+@staff_member_required
+def cache_stats_view(request):
+    """Cache hit/miss counters of this worker process, for monitoring."""
+    return JsonResponse(cache_stats())
+
+
+@staff_member_required
+def query_stats_view(request):
+    """Per-view query counts, SQL/render time and budget overruns of this worker process."""
+    return JsonResponse(query_stats())
+
+
+def metrics_view(request):
+    """Prometheus scrape target (see home/prometheus.py)."""
+    token = settings.METRICS_TOKEN
+    if token:
+        allowed = constant_time_compare(request.headers.get('Authorization', ''), f"Bearer {token}")
+    else:
+        allowed = request.user.is_active and request.user.is_staff
+    if not allowed:
+        return HttpResponseForbidden("Forbidden", content_type='text/plain')
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE)
 
 
 
@@ -34,12 +72,77 @@ def homePage(request):
 # Public: NIN lookup -> list chick & feed requests (view-only)
 # -------------------------------------------------------------------
 
-from django.db.models import Sum
-
 CHICK_PRICE = 1650      # UGX per chick (set to 0 if you don’t want to show values)
 FEED_BAG_PRICE = 0      # UGX per initial bag (0 keeps it as a count only)
 
-def public_request_status(request):
+
+async def _farmer_status(farmer):
+    """
+    Requests, payments and the summary cards of one farmer, materialized so
+    they can be cached. One conditional aggregate per table for the numbers,
+    all started at once.
+    """
+    reads = await gather(
+        pay=Payment.objects.filter(farmer=farmer).aaggregate(
+            total=Coalesce(Sum("amount"), Value(0), output_field=DecimalField()),
+            feeds_or_both=Coalesce(Sum("amount", filter=Q(payment_for__in=["feeds", "both"])),
+                                   Value(0), output_field=DecimalField()),
+            chicks=Coalesce(Sum("amount", filter=Q(payment_for="chicks")), Value(0), output_field=DecimalField()),
+            feeds=Coalesce(Sum("amount", filter=Q(payment_for="feeds")), Value(0), output_field=DecimalField()),
+            both=Coalesce(Sum("amount", filter=Q(payment_for="both")), Value(0), output_field=DecimalField()),
+        ),
+        picked=ChickRequest.objects.filter(farmer=farmer).aaggregate(
+            count=Count("id", filter=Q(is_picked=True)),
+            chicks=Coalesce(Sum("quantity", filter=Q(is_picked=True)), Value(0)),
+        ),
+        allocated=(FeedDistribution.objects
+                   .filter(farmer=farmer, distribution_type='initial')
+                   .aaggregate(total=Coalesce(Sum("quantity_bags"), Value(0)))),
+        chick_requests=alist(ChickRequest.objects
+                             .filter(farmer=farmer)
+                             .order_by("-submitted_on", "-id")),
+        feed_requests=alist(FeedRequest.objects
+                            .filter(farmer=farmer)
+                            .order_by("-submitted_on", "-id")),
+        payments=alist(Payment.objects
+                       .filter(farmer=farmer)
+                       .order_by("-payment_date", "-id")),
+    )
+    pay, picked = reads["pay"], reads["picked"]
+    allocated_bags = reads["allocated"]["total"]
+
+    expected_chicks_amount = picked["chicks"] * CHICK_PRICE
+    expected_feeds_amount = allocated_bags * FEED_BAG_PRICE
+    outstanding = max((expected_chicks_amount + expected_feeds_amount) - pay["total"], 0)
+
+    feed_summary = {
+        # your original keys (kept for compatibility)
+        "picked_chick_requests": picked["count"],
+        "allocated_bags": allocated_bags,
+        "payments_total_feeds": pay["feeds_or_both"],
+        "payments_total_all": pay["total"],
+
+        # new clearer keys
+        "picked_chicks": picked["chicks"],
+        "expected_chicks_amount": expected_chicks_amount if CHICK_PRICE else None,
+        "expected_feeds_amount": expected_feeds_amount if FEED_BAG_PRICE else None,
+        "paid_chicks": pay["chicks"],
+        "paid_feeds": pay["feeds"],
+        "paid_both": pay["both"],
+        "total_paid": pay["total"],
+        "outstanding": outstanding,
+    }
+
+    return {
+        "chick_requests": reads["chick_requests"],
+        "feed_requests": reads["feed_requests"],
+        "payments": reads["payments"],
+        "feed_summary": feed_summary,
+    }
+
+
+@query_budget(7)
+async def public_request_status(request):
     nin = (request.GET.get("nin") or request.GET.get("query") or "").strip()
 
     farmer = None
@@ -49,70 +152,16 @@ def public_request_status(request):
     feed_summary = None
 
     if nin:
-        farmer = Farmer.objects.filter(nin__iexact=nin).first()
+        # NINs are stored uppercased (Farmer.save), so this is a unique-index lookup
+        farmer = await Farmer.objects.filter(nin=nin.upper()).afirst()
         if farmer:
-            chick_requests = (ChickRequest.objects
-                              .filter(farmer=farmer)
-                              .order_by("-submitted_on", "-id"))
-            feed_requests = (FeedRequest.objects
-                             .filter(farmer=farmer)
-                             .order_by("-submitted_on", "-id"))
-            payments = (Payment.objects
-                        .filter(farmer=farmer)
-                        .order_by("-payment_date", "-id"))
-
-            # --- Existing bits you already had ---
-            allocated_bags = (FeedDistribution.objects
-                              .filter(farmer=farmer, distribution_type='initial')
-                              .aggregate(total=Sum("quantity_bags"))["total"] or 0)
-
-            paid_for_feeds_or_both = (Payment.objects
-                                      .filter(farmer=farmer, payment_for__in=["feeds", "both"])
-                                      .aggregate(total=Sum("amount"))["total"] or 0)
-
-            paid_total = (Payment.objects
-                          .filter(farmer=farmer)
-                          .aggregate(total=Sum("amount"))["total"] or 0)
-
-            picked_count = ChickRequest.objects.filter(farmer=farmer, is_picked=True).count()
-
-            # --- New: clearer numbers for the cards ---
-            picked_chicks = (ChickRequest.objects
-                             .filter(farmer=farmer, is_picked=True)
-                             .aggregate(total=Sum("quantity"))["total"] or 0)
-            expected_chicks_amount = picked_chicks * CHICK_PRICE
-            expected_feeds_amount = allocated_bags * FEED_BAG_PRICE
-
-            # Payment split (keeps it simple; no fancy “split both” logic unless you want it)
-            paid_chicks = (Payment.objects
-                           .filter(farmer=farmer, payment_for="chicks")
-                           .aggregate(total=Sum("amount"))["total"] or 0)
-            paid_feeds  = (Payment.objects
-                           .filter(farmer=farmer, payment_for="feeds")
-                           .aggregate(total=Sum("amount"))["total"] or 0)
-            paid_both   = (Payment.objects
-                           .filter(farmer=farmer, payment_for="both")
-                           .aggregate(total=Sum("amount"))["total"] or 0)
-
-            outstanding = max((expected_chicks_amount + expected_feeds_amount) - paid_total, 0)
-
-            feed_summary = {
-                # your original keys (kept for compatibility)
-                "picked_chick_requests": picked_count,
-                "allocated_bags": allocated_bags,
-                "payments_total_feeds": paid_for_feeds_or_both,
-                "payments_total_all": paid_total,
-
-                # new clearer keys
-                "picked_chicks": picked_chicks,
-                "expected_chicks_amount": expected_chicks_amount if CHICK_PRICE else None,
-                "expected_feeds_amount": expected_feeds_amount if FEED_BAG_PRICE else None,
-                "paid_chicks": paid_chicks,
-                "paid_feeds": paid_feeds,
-                "paid_both": paid_both,
-                "total_paid": paid_total,
-                "outstanding": outstanding,
-            }
+            status = await acached(farmer_status_namespace(farmer.id), "status",
+                                   lambda: _farmer_status(farmer),
+                                   timeout=settings.FARMER_STATUS_CACHE_TIMEOUT)
+            chick_requests = status["chick_requests"]
+            feed_requests = status["feed_requests"]
+            payments = status["payments"]
+            feed_summary = status["feed_summary"]
         else:
             messages.warning(request, "We couldn't find a farmer with that NIN.")
 
@@ -127,7 +176,7 @@ def public_request_status(request):
         r.badge_class = req_badge.get(r.status, "badge-secondary")
         r.pickup_badge_class = pickup_badge.get(r.pickup_status, "badge-secondary")
 
-    return render(request, "public/status.html", {
+    return await arender(request, "public/status.html", {
         "nin": nin,
         "farmer": farmer,
         "chick_requests": chick_requests,
@@ -7,7 +7,7 @@ from sales.models import Manufacturer, Supplier, FeedStock, FeedDistribution, Pa
 
 @admin.register(ChickStock)
 class ChickStockAdmin(admin.ModelAdmin):
-    list_display = ('chick_type', 'quantity', 'age_days', 'recorded_on')
+    list_display = ('chick_type', 'quantity', 'age_days', 'hatch_date', 'recorded_on')
     list_filter = ('chick_type', 'recorded_on')
     search_fields = ('chick_type',)
 
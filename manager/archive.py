@@ -0,0 +1,49 @@
+"""
+Cold storage for old chick batches.
+
+Every ChickStock row ever recorded stays in the live table, even after its
+chicks are gone, so stock pages and FIFO scans keep growing with history.
+`archive_chick_stock()` moves depleted batches (quantity 0) recorded before
+the horizon (settings.CHICK_STOCK_ARCHIVE_DAYS) into ArchivedChickStock,
+keeping their ids. Their ChickAllocation rows are repointed to the archived
+copy so request history stays intact. Batches that still hold chicks are
+never archived, whatever their age.
+"""
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from manager.models import ArchivedChickStock, ChickAllocation, ChickStock
+
+
+ARCHIVE_BATCH_SIZE = 1000  # rows moved per transaction
+
+
+def archivable_chick_stock(horizon_days=None, today=None):
+    horizon = settings.CHICK_STOCK_ARCHIVE_DAYS if horizon_days is None else horizon_days
+    cutoff = (today or date.today()) - timedelta(days=horizon)
+    return ChickStock.objects.filter(quantity=0, recorded_on__lt=cutoff)
+
+
+def archive_chick_stock(horizon_days=None, today=None):
+    """Move archivable batches to ArchivedChickStock. Returns how many were moved."""
+    candidates = archivable_chick_stock(horizon_days, today)
+    moved = 0
+    while True:
+        with transaction.atomic():
+            batch = list(candidates.select_for_update().order_by('id')[:ARCHIVE_BATCH_SIZE])
+            if not batch:
+                return moved
+            ids = [b.id for b in batch]
+            ArchivedChickStock.objects.bulk_create([
+                ArchivedChickStock(id=b.id, chick_type=b.chick_type, quantity=b.quantity,
+                                   age_days=b.age_days, hatch_date=b.hatch_date,
+                                   recorded_on=b.recorded_on, notes=b.notes)
+                for b in batch
+            ], ignore_conflicts=True)
+            (ChickAllocation.objects.filter(stock_id__in=ids)
+             .update(archived_stock_id=F('stock_id'), stock=None))
+            ChickStock.objects.filter(id__in=ids).delete()
+            moved += len(ids)
@@ -0,0 +1,12 @@
+"""
+Background jobs of the manager app (see home.jobs).
+"""
+from home.jobs import job
+from manager.snapshots import freeze_debtors, freeze_pending
+
+
+@job('manager.freeze_report_snapshots')
+def freeze_report_snapshots():
+    """Freeze the sales report days that have ended and the debtor ranking (queued by manager.snapshots.queue_freeze)."""
+    freeze_pending()
+    freeze_debtors()
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from manager.archive import archive_chick_stock, archivable_chick_stock
+
+
+class Command(BaseCommand):
+    help = ("Move empty chick batches older than CHICK_STOCK_ARCHIVE_DAYS "
+            "into the ArchivedChickStock table.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None,
+                            help=f"Archive horizon in days (default: settings, currently {settings.CHICK_STOCK_ARCHIVE_DAYS})")
+        parser.add_argument("--dry-run", action="store_true", help="Only report how many batches would move")
+
+    def handle(self, *args, **opts):
+        if opts["dry_run"]:
+            count = archivable_chick_stock(opts["days"]).count()
+            self.stdout.write(f"{count} batch(es) would be archived.")
+            return
+        moved = archive_chick_stock(opts["days"])
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} empty chick batch(es)."))
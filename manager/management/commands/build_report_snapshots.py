@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from manager.snapshots import freeze_debtors, freeze_pending
+
+
+class Command(BaseCommand):
+    help = ("Freeze the sales report figures of every day that has ended (ReportSnapshot) "
+            "and the debtor ranking (DebtorSnapshot). The run_jobs worker does this on the first "
+            "pickup or payment of each day; what isn't frozen yet is computed live by the report.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true",
+                            help="Recompute every day, e.g. after editing old pickups")
+
+    def handle(self, *args, **opts):
+        days = freeze_pending(rebuild=opts["rebuild"])
+        debtors = freeze_debtors()
+        self.stdout.write(self.style.SUCCESS(
+            f"Froze {days} day(s) of report figures and {debtors} debtor(s)."))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from manager.exports import EXPORTS, FORMATS, export_rows, export_chunks, export_filename
+
+
+class Command(BaseCommand):
+    help = ("Stream payments, feed distributions or chick requests to a CSV/XLSX file, "
+            "optionally filtered by date range and type.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=list(EXPORTS))
+        parser.add_argument("--from", dest="start", help="First day to include (YYYY-MM-DD)")
+        parser.add_argument("--to", dest="end", help="Last day to include (YYYY-MM-DD)")
+        parser.add_argument("--type", dest="kind", help="Only rows of this type (e.g. feeds, initial, layer_local)")
+        parser.add_argument("--format", choices=FORMATS, default="csv")
+        parser.add_argument("--output", "-o",
+                            help="File to write (default: <dataset>_<range>.<format>; '-' for stdout, CSV only)")
+
+    def _date(self, value, name):
+        if not value:
+            return None
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise CommandError(f"--{name} must be a date like 2025-01-31, got '{value}'.")
+        return parsed
+
+    def handle(self, *args, **opts):
+        start = self._date(opts["start"], "from")
+        end = self._date(opts["end"], "to")
+        fmt = opts["format"]
+        try:
+            rows = export_rows(opts["dataset"], start, end, opts["kind"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        output = opts["output"] or export_filename(opts["dataset"], fmt, start, end)
+        if output == "-":
+            if fmt != "csv":
+                raise CommandError("Only CSV can be written to stdout.")
+            for chunk in export_chunks(fmt, rows):
+                self.stdout.write(chunk, ending="")
+            return
+
+        written = 0
+        with open(output, "wb") as fh:
+            for chunk in export_chunks(fmt, rows, opts["dataset"]):
+                data = chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+                fh.write(data)
+                written += len(data)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written:,} bytes to {output}."))
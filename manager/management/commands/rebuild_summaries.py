@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from manager.summaries import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = "Recompute stock and revenue summary tables from scratch and report any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true",
+                            help="Only report drift, do not rewrite the summary tables")
+
+    def handle(self, *args, **opts):
+        drift = rebuild_summaries(apply=not opts["check"])
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Summaries are in sync."))
+            return
+
+        for line in drift:
+            self.stdout.write(self.style.WARNING(f"  drift: {line}"))
+        if opts["check"]:
+            self.stdout.write(self.style.ERROR(f"{len(drift)} summary row(s) out of sync."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt summaries ({len(drift)} row(s) corrected)."))
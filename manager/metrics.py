@@ -0,0 +1,336 @@
+"""
+Dashboard metrics for the brooder manager.
+
+Every card on the manager dashboard is computed here with one grouped
+conditional aggregate per table, instead of one query per number.
+Stock and revenue cards read the incrementally maintained summary tables
+(see manager/summaries.py), so their cost no longer grows with history.
+`dashboard_metrics()` returns the same keys `dashboard_view` has always
+passed to `manager/dashboard.html` (minus the username); the async dashboard
+uses `adashboard_metrics()`, which starts every read at once.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Sum, Count, Q, DecimalField, Value
+from django.db.models.functions import Coalesce
+
+from home.aio import alist, gather
+from home.models import Training
+from manager.models import ChickStock, RevenueRollup
+from manager.summaries import achick_stock_totals, afeed_stock_totals, chick_stock_totals, feed_stock_totals
+from sales.models import ChickRequest, Farmer, FeedRequest, FeedStock, FeedDistribution
+
+
+CHICK_TYPES = [key for key, _ in ChickRequest.CHICK_TYPE_CHOICES]
+PAYMENT_SPLITS = ('chicks', 'feeds', 'both')
+
+LOW_CHICK_THRESHOLD = 50   # tweak as needed
+AVAILABLE_MAX_AGE = 14     # days; older chicks are "aging"
+AGING_MAX_AGE = 21         # days; older chicks are "expiring"
+
+ZERO = Decimal('0')
+TWO = Decimal('2')
+
+
+def _money_sum(condition):
+    money = DecimalField(max_digits=12, decimal_places=2)
+    return Coalesce(Sum('amount', filter=condition), Value(ZERO), output_field=money)
+
+
+def _int_sum(field, condition):
+    return Coalesce(Sum(field, filter=condition), Value(0))
+
+
+def _chick_request_aggregates(week_start, month_start):
+    """Sold totals, weekly splits and request counts, for a single aggregate() over ChickRequest."""
+    picked = Q(is_picked=True)
+    picked_week = picked & Q(picked_on__gte=week_start)
+
+    aggregates = {
+        'sold': _int_sum('quantity', picked),
+        'sold_week': _int_sum('quantity', picked_week),
+        'pending': Count('id', filter=Q(status='pending')),
+        'approved_month': Count('id', filter=Q(status='approved', approval_date__gte=month_start)),
+    }
+    for ctype in CHICK_TYPES:
+        aggregates[f'sold__{ctype}'] = _int_sum('quantity', picked & Q(chick_type=ctype))
+        aggregates[f'week__{ctype}'] = _int_sum('quantity', picked_week & Q(chick_type=ctype))
+    return aggregates
+
+
+def _revenue_aggregates(week_start):
+    """Lifetime and weekly revenue splits, for a single aggregate() over the daily rollups."""
+    this_week = Q(day__gte=week_start)
+    aggregates = {}
+    for pfor in PAYMENT_SPLITS:
+        aggregates[f'all__{pfor}'] = _money_sum(Q(payment_for=pfor))
+        aggregates[f'week__{pfor}'] = _money_sum(Q(payment_for=pfor) & this_week)
+    return aggregates
+
+
+def _split_revenue(row, prefix):
+    # 'both' payments are split 50/50 between chicks and feeds
+    both = row[f'{prefix}__both']
+    return {
+        'chicks': row[f'{prefix}__chicks'] + (both / TWO),
+        'feeds':  row[f'{prefix}__feeds'] + (both / TWO),
+    }
+
+
+def chick_stock_age_buckets(today=None):
+    """
+    Chicks in stock per type, split into available / aging / expiring by
+    current age, in one grouped query over the non-empty batches only.
+    Ages are hatch_date ranges, so the buckets shift as the days pass.
+    """
+    today = today or date.today()
+    available_since = today - timedelta(days=AVAILABLE_MAX_AGE)
+    aging_since = today - timedelta(days=AGING_MAX_AGE)
+    rows = (ChickStock.objects
+            .filter(quantity__gt=0)
+            .values('chick_type')
+            .order_by()
+            .annotate(
+                total=Sum('quantity'),
+                available=_int_sum('quantity', Q(hatch_date__gte=available_since)),
+                aging=_int_sum('quantity', Q(hatch_date__lt=available_since, hatch_date__gte=aging_since)),
+                expiring=_int_sum('quantity', Q(hatch_date__lt=aging_since)),
+            ))
+    labels = dict(ChickStock.CHICK_TYPE_CHOICES)
+    order = list(labels)
+    summary = [
+        {
+            'label': labels.get(row['chick_type'], row['chick_type'].replace('_', ' ').title()),
+            'total': row['total'],
+            'available': row['available'],
+            'aging': row['aging'],
+            'expiring': row['expiring'],
+        }
+        for row in sorted(rows, key=lambda r: order.index(r['chick_type']) if r['chick_type'] in order else len(order))
+    ]
+    return summary
+
+
+def _alert_querysets(today):
+    """The (sliced) querysets behind the alert lists."""
+    return {
+        # Unpicked approvals older than 3 days
+        'unpicked_approvals': (
+            ChickRequest.objects
+            .filter(status='approved', is_picked=False, approval_date__lt=today - timedelta(days=3))
+            .select_related('farmer')
+            .order_by('-approval_date')[:5]
+        ),
+        # Pending requests older than 48 hours
+        'pending_stale': (
+            ChickRequest.objects
+            .filter(status='pending', submitted_on__lt=today - timedelta(days=2))
+            .select_related('farmer')
+            .order_by('-submitted_on')[:5]
+        ),
+        # Chick batches past the aging window that still hold chicks (oldest first)
+        'chick_expiring': (
+            ChickStock.objects
+            .filter(quantity__gt=0, hatch_date__lt=today - timedelta(days=AGING_MAX_AGE))
+            .order_by('hatch_date', 'id')[:5]
+        ),
+        # Feeds expiring within 14 days (detailed list)
+        'feed_expiring': (
+            FeedStock.objects
+            .filter(expiry_date__isnull=False, expiry_date__lte=today + timedelta(days=14))
+            .order_by('expiry_date')[:5]
+        ),
+        # Feed distributions due within 7 days (top 5)
+        'feed_due_soon': (
+            FeedDistribution.objects
+            .filter(due_date__isnull=False, due_date__lte=today + timedelta(days=7))
+            .select_related('farmer')
+            .order_by('due_date')[:5]
+        ),
+    }
+
+
+def _alerts(today, month_start, stock_dict, rows):
+    """The Operational Alerts card, from the fetched `_alert_querysets` rows."""
+    # Low chick stock by type
+    low_chick_stock = [
+        {"type": ctype, "qty": qty or 0}
+        for ctype, qty in stock_dict.items()
+        if (qty or 0) < LOW_CHICK_THRESHOLD
+    ]
+    low_chick_stock.sort(key=lambda x: x["qty"])  # smallest first
+
+    unpicked_approvals = [
+        {
+            "id": r.id,
+            "farmer": r.farmer.name,
+            "days": (today - (r.approval_date or month_start)).days
+        }
+        for r in rows['unpicked_approvals']
+    ]
+    pending_stale = [
+        {
+            "id": r.id,
+            "farmer": r.farmer.name,
+            # submitted_on is a DateField, so we approximate hours
+            "days": (today - r.submitted_on).days * 24,
+        }
+        for r in rows['pending_stale']
+    ]
+    chick_expiring = [
+        {"id": b.id, "chick_type": b.chick_type, "qty": b.quantity, "age": (today - b.hatch_date).days}
+        for b in rows['chick_expiring']
+    ]
+    feed_expiring = [
+        {"feed_type": f.feed_type, "bags": f.quantity_bags or 0, "expiry": f.expiry_date}
+        for f in rows['feed_expiring']
+    ]
+    feed_due_soon_list = [
+        {"farmer": fd.farmer.name, "bags": fd.quantity_bags or 0, "due": fd.due_date}
+        for fd in rows['feed_due_soon']
+    ]
+
+    return {
+        "counts": {
+            "unpicked_over_3d": len(unpicked_approvals),
+            "pending_over_48h": len(pending_stale),
+            "low_chick_types": len(low_chick_stock),
+        },
+        "low_chick_stock": low_chick_stock,
+        "unpicked_approvals": unpicked_approvals,
+        "pending_stale": pending_stale,
+        "chick_expiring": chick_expiring,
+        "feed_expiring": feed_expiring,
+        "feed_due_soon": feed_due_soon_list,
+    }
+
+
+def _periods(today):
+    today = today or date.today()
+    week_start = today - timedelta(days=today.weekday())  # Monday
+    return today, week_start, today.replace(day=1)
+
+
+def _dashboard_lists(today):
+    """Every list on the dashboard, as querysets to fetch."""
+    return {
+        'upcoming_trainings': Training.objects.filter(date__gte=today).order_by('date')[:4],
+        'last_approvals': (ChickRequest.objects
+                           .filter(status='approved')
+                           .select_related('farmer')
+                           .order_by('-approval_date', '-id')[:5]),
+        **_alert_querysets(today),
+    }
+
+
+def dashboard_metrics(today=None):
+    """
+    Compute every manager dashboard card.
+    Returns the template context for `manager/dashboard.html`.
+    """
+    today, week_start, month_start = _periods(today)
+    reads = {
+        'requests_row': ChickRequest.objects.aggregate(**_chick_request_aggregates(week_start, month_start)),
+        'chick_totals': chick_stock_totals(),
+        'feed_totals': feed_stock_totals(),
+        'revenue_row': RevenueRollup.objects.aggregate(**_revenue_aggregates(week_start)),
+        'total_farmers': Farmer.objects.count(),
+        **{name: list(qs) for name, qs in _dashboard_lists(today).items()},
+    }
+    return _dashboard_context(today, month_start, reads)
+
+
+async def adashboard_metrics(today=None):
+    """dashboard_metrics() for the async dashboard; the reads are independent, so they start together."""
+    today, week_start, month_start = _periods(today)
+    reads = await gather(
+        requests_row=ChickRequest.objects.aaggregate(**_chick_request_aggregates(week_start, month_start)),
+        chick_totals=achick_stock_totals(),
+        feed_totals=afeed_stock_totals(),
+        revenue_row=RevenueRollup.objects.aaggregate(**_revenue_aggregates(week_start)),
+        total_farmers=Farmer.objects.acount(),
+        **{name: alist(qs) for name, qs in _dashboard_lists(today).items()},
+    )
+    return _dashboard_context(today, month_start, reads)
+
+
+def _dashboard_context(today, month_start, reads):
+    # ---------------------- Picked (sold) + request counts ----------------------
+    requests_row = reads['requests_row']
+    chicks_sold_by_type = {t: requests_row[f'sold__{t}'] for t in CHICK_TYPES}
+    chicks_week_by_type = {t: requests_row[f'week__{t}'] for t in CHICK_TYPES}
+
+    # ---------------------- Chick & feed stock (by type) ----------------------
+    stock_dict = {t: reads['chick_totals'][t] for t in CHICK_TYPES}
+    feed_stock_by_type = reads['feed_totals']
+
+    # ---------------------- Revenue via daily rollups (Decimal-safe) ----------------------
+    total_revenue_breakdown = _split_revenue(reads['revenue_row'], 'all')
+    revenue_week_breakdown = _split_revenue(reads['revenue_row'], 'week')
+
+    return {
+        # Totals
+        'total_chicks_sold': requests_row['sold'],
+        'total_revenue': total_revenue_breakdown['chicks'] + total_revenue_breakdown['feeds'],
+
+        # Per-type totals
+        'chicks_sold_by_type': chicks_sold_by_type,
+
+        # Weekly
+        'chicks_this_week': requests_row['sold_week'],
+        'revenue_this_week': revenue_week_breakdown['chicks'] + revenue_week_breakdown['feeds'],
+        'chicks_week_by_type': chicks_week_by_type,
+
+        # Revenue splits
+        'total_revenue_breakdown': total_revenue_breakdown,
+        'revenue_week_breakdown': revenue_week_breakdown,
+
+        # Requests / farmers
+        'pending_requests': requests_row['pending'],
+        'total_farmers': reads['total_farmers'],
+        'approved_this_month': requests_row['approved_month'],
+
+        # Chick stock
+        'stock_dict': stock_dict,
+        'total_remaining_stock': sum(stock_dict.values()),
+
+        # Feed stock
+        'total_feed_stock': sum(feed_stock_by_type.values()),
+        'feed_stock_by_type': feed_stock_by_type,
+
+        # Events
+        'upcoming_trainings': reads['upcoming_trainings'],
+
+        # Alerts payload for the Operational Alerts card
+        'alerts': _alerts(today, month_start, stock_dict, reads),
+
+        # Mini-table
+        'last_approvals': reads['last_approvals'],
+    }
+
+
+def business_gauges():
+    """
+    Stock levels and queue lengths for the /metrics endpoint: the stock
+    summary tables plus one grouped count per request table. Picked totals
+    only ever grow, so the scraper can rate() them into pickup throughput.
+    """
+    chick_requests = ChickRequest.objects.aggregate(
+        pending=Count('id', filter=Q(status='pending')),
+        awaiting_pickup=Count('id', filter=Q(status='approved', is_picked=False)),
+        picked=Count('id', filter=Q(is_picked=True)),
+        picked_chicks=_int_sum('quantity', Q(is_picked=True)),
+    )
+    feed_requests = FeedRequest.objects.aggregate(
+        pending=Count('id', filter=Q(status='pending')),
+        awaiting_pickup=Count('id', filter=Q(status='approved', pickup_status='not_picked')),
+        picked=Count('id', filter=Q(pickup_status='picked')),
+        picked_bags=_int_sum('quantity_bags', Q(pickup_status='picked')),
+    )
+    return {
+        'chick_stock': chick_stock_totals(),
+        'feed_stock': feed_stock_totals(),
+        'chick_requests': chick_requests,
+        'feed_requests': feed_requests,
+    }
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:42
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_summaries(apps, schema_editor):
+    ChickStock = apps.get_model('manager', 'ChickStock')
+    FeedStock = apps.get_model('sales', 'FeedStock')
+    Payment = apps.get_model('sales', 'Payment')
+    ChickStockSummary = apps.get_model('manager', 'ChickStockSummary')
+    FeedStockSummary = apps.get_model('manager', 'FeedStockSummary')
+    RevenueRollup = apps.get_model('manager', 'RevenueRollup')
+
+    ChickStockSummary.objects.bulk_create([
+        ChickStockSummary(chick_type=row['chick_type'], quantity=row['total'] or 0)
+        for row in ChickStock.objects.values('chick_type').annotate(total=Sum('quantity'))
+    ])
+    FeedStockSummary.objects.bulk_create([
+        FeedStockSummary(feed_type=row['feed_type'], quantity_bags=row['total'] or 0)
+        for row in FeedStock.objects.values('feed_type').annotate(total=Sum('quantity_bags'))
+    ])
+    RevenueRollup.objects.bulk_create([
+        RevenueRollup(day=row['payment_date'], payment_for=row['payment_for'],
+                      amount=row['total'], payments=row['n'])
+        for row in (Payment.objects
+                    .values('payment_date', 'payment_for')
+                    .annotate(total=Sum('amount'), n=Count('id')))
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0002_chickallocation'),
+        ('sales', '0008_chickrequest_decision_at_chickrequest_decision_by_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChickStockSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chick_type', models.CharField(max_length=20, unique=True)),
+                ('quantity', models.IntegerField(default=0)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FeedStockSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feed_type', models.CharField(max_length=10, unique=True)),
+                ('quantity_bags', models.IntegerField(default=0)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RevenueRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('payment_for', models.CharField(max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('payments', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'payment_for'), name='unique_revenue_rollup_day')],
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0003_stock_revenue_summaries'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chickstock',
+            index=models.Index(fields=['chick_type', 'quantity', 'recorded_on'], name='chickstock_type_qty_rec_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chickstock',
+            index=models.Index(condition=models.Q(('quantity__gt', 0)), fields=['chick_type', 'recorded_on', 'id'], name='chickstock_fifo_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0004_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chickstock',
+            index=models.Index(fields=['recorded_on', 'id'], name='chickstock_recorded_id_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0005_list_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedChickStock',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('chick_type', models.CharField(choices=[('layer_local', 'Layer - Local'), ('layer_exotic', 'Layer - Exotic'), ('broiler_local', 'Broiler - Local'), ('broiler_exotic', 'Broiler - Exotic')], max_length=20)),
+                ('quantity', models.PositiveIntegerField()),
+                ('age_days', models.PositiveIntegerField()),
+                ('recorded_on', models.DateField()),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('archived_on', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='chickallocation',
+            name='stock',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='allocations', to='manager.chickstock'),
+        ),
+        migrations.AddField(
+            model_name='chickallocation',
+            name='archived_stock',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='allocations', to='manager.archivedchickstock'),
+        ),
+    ]
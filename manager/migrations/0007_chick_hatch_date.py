@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def derive_hatch_dates(apps, schema_editor):
+    # age_days was the age on the day the batch was recorded
+    for name in ('ChickStock', 'ArchivedChickStock'):
+        model = apps.get_model('manager', name)
+        rows = model.objects.filter(hatch_date__isnull=True).values_list('id', 'recorded_on', 'age_days')
+        for batch_id, recorded_on, age_days in list(rows):
+            model.objects.filter(id=batch_id).update(hatch_date=recorded_on - timedelta(days=age_days))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0006_archived_chick_stock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chickstock',
+            name='hatch_date',
+            field=models.DateField(null=True, help_text='Filled in from age_days when left empty'),
+        ),
+        migrations.AddField(
+            model_name='archivedchickstock',
+            name='hatch_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(derive_hatch_dates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='chickstock',
+            name='hatch_date',
+            field=models.DateField(help_text='Filled in from age_days when left empty'),
+        ),
+        migrations.AlterField(
+            model_name='chickstock',
+            name='age_days',
+            field=models.PositiveIntegerField(help_text='Age of chicks in days when the batch was recorded'),
+        ),
+        migrations.AddIndex(
+            model_name='chickstock',
+            index=models.Index(condition=models.Q(('quantity__gt', 0)), fields=['chick_type', 'hatch_date'], name='chickstock_type_hatch_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0007_chick_hatch_date'),
+        ('sales', '0015_report_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('chicks_picked', models.IntegerField(default=0)),
+                ('pickups', models.IntegerField(default=0)),
+                ('chick_payments', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('feed_payments', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('initial_feed_bags', models.IntegerField(default=0)),
+                ('initial_feed_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('built_on', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DebtorSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('charged', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('paid', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('as_of', models.DateTimeField()),
+                ('farmer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='debtor_snapshot', to='sales.farmer')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-balance', 'farmer'], name='debtorsnap_balance_idx')],
+            },
+        ),
+    ]
@@ -1,6 +1,17 @@
-from django.db import models
+from datetime import date, timedelta
+
+from django.db import models, transaction
 #from sales.models import ChickRequest
 
+
+def age_in_days(today=None):
+    """SQL expression for a batch's current age (today - hatch_date), as a duration."""
+    return models.ExpressionWrapper(
+        models.Value(today or date.today(), output_field=models.DateField()) - models.F('hatch_date'),
+        output_field=models.DurationField(),
+    )
+
+
 class ChickStock(models.Model):
     CHICK_TYPE_CHOICES = (
         ('layer_local', 'Layer - Local'),
@@ -11,20 +22,139 @@ class ChickStock(models.Model):
 
     chick_type = models.CharField(max_length=20, choices=CHICK_TYPE_CHOICES)
     quantity = models.PositiveIntegerField()
-    age_days = models.PositiveIntegerField(help_text="Age of chicks in days")
+    age_days = models.PositiveIntegerField(help_text="Age of chicks in days when the batch was recorded")
+    # age_days goes stale the day after entry; current age is always today - hatch_date
+    hatch_date = models.DateField(help_text="Filled in from age_days when left empty")
     recorded_on = models.DateField(auto_now_add=True)
     notes = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['chick_type', 'quantity', 'recorded_on'], name='chickstock_type_qty_rec_idx'),
+            # FIFO / allocation scans only look at batches that still have chicks
+            models.Index(fields=['chick_type', 'recorded_on', 'id'], name='chickstock_fifo_idx',
+                         condition=models.Q(quantity__gt=0)),
+            # keyset pagination of the stock entries tab
+            models.Index(fields=['recorded_on', 'id'], name='chickstock_recorded_id_idx'),
+            # aging buckets, expiry alerts and the max-age gate are hatch_date ranges
+            models.Index(fields=['chick_type', 'hatch_date'], name='chickstock_type_hatch_idx',
+                         condition=models.Q(quantity__gt=0)),
+        ]
+
     def __str__(self):
         return f"{self.get_chick_type_display()} - {self.quantity} chicks"
+
+    def save(self, *args, **kwargs):
+        if self.hatch_date is None and self.age_days is not None:
+            self.hatch_date = (self.recorded_on or date.today()) - timedelta(days=int(self.age_days))
+        # the stock summary is bumped by post_save (manager.signals); commit both or neither
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+
+    @property
+    def current_age(self):
+        return (date.today() - self.hatch_date).days if self.hatch_date else self.age_days
     
 
+# Depleted batches past settings.CHICK_STOCK_ARCHIVE_DAYS are moved here by
+# manager/archive.py so the live ChickStock table only holds recent/current stock.
+class ArchivedChickStock(models.Model):
+    id = models.BigIntegerField(primary_key=True)  # same id the batch had in ChickStock
+    chick_type = models.CharField(max_length=20, choices=ChickStock.CHICK_TYPE_CHOICES)
+    quantity = models.PositiveIntegerField()
+    age_days = models.PositiveIntegerField()
+    hatch_date = models.DateField(null=True, blank=True)
+    recorded_on = models.DateField()
+    notes = models.TextField(blank=True, null=True)
+    archived_on = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archived batch #{self.id} ({self.get_chick_type_display()})"
+
+
 class ChickAllocation(models.Model):
     request = models.ForeignKey('sales.ChickRequest', on_delete=models.CASCADE, related_name='allocations')
-    stock   = models.ForeignKey('ChickStock', on_delete=models.PROTECT, related_name='allocations')
+    stock   = models.ForeignKey('ChickStock', on_delete=models.PROTECT, related_name='allocations',
+                                null=True, blank=True)
+    # set instead of `stock` once the batch has been archived
+    archived_stock = models.ForeignKey('ArchivedChickStock', on_delete=models.PROTECT, related_name='allocations',
+                                       null=True, blank=True)
     quantity = models.PositiveIntegerField()
 
     allocated_on = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"REQ{self.request_id} ← {self.quantity} from stock #{self.stock_id}"
+        return f"REQ{self.request_id} ← {self.quantity} from stock #{self.stock_id or self.archived_stock_id}"
+
+
+# ---------------------------------------------------------------------------
+# Running totals kept in sync by manager.signals (see manager/summaries.py).
+# Dashboards read these O(#types) rows instead of scanning stock/payment history.
+# ---------------------------------------------------------------------------
+
+class ChickStockSummary(models.Model):
+    chick_type = models.CharField(max_length=20, unique=True)
+    quantity = models.IntegerField(default=0)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.chick_type}: {self.quantity} chicks"
+
+
+class FeedStockSummary(models.Model):
+    feed_type = models.CharField(max_length=10, unique=True)
+    quantity_bags = models.IntegerField(default=0)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.feed_type}: {self.quantity_bags} bags"
+
+
+class RevenueRollup(models.Model):
+    day = models.DateField()
+    payment_for = models.CharField(max_length=10)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    payments = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'payment_for'], name='unique_revenue_rollup_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.payment_for}: UGX {self.amount}"
+
+
+# ---------------------------------------------------------------------------
+# Frozen per-day figures for the sales report (see manager/snapshots.py).
+# ---------------------------------------------------------------------------
+
+class ReportSnapshot(models.Model):
+    day = models.DateField(unique=True)
+    chicks_picked = models.IntegerField(default=0)
+    pickups = models.IntegerField(default=0)
+    chick_payments = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    feed_payments = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    initial_feed_bags = models.IntegerField(default=0)
+    initial_feed_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    built_on = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Report snapshot {self.day}"
+
+
+class DebtorSnapshot(models.Model):
+    """A farmer's initial-feed receivables as of the last freeze (balance > 0 only)."""
+    farmer = models.OneToOneField('sales.Farmer', on_delete=models.CASCADE, related_name='debtor_snapshot')
+    charged = models.DecimalField(max_digits=14, decimal_places=2)
+    paid = models.DecimalField(max_digits=14, decimal_places=2)
+    balance = models.DecimalField(max_digits=14, decimal_places=2)
+    as_of = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-balance', 'farmer'], name='debtorsnap_balance_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.farmer_id}: UGX {self.balance} as of {self.as_of:%Y-%m-%d %H:%M}"
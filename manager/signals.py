@@ -0,0 +1,103 @@
+"""
+Keep manager.summaries in step with ChickStock, FeedStock and Payment writes.
+
+pre_save remembers the row as it is in the database, post_save applies the
+difference and post_delete removes the row's contribution. Writes that bypass
+signals (queryset.update(), bulk_create) must call the adjust_* helpers
+themselves; `manage.py rebuild_summaries` repairs any drift.
+
+Payments dated on a day the sales report has already frozen also adjust that
+day's ReportSnapshot, and every new payment queues the day's snapshot freeze
+(manager.snapshots).
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from manager.models import ChickStock
+from manager.snapshots import adjust_snapshot_payment, queue_freeze
+from manager.summaries import adjust_chick_stock, adjust_feed_stock, adjust_revenue
+from sales.models import FeedStock, Payment
+
+
+def _remember_db_state(sender, instance, update_fields, fields):
+    """Stash the stored values of `fields` on the instance before it is saved."""
+    instance._summary_before = None
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(fields):
+        return
+    instance._summary_before = (sender.objects
+                                .filter(pk=instance.pk)
+                                .values_list(*fields)
+                                .first())
+
+
+# ---------------------- ChickStock ----------------------
+
+@receiver(pre_save, sender=ChickStock)
+def chick_stock_pre_save(sender, instance, update_fields=None, **kwargs):
+    _remember_db_state(sender, instance, update_fields, ('chick_type', 'quantity'))
+
+
+@receiver(post_save, sender=ChickStock)
+def chick_stock_post_save(sender, instance, created, update_fields=None, **kwargs):
+    before = getattr(instance, '_summary_before', None)
+    if not created and before is None:
+        return
+    if before:
+        adjust_chick_stock(before[0], -before[1])
+    adjust_chick_stock(instance.chick_type, int(instance.quantity))
+
+
+@receiver(post_delete, sender=ChickStock)
+def chick_stock_post_delete(sender, instance, **kwargs):
+    adjust_chick_stock(instance.chick_type, -int(instance.quantity))
+
+
+# ---------------------- FeedStock ----------------------
+
+@receiver(pre_save, sender=FeedStock)
+def feed_stock_pre_save(sender, instance, update_fields=None, **kwargs):
+    _remember_db_state(sender, instance, update_fields, ('feed_type', 'quantity_bags'))
+
+
+@receiver(post_save, sender=FeedStock)
+def feed_stock_post_save(sender, instance, created, update_fields=None, **kwargs):
+    before = getattr(instance, '_summary_before', None)
+    if not created and before is None:
+        return
+    if before:
+        adjust_feed_stock(before[0], -before[1])
+    adjust_feed_stock(instance.feed_type, int(instance.quantity_bags))
+
+
+@receiver(post_delete, sender=FeedStock)
+def feed_stock_post_delete(sender, instance, **kwargs):
+    adjust_feed_stock(instance.feed_type, -int(instance.quantity_bags))
+
+
+# ---------------------- Payment ----------------------
+
+@receiver(pre_save, sender=Payment)
+def payment_pre_save(sender, instance, update_fields=None, **kwargs):
+    _remember_db_state(sender, instance, update_fields, ('payment_date', 'payment_for', 'amount'))
+
+
+@receiver(post_save, sender=Payment)
+def payment_post_save(sender, instance, created, update_fields=None, **kwargs):
+    before = getattr(instance, '_summary_before', None)
+    if not created and before is None:
+        return
+    if before:
+        adjust_revenue(before[0], before[1], -before[2], payments=-1)
+        adjust_snapshot_payment(before[0], before[1], -before[2])
+    adjust_revenue(instance.payment_date, instance.payment_for, instance.amount, payments=1)
+    adjust_snapshot_payment(instance.payment_date, instance.payment_for, instance.amount)
+    if created:
+        queue_freeze()
+
+
+@receiver(post_delete, sender=Payment)
+def payment_post_delete(sender, instance, **kwargs):
+    adjust_revenue(instance.payment_date, instance.payment_for, -instance.amount, payments=-1)
+    adjust_snapshot_payment(instance.payment_date, instance.payment_for, -instance.amount)
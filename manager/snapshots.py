@@ -0,0 +1,216 @@
+"""
+Frozen daily figures for the sales report.
+
+ReportSnapshot holds one row per day: chicks picked and pickups, chick and
+feed payments, and the initial (pay-later) feed issued. Every day with
+activity up to the last frozen one has its row, so the report sums any
+date range with one query. Days after the
+last frozen day (normally just today) are computed live from the source
+tables and added on top.
+
+The first pickup or payment of each day queues a
+`manager.freeze_report_snapshots` job (queue_freeze), which freezes the
+days that have ended and the debtor ranking once `manage.py run_jobs`
+picks it up. `manage.py build_report_snapshots` does the same by hand.
+Until either runs, those days are simply computed live.
+
+A payment moved to or deleted from a frozen day (payment_date is set on
+creation, so only later edits reach past days) adjusts that day's row, like
+RevenueRollup (manager.signals). Other backdated edits
+(picked_on or quantity of an old pickup, raw SQL) need
+`build_report_snapshots --rebuild`.
+
+The debtor ranking works the same way per farmer: DebtorSnapshot holds every
+farmer's ledger totals as of the last freeze, and only the farmers whose
+ledger rows changed since then (FeedReceivable.updated_on) are summed live.
+It is rebuilt in full on every run, so a deleted ledger row is off the
+ranking by the next day at the latest.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import Count, F, Max, Min, Q, Subquery, Sum
+from django.utils import timezone
+
+from home.jobs import enqueue
+from manager.models import DebtorSnapshot, ReportSnapshot, RevenueRollup
+from sales.models import ChickRequest, FeedReceivable
+from sales.receivables import debtor_totals, top_debtors as top_debtors_live
+
+
+FIGURES = ('chicks_picked', 'pickups', 'chick_payments', 'feed_payments', 'initial_feed_bags', 'initial_feed_value')
+PAYMENT_FIGURES = {'chicks': 'chick_payments', 'feeds': 'feed_payments'}
+
+_as_date = models.DateField().to_python
+
+
+def _zero():
+    return {figure: 0 if figure in ('chicks_picked', 'pickups', 'initial_feed_bags') else Decimal('0')
+            for figure in FIGURES}
+
+
+def _between(field, start, end):
+    lookups = {}
+    if start:
+        lookups[f'{field}__gte'] = start
+    if end:
+        lookups[f'{field}__lte'] = end
+    return lookups
+
+
+def live_days(start, end):
+    """{day: figures} for the days from `start` to `end` (inclusive, start optional) with any activity."""
+    days = defaultdict(_zero)
+    pickups = (ChickRequest.objects
+               .filter(is_picked=True, picked_on__isnull=False, **_between('picked_on', start, end))
+               .values('picked_on')
+               .annotate(chicks=Sum('quantity'), n=Count('id')))
+    for row in pickups:
+        days[row['picked_on']].update(chicks_picked=row['chicks'] or 0, pickups=row['n'])
+
+    revenue = (RevenueRollup.objects
+               .filter(payment_for__in=PAYMENT_FIGURES, **_between('day', start, end))
+               .values_list('day', 'payment_for', 'amount'))
+    for day, payment_for, amount in revenue:
+        days[day][PAYMENT_FIGURES[payment_for]] = amount
+
+    issued = (FeedReceivable.objects
+              .filter(**_between('distribution__distribution_date', start, end))
+              .values('distribution__distribution_date')
+              .annotate(bags=Sum('distribution__quantity_bags'), value=Sum('charged')))
+    for row in issued:
+        days[row['distribution__distribution_date']].update(initial_feed_bags=row['bags'] or 0,
+                                                            initial_feed_value=row['value'] or Decimal('0'))
+    return days
+
+
+def first_activity_day():
+    firsts = [
+        ChickRequest.objects.filter(is_picked=True).aggregate(d=Min('picked_on'))['d'],
+        RevenueRollup.objects.filter(payment_for__in=PAYMENT_FIGURES).aggregate(d=Min('day'))['d'],
+        FeedReceivable.objects.aggregate(d=Min('distribution__distribution_date'))['d'],
+    ]
+    firsts = [day for day in firsts if day]
+    return min(firsts) if firsts else None
+
+
+# ---------------------- freezing ----------------------
+
+@transaction.atomic
+def freeze_days(start, end):
+    """(Re)build the rows of every day from `start` to `end`. Returns how many."""
+    figures = live_days(start, end)
+    ReportSnapshot.objects.filter(day__range=(start, end)).delete()
+    rows = []
+    day = start
+    while day <= end:
+        rows.append(ReportSnapshot(day=day, **figures.get(day, _zero())))
+        day += timedelta(days=1)
+    ReportSnapshot.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+@transaction.atomic
+def freeze_pending(today=None, rebuild=False):
+    """Freeze every day that has ended and isn't frozen yet (all of them with rebuild=True)."""
+    yesterday = (today or date.today()) - timedelta(days=1)
+    last = None if rebuild else ReportSnapshot.objects.aggregate(d=Max('day'))['d']
+    start = last + timedelta(days=1) if last else first_activity_day()
+    if rebuild:
+        ReportSnapshot.objects.all().delete()
+    if start is None or start > yesterday:
+        return 0
+    return freeze_days(start, yesterday)
+
+
+@transaction.atomic
+def freeze_debtors():
+    """Replace the debtor snapshot with the current ledger totals. Returns the number of debtors."""
+    as_of = timezone.now()  # before reading, so rows changed meanwhile count as changed
+    rows = [
+        DebtorSnapshot(farmer_id=row['farmer_id'], charged=row['total_value'], paid=row['total_paid'],
+                       balance=row['balance'], as_of=as_of)
+        for row in debtor_totals().filter(balance__gt=0).iterator(chunk_size=2000)
+    ]
+    DebtorSnapshot.objects.all().delete()
+    DebtorSnapshot.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def queue_freeze(today=None):
+    """Queue the freezing job, at most once per day (call it inside the write's transaction)."""
+    today = today or date.today()
+    return enqueue('manager.freeze_report_snapshots', key=f'report-snapshots:{today.isoformat()}')
+
+
+def adjust_snapshot_payment(day, payment_for, amount):
+    """Apply a payment written against an already frozen day (called from manager.signals)."""
+    figure = PAYMENT_FIGURES.get(payment_for)
+    day = _as_date(day)
+    if not (figure and amount and day and day < date.today()):
+        return
+    if not ReportSnapshot.objects.filter(day=day).update(**{figure: F(figure) + amount}):
+        # a day before the first frozen one, which had no activity until now
+        last = ReportSnapshot.objects.aggregate(d=Max('day'))['d']
+        if last and day < last:
+            ReportSnapshot.objects.create(day=day, **{figure: amount})
+
+
+# ---------------------- reading ----------------------
+
+def report_totals(periods, today=None):
+    """
+    {name: figures} for each `name: (start, end)` period (inclusive; either
+    end may be None). One query over the snapshots, plus the live figures of
+    the days after the last frozen one.
+    """
+    today = today or date.today()
+    sums = {}
+    for name, (start, end) in periods.items():
+        in_period = Q(**_between('day', start, end)) or None
+        for figure in FIGURES:
+            sums[f'{name}__{figure}'] = Sum(figure, filter=in_period)
+    frozen = ReportSnapshot.objects.aggregate(last_day=Max('day'), **sums)
+
+    totals = {}
+    for name in periods:
+        totals[name] = _zero()
+        for figure in FIGURES:
+            totals[name][figure] += frozen[f'{name}__{figure}'] or 0
+
+    live_from = frozen['last_day'] + timedelta(days=1) if frozen['last_day'] else None
+    if live_from and live_from > today:
+        return totals
+    for day, figures in live_days(live_from, today).items():
+        for name, (start, end) in periods.items():
+            if (start is None or day >= start) and (end is None or day <= end):
+                for figure in FIGURES:
+                    totals[name][figure] += figures[figure]
+    return totals
+
+
+def _changed_farmers(since):
+    return FeedReceivable.objects.filter(updated_on__gte=since).values('farmer_id')
+
+
+def top_debtors(limit=10):
+    """sales.receivables.top_debtors(), from the debtor snapshot and the farmers changed since."""
+    as_of = DebtorSnapshot.objects.order_by('-as_of').values('as_of')[:1]
+    frozen = list(DebtorSnapshot.objects
+                  .exclude(farmer_id__in=_changed_farmers(Subquery(as_of)))
+                  .order_by('-balance', 'farmer_id')
+                  .values('farmer_id', 'farmer__name', 'balance', 'as_of',
+                          total_value=F('charged'), total_paid=F('paid'))[:limit])
+    if not frozen:
+        # nothing frozen yet, or no unchanged debtors: the live ranking is what's left
+        return top_debtors_live(limit)
+
+    rows = {row['farmer_id']: row for row in frozen}
+    changed = FeedReceivable.objects.filter(farmer_id__in=_changed_farmers(frozen[0]['as_of']))
+    rows.update((row['farmer_id'], row) for row in debtor_totals(changed))
+    ranked = sorted((row for row in rows.values() if row['balance'] > 0),
+                    key=lambda row: (-row['balance'], row['farmer_id']))
+    return [{key: row[key] for key in ('farmer__name', 'total_value', 'total_paid', 'balance')}
+            for row in ranked[:limit]]
@@ -0,0 +1,177 @@
+"""
+Incrementally maintained inventory and revenue totals.
+
+ChickStockSummary / FeedStockSummary hold one row per type and RevenueRollup
+one row per (day, payment_for). They are bumped by manager.signals whenever a
+ChickStock, FeedStock or Payment row is saved or deleted, inside the same
+transaction as the write: those models' save() wraps the write and its
+post_save in transaction.atomic(), and Django already runs post_delete in the
+delete's transaction. If a bump fails, the write is rolled back with it. `rebuild_summaries()` recomputes them from scratch
+and reports any drift (e.g. after raw SQL or queryset.update() edits).
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum, Count
+
+from manager.models import ChickStock, ChickStockSummary, FeedStockSummary, RevenueRollup
+from sales.models import FeedStock, Payment
+
+
+CHICK_TYPES = [key for key, _ in ChickStock.CHICK_TYPE_CHOICES]
+FEED_TYPES = [key for key, _ in FeedStock.FEED_TYPE_CHOICES]
+
+
+def _bump(model, lookup, **deltas):
+    """Add `deltas` to the row matching `lookup`, creating it on first use."""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    changes = {field: F(field) + delta for field, delta in deltas.items()}
+    with transaction.atomic():
+        if model.objects.filter(**lookup).update(**changes):
+            return
+        try:
+            with transaction.atomic():
+                model.objects.create(**lookup, **deltas)
+        except IntegrityError:
+            # Another writer created the row first; add onto theirs
+            model.objects.filter(**lookup).update(**changes)
+
+
+# ---------------------- writers (called from signals & services) ----------------------
+
+def adjust_chick_stock(chick_type, delta):
+    _bump(ChickStockSummary, {'chick_type': chick_type}, quantity=delta)
+
+
+def adjust_feed_stock(feed_type, delta):
+    _bump(FeedStockSummary, {'feed_type': feed_type}, quantity_bags=delta)
+
+
+def adjust_revenue(day, payment_for, amount, payments=0):
+    _bump(RevenueRollup, {'day': day, 'payment_for': payment_for}, amount=amount, payments=payments)
+
+
+# ---------------------- readers ----------------------
+# a<name> twins are for async views; they run the same query
+
+def _zero_filled(keys, rows):
+    totals = dict.fromkeys(keys, 0)
+    totals.update(rows)
+    return totals
+
+
+def _chick_stock_rows():
+    return ChickStockSummary.objects.values_list('chick_type', 'quantity')
+
+
+def _feed_stock_rows():
+    return FeedStockSummary.objects.values_list('feed_type', 'quantity_bags')
+
+
+def chick_stock_totals():
+    """{chick_type: chicks in stock} for every chick type (zero-filled)."""
+    return _zero_filled(CHICK_TYPES, _chick_stock_rows())
+
+
+async def achick_stock_totals():
+    return _zero_filled(CHICK_TYPES, [row async for row in _chick_stock_rows()])
+
+
+def feed_stock_totals():
+    """{feed_type: bags in stock} for every feed type (zero-filled)."""
+    return _zero_filled(FEED_TYPES, _feed_stock_rows())
+
+
+async def afeed_stock_totals():
+    return _zero_filled(FEED_TYPES, [row async for row in _feed_stock_rows()])
+
+
+def _revenue_rows(start, end):
+    rows = RevenueRollup.objects.all()
+    if start:
+        rows = rows.filter(day__gte=start)
+    if end:
+        rows = rows.filter(day__lte=end)
+    return rows.values('payment_for').annotate(total=Sum('amount'))
+
+
+def _revenue_by_payment_for(rows):
+    totals = {key: Decimal('0') for key, _ in Payment.PAYMENT_FOR_CHOICES}
+    for row in rows:
+        totals[row['payment_for']] = row['total'] or Decimal('0')
+    return totals
+
+
+def revenue_totals(start=None, end=None):
+    """{payment_for: amount} between `start` and `end` (inclusive, both optional)."""
+    return _revenue_by_payment_for(_revenue_rows(start, end))
+
+
+async def arevenue_totals(start=None, end=None):
+    return _revenue_by_payment_for([row async for row in _revenue_rows(start, end)])
+
+
+# ---------------------- rebuild ----------------------
+
+def _expected_summaries():
+    chicks = dict(ChickStock.objects.values('chick_type')
+                  .annotate(total=Sum('quantity')).values_list('chick_type', 'total'))
+    feeds = dict(FeedStock.objects.values('feed_type')
+                 .annotate(total=Sum('quantity_bags')).values_list('feed_type', 'total'))
+    revenue = {
+        (row['payment_date'], row['payment_for']): (row['total'], row['n'])
+        for row in (Payment.objects
+                    .values('payment_date', 'payment_for')
+                    .annotate(total=Sum('amount'), n=Count('id')))
+    }
+    return chicks, feeds, revenue
+
+
+def _nonzero(totals):
+    return {key: value for key, value in totals.items() if value and value != (0, 0)}
+
+
+def _diff(label, expected, actual):
+    expected, actual = _nonzero(expected), _nonzero(actual)
+    drift = []
+    for key in sorted(set(expected) | set(actual), key=str):
+        want, have = expected.get(key), actual.get(key)
+        if want != have:
+            drift.append(f"{label} {key}: stored {have}, actual {want}")
+    return drift
+
+
+@transaction.atomic
+def rebuild_summaries(apply=True):
+    """
+    Recompute every summary row from the source tables.
+    Returns a list of human-readable drift lines (empty when in sync).
+    With apply=False only the drift report is produced.
+    """
+    chicks, feeds, revenue = _expected_summaries()
+
+    drift = []
+    drift += _diff('chick_stock', chicks,
+                   dict(ChickStockSummary.objects.values_list('chick_type', 'quantity')))
+    drift += _diff('feed_stock', feeds,
+                   dict(FeedStockSummary.objects.values_list('feed_type', 'quantity_bags')))
+    drift += _diff('revenue', revenue, {
+        (r.day, r.payment_for): (r.amount, r.payments) for r in RevenueRollup.objects.all()
+    })
+
+    if apply and drift:
+        ChickStockSummary.objects.all().delete()
+        ChickStockSummary.objects.bulk_create(
+            [ChickStockSummary(chick_type=k, quantity=v or 0) for k, v in chicks.items()])
+        FeedStockSummary.objects.all().delete()
+        FeedStockSummary.objects.bulk_create(
+            [FeedStockSummary(feed_type=k, quantity_bags=v or 0) for k, v in feeds.items()])
+        RevenueRollup.objects.all().delete()
+        RevenueRollup.objects.bulk_create([
+            RevenueRollup(day=day, payment_for=pfor, amount=total, payments=n)
+            for (day, pfor), (total, n) in revenue.items()
+        ], batch_size=1000)
+
+    return drift
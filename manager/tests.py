@@ -1,3 +1,527 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+import zipfile
+from unittest import mock
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from home.jobs import run_pending
+from home.models import Job, User
+from manager.metrics import dashboard_metrics, chick_stock_age_buckets
+from manager.archive import archive_chick_stock
+from manager.models import ArchivedChickStock, ChickAllocation, ChickStock, DebtorSnapshot, ReportSnapshot
+from manager.snapshots import freeze_pending, report_totals, top_debtors as snapshot_top_debtors
+from manager.summaries import (
+    chick_stock_totals, feed_stock_totals, revenue_totals, rebuild_summaries
+)
+from home.pagination import keyset_page, encode_cursor, estimate_count
+from sales.models import ChickRequest, Farmer, FeedDistribution, FeedRequest, FeedStock, Payment
+from sales.receivables import top_debtors
+
+
+class DashboardMetricsTests(TestCase):
+    # grouped aggregates (requests, stock, feed stock, payments) + farmer count,
+    # trainings, five alert lists and the last-approvals table
+    QUERY_BUDGET = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username='manager', password='pw', role='brooder_manager')
+        cls.farmer = Farmer.objects.create(
+            name='Amina Okello', dob=date(2000, 1, 1), gender='F', nin='CF0000000000001',
+            recommender='John Kato', recommender_nin='CM0000000000001', contact='0700000000',
+        )
+        ChickStock.objects.create(chick_type='broiler_local', quantity=40, age_days=3)
+        ChickStock.objects.create(chick_type='layer_exotic', quantity=200, age_days=10)
+        FeedStock.objects.create(
+            feed_type='starter', quantity_bags=12, purchase_price=Decimal('90000'),
+            sale_price=Decimal('100000'), arrival_date=date.today(),
+        )
+        ChickRequest.objects.create(farmer=cls.farmer, chick_type='broiler_local', quantity=30,
+                                    status='approved', is_picked=True, picked_on=date.today(),
+                                    approval_date=date.today())
+        ChickRequest.objects.create(farmer=cls.farmer, chick_type='layer_local', quantity=20)
+        Payment.objects.create(farmer=cls.farmer, amount=Decimal('1000'), payment_for='chicks')
+        Payment.objects.create(farmer=cls.farmer, amount=Decimal('500'), payment_for='both')
+
+    def test_cards(self):
+        metrics = dashboard_metrics()
+        self.assertEqual(metrics['total_chicks_sold'], 30)
+        self.assertEqual(metrics['chicks_sold_by_type']['broiler_local'], 30)
+        self.assertEqual(metrics['chicks_week_by_type']['layer_local'], 0)
+        self.assertEqual(metrics['pending_requests'], 1)
+        self.assertEqual(metrics['approved_this_month'], 1)
+        self.assertEqual(metrics['stock_dict'], {
+            'broiler_local': 40, 'broiler_exotic': 0, 'layer_local': 0, 'layer_exotic': 200,
+        })
+        self.assertEqual(metrics['feed_stock_by_type']['starter'], 12)
+        self.assertEqual(metrics['total_revenue'], Decimal('1500'))
+        self.assertEqual(metrics['total_revenue_breakdown']['chicks'], Decimal('1250'))
+        self.assertEqual(metrics['alerts']['counts']['low_chick_types'], 3)
+
+    def test_dashboard_query_budget(self):
+        self.client.force_login(self.manager)
+        # +2 for the session and user lookups done by the auth middleware
+        with self.assertNumQueries(self.QUERY_BUDGET + 2):
+            response = self.client.get(reverse('manager_dashboard'))
+        self.assertEqual(response.status_code, 200)
+
+
+class SummaryTableTests(TestCase):
+
+    def setUp(self):
+        self.farmer = Farmer.objects.create(
+            name='Brian Mugisha', dob=date(2001, 5, 5), gender='M', nin='CM0000000000002',
+            recommender='Grace Nankya', recommender_nin='CF0000000000002', contact='0700000001',
+        )
+
+    def test_stock_summaries_follow_saves_and_deletes(self):
+        batch = ChickStock.objects.create(chick_type='layer_local', quantity=100, age_days=1)
+        ChickStock.objects.create(chick_type='layer_local', quantity=50, age_days=1)
+        self.assertEqual(chick_stock_totals()['layer_local'], 150)
+
+        batch.quantity -= 30
+        batch.save()
+        batch.chick_type = 'layer_exotic'
+        batch.save(update_fields=['chick_type'])
+        self.assertEqual(chick_stock_totals()['layer_local'], 50)
+        self.assertEqual(chick_stock_totals()['layer_exotic'], 70)
+
+        batch.delete()
+        self.assertEqual(chick_stock_totals()['layer_exotic'], 0)
+
+        feed = FeedStock.objects.create(
+            feed_type='grower', quantity_bags=8, purchase_price=Decimal('1'),
+            sale_price=Decimal('2'), arrival_date=date.today(),
+        )
+        feed.quantity_bags = 5
+        feed.save()
+        self.assertEqual(feed_stock_totals()['grower'], 5)
+
+    def test_revenue_rollup_and_rebuild(self):
+        payment = Payment.objects.create(farmer=self.farmer, amount=Decimal('300'), payment_for='feeds')
+        Payment.objects.create(farmer=self.farmer, amount=Decimal('200'), payment_for='feeds')
+        self.assertEqual(revenue_totals(start=date.today())['feeds'], Decimal('500'))
+
+        payment.delete()
+        self.assertEqual(revenue_totals()['feeds'], Decimal('200'))
+        self.assertEqual(rebuild_summaries(apply=False), [])
+
+        # Writes that bypass signals drift until rebuilt
+        ChickStock.objects.create(chick_type='broiler_local', quantity=10, age_days=1)
+        ChickStock.objects.update(quantity=4)
+        self.assertEqual(len(rebuild_summaries()), 1)
+        self.assertEqual(chick_stock_totals()['broiler_local'], 4)
+        self.assertEqual(rebuild_summaries(apply=False), [])
+
+
+class SummaryAtomicityTests(TransactionTestCase):
+    """No test-wide transaction here: the writes autocommit as they do in the views."""
+
+    def test_a_failing_bump_rolls_the_write_back(self):
+        farmer = Farmer.objects.create(
+            name='Brian Mugisha', dob=date(2001, 5, 5), gender='M', nin='CM0000000000002',
+            recommender='Grace Nankya', recommender_nin='CF0000000000002', contact='0700000001',
+        )
+        locked = OperationalError('database is locked')
+        with mock.patch('manager.signals.adjust_feed_stock', side_effect=locked), \
+                self.assertRaises(OperationalError):
+            FeedStock.objects.create(feed_type='grower', quantity_bags=8, purchase_price=Decimal('1'),
+                                     sale_price=Decimal('2'), arrival_date=date.today())
+        with mock.patch('manager.signals.adjust_revenue', side_effect=locked), \
+                self.assertRaises(OperationalError):
+            Payment.objects.create(farmer=farmer, amount=Decimal('300'), payment_for='chicks')
+
+        self.assertFalse(FeedStock.objects.exists())
+        self.assertFalse(Payment.objects.exists())
+        self.assertEqual(rebuild_summaries(apply=False), [])
+
+
+class ChickRequestHistoryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username='manager', password='pw', role='brooder_manager')
+        today = date.today()
+        for i in range(30):
+            farmer = Farmer.objects.create(
+                name=f'Farmer {i}', dob=date(2000, 1, 1), gender='M', nin=f'CM{i:012d}',
+                recommender='Ruth', recommender_nin='CF000000000009', contact='0700000002',
+            )
+            ChickRequest.objects.create(farmer=farmer, chick_type='broiler_local', quantity=10,
+                                        status='approved', is_picked=True, picked_on=today)
+            Payment.objects.create(farmer=farmer, amount=Decimal('16500'), payment_for='chicks')
+            FeedDistribution.objects.create(farmer=farmer, distribution_type='initial', quantity_bags=2,
+                                            due_date=today - timedelta(days=1))
+        cls.rejected = ChickRequest.objects.create(farmer=farmer, chick_type='layer_local',
+                                                   quantity=5, status='rejected')
+
+    def test_history_status_is_annotated_per_row(self):
+        self.client.force_login(self.manager)
+        response = self.client.get(reverse('review_chick_requests'), {'tab': 'history', 'picked': 'yes'})
+        rows = response.context['history_requests']
+        self.assertEqual(len(rows), 25)
+        self.assertEqual(response.context['history_page'].count, 30)
+        row = rows[0]
+        self.assertEqual(row.chicks_paid_today, Decimal('16500'))
+        self.assertEqual(row.chicks_balance, 0)
+        self.assertEqual(row.feeds_allocated_bags, 2)
+        self.assertEqual(row.feeds_status, 'overdue')
+
+    def test_history_filters(self):
+        self.client.force_login(self.manager)
+        response = self.client.get(reverse('review_chick_requests'), {'tab': 'history', 'status': 'rejected'})
+        self.assertEqual([r.id for r in response.context['history_requests']], [self.rejected.id])
+
+    def test_history_ignores_malformed_dates(self):
+        self.client.force_login(self.manager)
+        url = reverse('review_chick_requests')
+        for dates in ({'from': 'abc'}, {'from': '2020-13-45'}, {'to': 'xx'}):
+            response = self.client.get(url, {'tab': 'history', 'status': 'rejected', **dates})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([r.id for r in response.context['history_requests']], [self.rejected.id])
+        response = self.client.get(url, {'tab': 'history', 'to': (date.today() - timedelta(days=1)).isoformat()})
+        self.assertEqual(list(response.context['history_requests']), [])
+
+    def test_history_search_goes_through_the_farmer_index(self):
+        self.client.force_login(self.manager)
+        url = reverse('review_chick_requests')
+        response = self.client.get(url, {'tab': 'history', 'q': 'cm000000000007'})
+        self.assertEqual([r.farmer.nin for r in response.context['history_requests']], ['CM000000000007'])
+        response = self.client.get(url, {'tab': 'history', 'q': str(self.rejected.id)})
+        self.assertIn(self.rejected.id, [r.id for r in response.context['history_requests']])
+
+    def test_history_query_count_is_bounded_by_page(self):
+        self.client.force_login(self.manager)
+        url = reverse('review_chick_requests')
+        with CaptureQueriesContext(connection) as first_page:
+            response = self.client.get(url, {'tab': 'history'})
+        next_url = response.context['history_page'].next_url
+        self.assertIn('tab=history', next_url)
+        with CaptureQueriesContext(connection) as last_page:
+            response = self.client.get(url + next_url)
+        self.assertEqual(len(response.context['history_requests']), 6)
+        self.assertLess(len(first_page), 15)
+        self.assertEqual(len(first_page), len(last_page))
+
+
+class FeedListPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username='manager', password='pw', role='brooder_manager')
+        farmer = Farmer.objects.create(
+            name='Sarah Namuli', dob=date(2000, 1, 1), gender='F', nin='CF000000000077',
+            recommender='Ruth', recommender_nin='CF000000000009', contact='0700000002',
+        )
+        FeedRequest.objects.bulk_create([
+            FeedRequest(farmer=farmer, feed_type='starter', quantity_bags=1,
+                        status='approved' if i % 2 else 'pending')
+            for i in range(60)
+        ])
+        # every distribution shares a date, so ordering falls through to id
+        FeedDistribution.objects.bulk_create([
+            FeedDistribution(farmer=farmer, distribution_type='purchase', quantity_bags=i + 1)
+            for i in range(30)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.manager)
+
+    def test_keyset_walk_visits_every_row_once_in_order(self):
+        qs = FeedDistribution.objects.all()
+        seen, cursor = [], None
+        while True:
+            page = keyset_page(qs, ('-distribution_date', '-id'), cursor, per_page=7)
+            seen += [d.id for d in page]
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, list(qs.order_by('-id').values_list('id', flat=True)))
+        # and back again from the last page
+        back = keyset_page(qs, ('-distribution_date', '-id'), page.prev_cursor, per_page=7)
+        self.assertEqual([d.id for d in back], seen[-9:-2])
+        self.assertTrue(back.has_previous and back.has_next)
+        # garbage cursors fall back to the first page
+        self.assertEqual(len(keyset_page(qs, ('-id',), 'not-a-cursor', per_page=7)), 7)
+        bad_date = encode_cursor(['yesterday', 3])
+        self.assertEqual(len(keyset_page(qs, ('-distribution_date', '-id'), bad_date, per_page=7)), 7)
+
+    def test_estimated_counts_are_capped(self):
+        self.assertEqual(estimate_count(FeedRequest.objects.all()), (60, 'exact'))
+        self.assertEqual(estimate_count(FeedRequest.objects.all(), cap=50), (50, 'at_least'))
+
+    def test_only_pending_tab_is_rendered_up_front(self):
+        response = self.client.get(reverse('review_feed_requests'))
+        self.assertEqual(len(response.context['rows']), 25)
+        self.assertTrue(all(r.status == 'pending' for r in response.context['rows']))
+        self.assertContains(response, reverse('feed_requests_tab', args=['approved']))
+
+    def test_tab_fragment_pages_with_constant_queries(self):
+        url = reverse('feed_requests_tab', args=['approved'])
+        with CaptureQueriesContext(connection) as first:
+            response = self.client.get(url)
+        rows = list(response.context['rows'])
+        self.assertEqual(len(rows), 25)
+        next_url = response.context['next_url']
+
+        with CaptureQueriesContext(connection) as second:
+            response = self.client.get(next_url)
+        self.assertEqual(len(first), len(second))
+        more = list(response.context['rows'])
+        self.assertEqual(len(more), 5)
+        self.assertIsNone(response.context['next_url'])
+        self.assertEqual(len({r.id for r in rows + more}), 30)
+        self.assertEqual(self.client.get(reverse('feed_requests_tab', args=['bogus'])).status_code, 404)
+
+    def test_feeds_page_lazy_loads_distributions(self):
+        response = self.client.get(reverse('manager_feeds'))
+        self.assertNotIn('distributions', response.context)
+        response = self.client.get(reverse('manager_feeds_tab', args=['distributions']), {'q': 'namuli'})
+        self.assertEqual(len(response.context['rows']), 25)
+        self.assertContains(response, 'Load more')
+
+
+class ChickStockSummaryAndArchiveTests(TestCase):
+
+    def setUp(self):
+        ChickStock.objects.create(chick_type='layer_local', quantity=30, age_days=5)
+        ChickStock.objects.create(chick_type='layer_local', quantity=20, age_days=18)
+        ChickStock.objects.create(chick_type='layer_local', quantity=10, age_days=25)
+        ChickStock.objects.create(chick_type='broiler_exotic', quantity=0, age_days=3)
+        farmer = Farmer.objects.create(
+            name='Juma Okot', dob=date(2000, 1, 1), gender='M', nin='CM000000000055',
+            recommender='Ruth', recommender_nin='CF000000000009', contact='0700000002',
+        )
+        self.request = ChickRequest.objects.create(farmer=farmer, chick_type='broiler_exotic', quantity=50)
+
+    def backdate(self, batch, days):
+        ChickStock.objects.filter(id=batch.id).update(recorded_on=date.today() - timedelta(days=days))
+
+    def test_age_buckets_come_from_one_query_and_skip_empty_batches(self):
+        with self.assertNumQueries(1):
+            summary = chick_stock_age_buckets()
+        self.assertEqual(summary, [{'label': 'Layer - Local', 'total': 60,
+                                    'available': 30, 'aging': 20, 'expiring': 10}])
+
+    def test_archive_moves_only_old_empty_batches(self):
+        old_empty = ChickStock.objects.get(quantity=0)
+        ChickAllocation.objects.create(request=self.request, stock=old_empty, quantity=50)
+        self.backdate(old_empty, 200)
+        recent_empty = ChickStock.objects.create(chick_type='layer_exotic', quantity=0, age_days=1)
+        old_full = ChickStock.objects.get(quantity=30)
+        self.backdate(old_full, 200)
+
+        self.assertEqual(archive_chick_stock(horizon_days=90), 1)
+
+        self.assertFalse(ChickStock.objects.filter(id=old_empty.id).exists())
+        self.assertEqual(ChickStock.objects.filter(id__in=[recent_empty.id, old_full.id]).count(), 2)
+        archived = ArchivedChickStock.objects.get(id=old_empty.id)
+        allocation = self.request.allocations.get()
+        self.assertIsNone(allocation.stock_id)
+        self.assertEqual(allocation.archived_stock, archived)
+        self.assertEqual(archive_chick_stock(horizon_days=90), 0)
+
+
+class ChickAgeTests(TestCase):
+
+    def setUp(self):
+        self.manager = User.objects.create_user(username='manager', password='pw', role='brooder_manager')
+        farmer = Farmer.objects.create(
+            name='Sarah Akello', dob=date(2000, 1, 1), gender='F', nin='CF000000000077',
+            recommender='Ruth', recommender_nin='CF000000000009', contact='0700000003',
+        )
+        self.request = ChickRequest.objects.create(farmer=farmer, chick_type='layer_local', quantity=10)
+        # entered 20 days ago as 5-day-old chicks: 25 days old today
+        self.batch = ChickStock.objects.create(chick_type='layer_local', quantity=40, age_days=5,
+                                               hatch_date=date.today() - timedelta(days=25))
+
+    def test_hatch_date_defaults_from_age_at_entry(self):
+        batch = ChickStock.objects.create(chick_type='layer_local', quantity=1, age_days=3)
+        self.assertEqual(batch.hatch_date, date.today() - timedelta(days=3))
+        self.assertEqual(batch.current_age, 3)
+
+    def test_buckets_and_batch_json_use_current_age(self):
+        self.assertEqual(chick_stock_age_buckets()[0]['expiring'], 40)
+        self.assertEqual(dashboard_metrics()['alerts']['chick_expiring'][0]['age'], 25)
+
+        self.client.force_login(self.manager)
+        response = self.client.get(reverse('review_chick_requests'))
+        batches = json.loads(response.context['batch_json'])
+        self.assertEqual(batches['layer_local'][0]['age_days'], 25)
+
+    def test_max_age_gate_rejects_old_batches(self):
+        self.client.force_login(self.manager)
+        url = reverse('approve_reject_request', args=[self.request.id])
+        self.client.post(url, {'action': 'approve', 'allocations[]': [f'{self.batch.id}:10'],
+                               'max_age_days': '21'})
+        self.request.refresh_from_db()
+        self.assertEqual(self.request.status, 'pending')
+
+        self.client.post(url, {'action': 'approve', 'allocations[]': [f'{self.batch.id}:10'],
+                               'max_age_days': '30'})
+        self.request.refresh_from_db()
+        self.assertEqual(self.request.status, 'approved')
+
+
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username='manager', password='pw', role='brooder_manager')
+        farmer = Farmer.objects.create(
+            name='Peter Ssali, Jr', dob=date(2000, 1, 1), gender='M', nin='CM000000000088',
+            recommender='Ruth', recommender_nin='CF000000000009', contact='0700000004',
+        )
+        for amount, pfor in ((Decimal('1000'), 'chicks'), (Decimal('2500.50'), 'feeds'), (Decimal('300'), 'feeds')):
+            Payment.objects.create(farmer=farmer, amount=amount, payment_for=pfor, notes='<ok> & "quoted"')
+        Payment.objects.filter(amount=Decimal('300')).update(payment_date=date.today() - timedelta(days=40))
+
+    def setUp(self):
+        self.client.force_login(self.manager)
+
+    def test_csv_streams_filtered_rows(self):
+        response = self.client.get(reverse('manager_export', args=['payments']),
+                                   {'type': 'feeds', 'from': (date.today() - timedelta(days=7)).isoformat()})
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith('ID,Date,Farmer'))
+        self.assertIn('"Peter Ssali, Jr"', lines[1])
+        self.assertIn('2500.50', lines[1])
+
+    def test_xlsx_is_a_valid_workbook(self):
+        response = self.client.get(reverse('manager_export', args=['payments']), {'format': 'xlsx'})
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as zf:
+            sheet = zf.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row>'), 4)
+        self.assertIn('&lt;ok&gt; &amp; "quoted"', sheet)
+
+    def test_bad_type_redirects_with_message(self):
+        response = self.client.get(reverse('manager_export', args=['payments']), {'type': 'layer_local'})
+        self.assertRedirects(response, reverse('manager_reports'))
+        self.assertEqual(self.client.get(reverse('manager_export', args=['nope'])).status_code, 404)
+
+    def test_command_writes_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'payments.csv')
+            call_command('export_data', 'payments', '--type', 'chicks', '-o', path, stdout=open(os.devnull, 'w'))
+            with open(path, encoding='utf-8-sig') as fh:
+                self.assertEqual(len(fh.read().splitlines()), 2)
+
+
+class ReportSnapshotTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = date.today()
+        cls.manager = User.objects.create_user(username='manager', password='pw', role='brooder_manager')
+        cls.farmer = Farmer.objects.create(
+            name='Sarah Achieng', dob=date(1999, 3, 3), gender='F', nin='CF000000000077',
+            recommender='Ruth', recommender_nin='CF000000000009', contact='0700000005',
+        )
+        stock = FeedStock.objects.create(feed_type='starter', quantity_bags=20, purchase_price=Decimal('80000'),
+                                         sale_price=Decimal('100000'), arrival_date=cls.today)
+        for days_ago, chicks in ((10, 100), (3, 50), (0, 20)):
+            day = cls.today - timedelta(days=days_ago)
+            ChickRequest.objects.create(farmer=cls.farmer, chick_type='broiler_local', quantity=chicks,
+                                        status='approved', is_picked=True, picked_on=day)
+            payment = Payment.objects.create(farmer=cls.farmer, amount=Decimal(chicks * 1650),
+                                             payment_for='chicks')
+            payment.payment_date = day  # auto_now_add on create; moving it goes through the signals
+            payment.save()
+            issued = FeedDistribution.objects.create(farmer=cls.farmer, feed_stock=stock,
+                                                     distribution_type='initial', quantity_bags=2,
+                                                     due_date=day + timedelta(days=60))
+            FeedDistribution.objects.filter(id=issued.id).update(distribution_date=day)
+
+    def periods(self):
+        return {'all': (None, None), 'range': (self.today - timedelta(days=5), self.today - timedelta(days=1))}
+
+    def test_frozen_days_plus_today_match_the_live_figures(self):
+        live = report_totals(self.periods(), self.today)
+        self.assertEqual(live['all']['chicks_picked'], 170)
+        self.assertEqual(live['range']['chick_payments'], Decimal('82500'))
+
+        call_command('build_report_snapshots', stdout=io.StringIO())
+        self.assertEqual(ReportSnapshot.objects.count(), 10)  # 10 days ago .. yesterday
+        self.assertEqual(freeze_pending(self.today), 0)
+        with self.assertNumQueries(4):  # the snapshots + today's pickups, payments and feed issued
+            frozen = report_totals(self.periods(), self.today)
+        self.assertEqual(frozen, live)
+        self.assertEqual(frozen['all']['initial_feed_value'], Decimal('600000'))
+        self.assertEqual(frozen['range']['pickups'], 1)
+
+    def test_the_days_payments_queue_one_freeze_job(self):
+        Payment.objects.create(farmer=self.farmer, amount=Decimal('1000'), payment_for='feeds')
+        queued = Job.objects.get()
+        self.assertEqual((queued.name, queued.idempotency_key),
+                         ('manager.freeze_report_snapshots', f'report-snapshots:{self.today}'))
+
+        self.assertEqual(run_pending(), (1, 0))
+        self.assertEqual(ReportSnapshot.objects.count(), 10)
+        self.assertEqual(DebtorSnapshot.objects.get().farmer_id, self.farmer.id)
+        self.assertEqual(report_totals(self.periods(), self.today)['all']['chicks_picked'], 170)
+
+    def test_changes_to_payments_of_frozen_days_adjust_them(self):
+        freeze_pending(self.today)
+        moved = Payment.objects.create(farmer=self.farmer, amount=Decimal('5000'), payment_for='feeds')
+        moved.payment_date = self.today - timedelta(days=3)
+        moved.save()
+        early = Payment.objects.create(farmer=self.farmer, amount=Decimal('700'), payment_for='feeds')
+        early.payment_date = self.today - timedelta(days=30)  # before the first frozen day
+        early.save()
+        Payment.objects.get(payment_for='chicks', payment_date=self.today - timedelta(days=10)).delete()
+
+        totals = report_totals(self.periods(), self.today)
+        self.assertEqual(totals['range']['feed_payments'], Decimal('5000'))
+        self.assertEqual(totals['all']['feed_payments'], Decimal('5700'))
+        self.assertEqual(totals['all']['chick_payments'], Decimal('115500'))
+        freeze_pending(self.today, rebuild=True)
+        self.assertEqual(report_totals(self.periods(), self.today), totals)
+
+    def test_debtor_ranking_merges_the_snapshot_with_todays_changes(self):
+        stock = FeedStock.objects.get()
+        others = [Farmer.objects.create(name=f'Debtor {n}', dob=date(1990, 1, 1), gender='M',
+                                        nin=f'CM00000000010{n}', recommender='Ruth',
+                                        recommender_nin='CF000000000009', contact='0700000006')
+                  for n in range(3)]
+        for farmer, bags in zip(others, (1, 3, 5)):
+            FeedDistribution.objects.create(farmer=farmer, feed_stock=stock, distribution_type='initial',
+                                            quantity_bags=bags, due_date=self.today)
+        call_command('build_report_snapshots', stdout=io.StringIO())
+
+        # after the freeze: the top debtor pays most of it off, a new one appears
+        Payment.objects.create(farmer=self.farmer, amount=Decimal('550000'), payment_for='feeds',
+                               related_feed_distribution=self.farmer.feeddistribution_set.first())
+        newcomer = Farmer.objects.create(name='Newcomer', dob=date(1990, 1, 1), gender='F',
+                                         nin='CF000000000200', recommender='Ruth',
+                                         recommender_nin='CF000000000009', contact='0700000007')
+        FeedDistribution.objects.create(farmer=newcomer, feed_stock=stock, distribution_type='initial',
+                                        quantity_bags=4, due_date=self.today)
+
+        with self.assertNumQueries(2):
+            ranking = snapshot_top_debtors(3)
+        self.assertEqual(ranking, top_debtors(3))
+        self.assertEqual([d['farmer__name'] for d in ranking], ['Debtor 2', 'Newcomer', 'Debtor 1'])
+
+    def test_report_accepts_a_date_range(self):
+        freeze_pending(self.today)
+        self.client.force_login(self.manager)
+        start = (self.today - timedelta(days=5)).isoformat()
+        response = self.client.get(reverse('manager_reports'), {'from': start, 'to': self.today.isoformat()})
+        self.assertEqual(response.context['period']['chicks_picked'], 70)
+        self.assertEqual(response.context['chicks_sold'], 170)
+
+        response = self.client.get(reverse('manager_reports'), {'from': 'yesterday'})
+        self.assertRedirects(response, reverse('manager_reports'))
+        response = self.client.get(reverse('manager_reports'), {'from': self.today.isoformat(), 'to': start})
+        self.assertRedirects(response, reverse('manager_reports'))
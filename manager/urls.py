@@ -6,7 +6,7 @@ from manager.views import (
     add_feed_stock, add_manufacturer, add_supplier, feed_stock_history,
     delete_manufacturer, delete_supplier, review_feed_requests, approve_reject_feed_request,
     create_announcement, delete_announcement, create_training, delete_training, create_tip, delete_tip,
-    reject_request,
+    reject_request, feeds_tab, feed_requests_tab, export_data,
     )
 
 
@@ -25,15 +25,18 @@ urlpatterns = [
     path('feeds/add-supplier/', add_supplier, name='add_supplier'),
     #path('feeds/distribute/', distribute_feeds, name='distribute_feeds'),
     path('feeds/history/', feed_stock_history, name='feed_stock_history'),
+    path('feeds/tab/<str:tab>/', feeds_tab, name='manager_feeds_tab'),
     path('feeds/delete-manufacturer/<int:pk>/', delete_manufacturer, name='delete_manufacturer'),
     path('feeds/delete-supplier/<int:pk>/', delete_supplier, name='delete_supplier'),
     path('feeds/review/', review_feed_requests, name='review_feed_requests'),
     path('feeds/requests/', review_feed_requests, name='review_feed_request'),
+    path('feeds/requests/tab/<str:tab>/', feed_requests_tab, name='feed_requests_tab'),
     path('feeds/requests/<int:request_id>/action/', approve_reject_feed_request, name='approve_reject_feed_request'),
 
 
 
     path('sales/', sales_report, name='manager_reports'),
+    path('sales/export/<str:dataset>/', export_data, name='manager_export'),
     path('farmers/<str:nin>/requests/', farmer_request_history, name='manager_farmer_request_history'),   
     path('register/', register_user, name='manager_user'),
 
@@ -2,7 +2,6 @@
 import json
 from decimal import Decimal
 from datetime import date, timedelta
-from collections import defaultdict
 
 # Django core
 from django.shortcuts import render, redirect, get_object_or_404
@@ -15,18 +14,33 @@ from django.utils.timezone import now
 from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.db import transaction
-from django.db.models import (
-    Sum, Q, F, Case, When, Value, DecimalField
-)
+from django.db.models import Sum, Max, Q, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.urls import reverse
+from django.http import Http404, StreamingHttpResponse
+from django.utils.dateparse import parse_date
 
 # Local apps
+from home.aio import arender
 from home.models import User, Training, Announcement, FarmerTip, QuoteOfTheWeek
-from manager.models import ChickStock, ChickAllocation
+from home.pagination import keyset_page, paginate
+from home.profiling import query_budget
+from home.replicas import replica_alias, replica_reads
+from manager.models import ChickStock, ChickAllocation, age_in_days
+from manager.exports import EXPORTS, FORMATS, export_rows, export_chunks, export_filename, export_types
+from manager.metrics import adashboard_metrics, chick_stock_age_buckets
+from manager.snapshots import report_totals, top_debtors
+from manager.summaries import chick_stock_totals
+from sales.search import search_farmers
 from sales.models import (
     ChickRequest, Farmer, FeedStock, FeedDistribution,
     Manufacturer, Supplier, Payment, FeedRequest
 )
+from sales.receivables import (
+    receivable_totals,
+    overdue_count as receivables_overdue_count,
+    due_soon_count as receivables_due_soon_count,
+)
 
 import html
 import re
@@ -88,7 +102,9 @@ def _simple_to_html(text: str) -> str:
 #============================
 
 @login_required
-def dashboard_view(request):
+@replica_reads
+@query_budget(14)
+async def dashboard_view(request):
     """
     Manager dashboard with richer, actionable context.
     - Totals + per-type splits
@@ -98,235 +114,20 @@ def dashboard_view(request):
     - Upcoming trainings
     - Operational alerts (low stock, stale pending, unpicked approvals, expiring feeds, dues soon)
     - Last 5 approvals mini-table
-    """
-    today = date.today()
-    week_start = today - timedelta(days=today.weekday())  # Monday
-    month_start = today.replace(day=1)
-
-    # ---------------------- Picked (sold) ----------------------
-    picked_qs = ChickRequest.objects.filter(is_picked=True)
-    total_chicks_sold = picked_qs.aggregate(total=Sum('quantity'))['total'] or 0
-
-    # Sold by chick type (overall)
-    sold_by_type_qs = picked_qs.values('chick_type').annotate(total=Sum('quantity'))
-    chicks_sold_by_type = {
-        'broiler_local': 0,
-        'broiler_exotic': 0,
-        'layer_local': 0,
-        'layer_exotic': 0,
-    }
-    for row in sold_by_type_qs:
-        chicks_sold_by_type[row['chick_type']] = row['total'] or 0
-
-    # Weekly (picked this week)
-    weekly_picked = picked_qs.filter(picked_on__gte=week_start)
-    chicks_this_week = weekly_picked.aggregate(total=Sum('quantity'))['total'] or 0
-
-    week_by_type_qs = weekly_picked.values('chick_type').annotate(total=Sum('quantity'))
-    chicks_week_by_type = {
-        'broiler_local': 0,
-        'broiler_exotic': 0,
-        'layer_local': 0,
-        'layer_exotic': 0,
-    }
-    for row in week_by_type_qs:
-        chicks_week_by_type[row['chick_type']] = row['total'] or 0
-
-    # ---------------------- Requests / farmers ----------------------
-    pending_requests = ChickRequest.objects.filter(status='pending').count()
-    total_farmers = Farmer.objects.count()
-    approved_this_month = ChickRequest.objects.filter(status='approved', approval_date__gte=month_start).count()
-
-    # ---------------------- Chick stock (by type) ----------------------
-    stock_by_type_qs = ChickStock.objects.values('chick_type').annotate(total=Sum('quantity'))
-    stock_dict = {
-        'broiler_local': 0,
-        'broiler_exotic': 0,
-        'layer_local': 0,
-        'layer_exotic': 0,
-    }
-    for row in stock_by_type_qs:
-        stock_dict[row['chick_type']] = row['total'] or 0
-    total_remaining_stock = sum(stock_dict.values())
-
-    # ---------------------- Feed stock (by feed_type) ----------------------
-    feed_stock_by_type_qs = FeedStock.objects.values('feed_type').annotate(total=Sum('quantity_bags'))
-    feed_stock_by_type = {'starter': 0, 'grower': 0, 'finisher': 0}
-    for row in feed_stock_by_type_qs:
-        feed_stock_by_type[row['feed_type']] = row['total'] or 0
-    total_feed_stock = sum(feed_stock_by_type.values())
-
-    # ---------------------- Revenue via Payment (Decimal-safe) ----------------------
-    money = DecimalField(max_digits=12, decimal_places=2)
-    ZERO = Decimal('0')
-    TWO = Decimal('2')
-
-    pay_all = Payment.objects.all()
-    agg_all = pay_all.aggregate(
-        chicks=Sum(Case(When(payment_for='chicks', then=F('amount')), default=Value(ZERO), output_field=money)),
-        feeds =Sum(Case(When(payment_for='feeds',  then=F('amount')), default=Value(ZERO), output_field=money)),
-        both  =Sum(Case(When(payment_for='both',   then=F('amount')), default=Value(ZERO), output_field=money)),
-    )
-    both_all = agg_all['both'] or ZERO
-    total_revenue_breakdown = {
-        'chicks': (agg_all['chicks'] or ZERO) + (both_all / TWO),
-        'feeds':  (agg_all['feeds']  or ZERO) + (both_all / TWO),
-    }
-    total_revenue = total_revenue_breakdown['chicks'] + total_revenue_breakdown['feeds']
-
-    # Weekly revenue
-    pay_week = pay_all.filter(payment_date__gte=week_start)
-    agg_week = pay_week.aggregate(
-        chicks=Sum(Case(When(payment_for='chicks', then=F('amount')), default=Value(ZERO), output_field=money)),
-        feeds =Sum(Case(When(payment_for='feeds',  then=F('amount')), default=Value(ZERO), output_field=money)),
-        both  =Sum(Case(When(payment_for='both',   then=F('amount')), default=Value(ZERO), output_field=money)),
-    )
-    both_week = agg_week['both'] or ZERO
-    revenue_week_breakdown = {
-        'chicks': (agg_week['chicks'] or ZERO) + (both_week / TWO),
-        'feeds':  (agg_week['feeds']  or ZERO) + (both_week / TWO),
-    }
-    revenue_this_week = revenue_week_breakdown['chicks'] + revenue_week_breakdown['feeds']
-
-    # ---------------------- Upcoming trainings ----------------------
-    upcoming_trainings = Training.objects.filter(date__gte=today).order_by('date')[:4]
-
-    # ---------------------- Operational Alerts (actionable) ----------------------
-    LOW_CHICK_THRESHOLD = 50   # tweak as needed
-
-    # Low chick stock by type
-    low_chick_stock = []
-    for ctype, qty in (stock_dict or {}).items():
-        if (qty or 0) < LOW_CHICK_THRESHOLD:
-            low_chick_stock.append({"type": ctype, "qty": qty or 0})
-    low_chick_stock.sort(key=lambda x: x["qty"])  # smallest first
-
-    # Unpicked approvals older than 3 days
-    unpicked_qs = (
-        ChickRequest.objects
-        .filter(status='approved', is_picked=False, approval_date__lt=today - timedelta(days=3))
-        .select_related('farmer')
-        .order_by('-approval_date')[:5]
-    )
-    unpicked_approvals = [
-        {
-            "id": r.id,
-            "farmer": r.farmer.name,
-            "days": (today - (r.approval_date or month_start)).days
-        }
-        for r in unpicked_qs
-    ]
-
-    # Pending requests older than 48 hours
-    pending_qs = (
-        ChickRequest.objects
-        .filter(status='pending', submitted_on__lt=today - timedelta(days=2))
-        .select_related('farmer')
-        .order_by('-submitted_on')[:5]
-    )
-    pending_stale = [
-        {
-            "id": r.id,
-            "farmer": r.farmer.name,
-            # submitted_on is a DateField in your model, so we approximate hours
-            "days": (today - r.submitted_on).days * 24,
-        }
-        for r in pending_qs
-    ]
-
-    # Feeds expiring within 14 days (detailed list)
-    feed_expiring_qs = (
-        FeedStock.objects
-        .filter(expiry_date__isnull=False, expiry_date__lte=today + timedelta(days=14))
-        .order_by('expiry_date')[:5]
-    )
-    feed_expiring = [
-        {"feed_type": f.feed_type, "bags": f.quantity_bags or 0, "expiry": f.expiry_date}
-        for f in feed_expiring_qs
-    ]
-
-    # Feed distributions due within 7 days (top 5)
-    feed_due_qs = (
-        FeedDistribution.objects
-        .filter(due_date__isnull=False, due_date__lte=today + timedelta(days=7))
-        .select_related('farmer')
-        .order_by('due_date')[:5]
-    )
-    feed_due_soon_list = [
-        {"farmer": fd.farmer.name, "bags": getattr(fd, 'quantity_bags', 0) or 0, "due": fd.due_date}
-        for fd in feed_due_qs
-    ]
-
-    alerts = {
-        "counts": {
-            "unpicked_over_3d": len(unpicked_approvals),
-            "pending_over_48h": len(pending_stale),
-            "low_chick_types": len(low_chick_stock),
-        },
-        "low_chick_stock": low_chick_stock,
-        "unpicked_approvals": unpicked_approvals,
-        "pending_stale": pending_stale,
-        "feed_expiring": feed_expiring,
-        "feed_due_soon": feed_due_soon_list,
-    }
-
-    # ---------------------- Last 5 approvals (for mini-table) ----------------------
-    last_approvals = (
-        ChickRequest.objects
-        .filter(status='approved')
-        .select_related('farmer')
-        .order_by('-approval_date', '-id')[:5]
-    )
-
-    context = {
-        # Totals
-        'total_chicks_sold': total_chicks_sold,
-        'total_revenue': total_revenue,
-
-        # Per-type totals
-        'chicks_sold_by_type': chicks_sold_by_type,
-
-        # Weekly
-        'chicks_this_week': chicks_this_week,
-        'revenue_this_week': revenue_this_week,
-        'chicks_week_by_type': chicks_week_by_type,
 
-        # Revenue splits
-        'total_revenue_breakdown': total_revenue_breakdown,
-        'revenue_week_breakdown': revenue_week_breakdown,
-
-        # Requests / farmers
-        'pending_requests': pending_requests,
-        'total_farmers': total_farmers,
-        'approved_this_month': approved_this_month,
-
-        # Chick stock
-        'stock_dict': stock_dict,
-        'total_remaining_stock': total_remaining_stock,
-
-        # Feed stock
-        'total_feed_stock': total_feed_stock,
-        'feed_stock_by_type': feed_stock_by_type,
-
-        # Events
-        'upcoming_trainings': upcoming_trainings,
-
-        # Alerts payload for the Operational Alerts card
-        'alerts': alerts,
-
-        # Mini-table
-        'last_approvals': last_approvals,
-
-        # Username display
-        'username': request.user.username,
-    }
-    return render(request, 'manager/dashboard.html', context)
+    All cards come from `manager.metrics.adashboard_metrics` (one grouped aggregate per table,
+    all started at once).
+    """
+    context = await adashboard_metrics()
+    context['username'] = (await request.auser()).username
+    return await arender(request, 'manager/dashboard.html', context)
 
 #======================================
 # 2) CHICK STOCK & CHICK REQUESTS
 #======================================
 
 @login_required
+@query_budget(5)
 def chick_stock_view(request):
     if request.method == 'POST':
         chick_type = request.POST.get('chick_type')
@@ -347,53 +148,87 @@ def chick_stock_view(request):
             messages.success(request, f"{quantity} {chick_type} added to the stock successfully!")
         return redirect('manager_chick_stock')
     
-     # Pagination for full stock entries (Tab 2)
-    all_stock = ChickStock.objects.all().order_by('-recorded_on')
-    paginator = Paginator(all_stock, 25)
-
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-
-    # Chick type display labels
-    TYPE_LABELS = {
-        'broiler_local': 'Broiler - Local',
-        'broiler_exotic': 'Broiler - Exotic',
-        'layer_local': 'Layer - Local',
-        'layer_exotic': 'Layer - Exotic',
-    }
+    # Keyset pagination for full stock entries (Tab 2); deep pages cost the same as page 1
+    page_obj = paginate(request, ChickStock.objects.all(), ('-recorded_on', '-id'), count=True)
 
-    # Summary by type + aging status
-    summary = []
-    stock_by_type = defaultdict(lambda: {'total': 0, 'available': 0, 'aging': 0, 'expiring': 0})
-
-    for batch in all_stock:
-        s = stock_by_type[batch.chick_type]
-        s['total'] += batch.quantity
-        if batch.age_days <= 14:
-            s['available'] += batch.quantity
-        elif batch.age_days <= 21:
-            s['aging'] += batch.quantity
-        else:
-            s['expiring'] += batch.quantity
-
-    for chick_type, stats in stock_by_type.items():
-        summary.append({
-            'label': TYPE_LABELS.get(chick_type, chick_type.replace('_', ' ').title()),
-            'total': stats['total'],
-            'available': stats['available'],
-            'aging': stats['aging'],
-            'expiring': stats['expiring'],
-        })
+    # Summary by type + aging status, aggregated in SQL over non-empty batches
+    summary = chick_stock_age_buckets()
 
     context = {
-        'stock': all_stock,
         'page_obj': page_obj,
         'summary': summary,
     }
 
     return render(request, 'manager/stock.html', context)
 
+def _grouped_sum(qs, field):
+    """Correlated subquery returning SUM(field) of `qs` (NULL when no rows)."""
+    return Subquery(
+        qs.order_by().values('farmer').annotate(total=Sum(field)).values('total')[:1]
+    )
+
+
+def _with_payment_status(qs):
+    """
+    Annotate chick requests with the pickup-day chick payments, the initial feed
+    allocation (bags + due date) and feed payments since pickup, all keyed on
+    (farmer, picked_on) so the history tab is a single query per page.
+    """
+    same_farmer = dict(farmer=OuterRef('farmer'))
+    initial_feeds = FeedDistribution.objects.filter(
+        distribution_type='initial', distribution_date=OuterRef('picked_on'), **same_farmer
+    )
+    return qs.annotate(
+        chicks_paid_sum=_grouped_sum(
+            Payment.objects.filter(payment_for='chicks', payment_date=OuterRef('picked_on'), **same_farmer),
+            'amount'),
+        feeds_bags_sum=_grouped_sum(initial_feeds, 'quantity_bags'),
+        feeds_due_max=Subquery(
+            initial_feeds.order_by().values('farmer').annotate(due=Max('due_date')).values('due')[:1]
+        ),
+        feeds_paid_sum=_grouped_sum(
+            Payment.objects.filter(payment_for='feeds', payment_date__gte=OuterRef('picked_on'), **same_farmer),
+            'amount'),
+    )
+
+
+def _filter_history(qs, params):
+    """Server-side filters for the history tab (status, pickup, type, submitted range)."""
+    status = params.get('status')
+    if status in ('approved', 'rejected'):
+        qs = qs.filter(status=status)
+    picked = params.get('picked')
+    if picked in ('yes', 'no'):
+        qs = qs.filter(is_picked=(picked == 'yes'))
+    chick_type = params.get('chick_type')
+    if chick_type:
+        qs = qs.filter(chick_type=chick_type)
+    start, end = _history_date(params.get('from')), _history_date(params.get('to'))
+    if start:
+        qs = qs.filter(submitted_on__gte=start)
+    if end:
+        qs = qs.filter(submitted_on__lte=end)
+    return qs
+
+
+def _history_date(value):
+    """YYYY-MM-DD from the history filter form; None when blank or not a date (the filter is skipped)."""
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+def _request_search_q(q):
+    """Request id (exact), chick type, or farmer via the search index."""
+    condition = Q(farmer__in=search_farmers(q).values('id')) | Q(chick_type__icontains=q)
+    if q.isdigit():
+        condition |= Q(id=int(q))
+    return condition
+
+
 @login_required
+@query_budget(8)  # 7, plus the farmer search lookup when filtering
 def review_chick_requests(request):
     tab = request.GET.get('tab', 'pending')
     q = (request.GET.get('q') or '').strip()
@@ -406,91 +241,56 @@ def review_chick_requests(request):
                   .select_related('farmer', 'approved_by').order_by('-submitted_on', '-id'))
 
     if q:
+        matched = _request_search_q(q)
         if tab == 'pending':
-            pending_qs = pending_qs.filter(
-                Q(farmer__name__icontains=q) |
-                Q(farmer__nin__icontains=q) |
-                Q(id__icontains=q) |
-                Q(chick_type__icontains=q)
-            )
+            pending_qs = pending_qs.filter(matched)
         elif tab == 'approved':
-            approved_qs = approved_qs.filter(
-                Q(farmer__name__icontains=q) |
-                Q(farmer__nin__icontains=q) |
-                Q(id__icontains=q) |
-                Q(chick_type__icontains=q) |
-                Q(approval_date__icontains=q)
-            )
+            approved_qs = approved_qs.filter(matched | Q(approval_date__icontains=q))
         elif tab == 'history':
-            history_qs = history_qs.filter(
-                Q(farmer__name__icontains=q) |
-                Q(farmer__nin__icontains=q) |
-                Q(id__icontains=q) |
-                Q(chick_type__icontains=q) |
-                Q(submitted_on__icontains=q)
-            )
+            history_qs = history_qs.filter(matched | Q(submitted_on__icontains=q))
+
+    # keep the tab/filters on pagination links
+    history_params = request.GET.copy()
+    history_params['tab'] = 'history'
+
+    # history: filter + keyset-paginate; the payment annotations only run for this page's rows
+    history_qs = _with_payment_status(_filter_history(history_qs, request.GET))
+    history_page = paginate(request, history_qs, ('-submitted_on', '-id'),
+                            count=True, params=history_params)
 
-    # annotate history for display
     today = timezone.localdate()  # use local date to avoid TZ off-by-one
-    history_requests = list(history_qs)
+    history_requests = list(history_page)
     for r in history_requests:
         r.expected_chicks_amount = r.quantity * 1650
         r.chicks_paid_today = 0
-        if r.is_picked and r.picked_on:
-            r.chicks_paid_today = (Payment.objects
-                                   .filter(farmer=r.farmer, payment_for='chicks', payment_date=r.picked_on)
-                                   .aggregate(s=Sum('amount'))['s'] or 0)
-        r.chicks_balance = r.expected_chicks_amount - r.chicks_paid_today
         r.feeds_allocated_bags = 0
         r.feeds_due_date = None
         r.feeds_status = None
         if r.is_picked and r.picked_on:
-            dists = FeedDistribution.objects.filter(
-                farmer=r.farmer, distribution_type='initial', distribution_date=r.picked_on
-            )
-            r.feeds_allocated_bags = dists.aggregate(s=Sum('quantity_bags'))['s'] or 0
-            r.feeds_due_date = dists.order_by('-due_date').values_list('due_date', flat=True).first()
-            feeds_paid_amount = (Payment.objects
-                                 .filter(farmer=r.farmer, payment_for='feeds', payment_date__gte=r.picked_on)
-                                 .aggregate(s=Sum('amount'))['s'] or 0)
-            if feeds_paid_amount and r.feeds_allocated_bags:
+            r.chicks_paid_today = r.chicks_paid_sum or 0
+            r.feeds_allocated_bags = r.feeds_bags_sum or 0
+            r.feeds_due_date = r.feeds_due_max
+            if r.feeds_paid_sum and r.feeds_allocated_bags:
                 r.feeds_status = 'paid'
             elif r.feeds_due_date:
                 r.feeds_status = 'overdue' if r.feeds_due_date < today else 'due'
-            else:
-                r.feeds_status = None
-
-    # ---------- Build batch JSON (prefer model.age_days; fallback to recorded_on) ----------
-    def to_date(d):
-        if d is None:
-            return None
-        try:
-            return d.date() if hasattr(d, 'hour') else d
-        except Exception:
-            return None
+        r.chicks_balance = r.expected_chicks_amount - r.chicks_paid_today
 
-    # Pull age_days directly from the model to avoid any drift
+    # ---------- Build batch JSON (current age computed in SQL from hatch_date) ----------
     batches = (ChickStock.objects
                .filter(quantity__gt=0)
-               .values('id', 'chick_type', 'quantity', 'recorded_on', 'age_days')
+               .annotate(age=age_in_days(today))
+               .values('id', 'chick_type', 'quantity', 'recorded_on', 'age')
                .order_by('chick_type', 'recorded_on', 'id'))
 
     batch_map = {}
     for b in batches:
-        rec_date = to_date(b.get('recorded_on'))
-        # Use stored age_days if present; otherwise compute from recorded_on
-        if b.get('age_days') is not None:
-            age_days = int(b['age_days'])
-        else:
-            today_local = timezone.localdate()
-            age_days = (today_local - rec_date).days if rec_date else None
-
         batch_map.setdefault(b['chick_type'], []).append({
             'id': b['id'],
             'chick_type': b['chick_type'],
             'quantity': b['quantity'],
-            'recorded_on': rec_date.isoformat() if rec_date else None,
-            'age_days': age_days,
+            'recorded_on': b['recorded_on'].isoformat(),
+            'age_days': b['age'].days,
         })
 
     batch_json = mark_safe(json.dumps(batch_map, cls=DjangoJSONEncoder))
@@ -499,6 +299,9 @@ def review_chick_requests(request):
         'pending_requests': pending_qs,
         'approved_requests': approved_qs,
         'history_requests': history_requests,
+        'history_page': history_page,
+        'history_filters': {k: request.GET.get(k, '') for k in ('status', 'picked', 'chick_type', 'from', 'to')},
+        'chick_type_choices': ChickRequest.CHICK_TYPE_CHOICES,
         'active_tab': tab,
         'q': q,
         'batch_json': batch_json,
@@ -584,7 +387,6 @@ def approve_reject_request(request, request_id):
     except ValueError:
         max_age_days = None
 
-    date_field = 'recorded_on'
     today = timezone.localdate()
 
     with transaction.atomic():
@@ -620,11 +422,9 @@ def approve_reject_request(request, request_id):
                 transaction.set_rollback(True)
                 return redirect('/manager/requests/?tab=pending')
 
-            # Age check (supports date or datetime on recorded_on)
-            stock_date = getattr(stock, date_field, None)
-            if max_age_days is not None and stock_date:
-                stock_d = stock_date if hasattr(stock_date, 'year') and not hasattr(stock_date, 'hour') else stock_date.date()
-                age_days = (today - stock_d).days
+            # Age check against the real age (today - hatch_date), not the age at entry
+            if max_age_days is not None:
+                age_days = (today - stock.hatch_date).days
                 if age_days > max_age_days:
                     messages.error(
                         request,
@@ -701,31 +501,65 @@ def reject_request(request, pk=None):
 # 3) FEEDS (STOCK, DISTRIBUTION & FEED SOURCES)
 #=================================================
 
-@login_required
-def feeds_view(request):
-    manufacturers = Manufacturer.objects.all()
-    suppliers = Supplier.objects.all()
-    feed_stocks = FeedStock.objects.all().order_by('-arrival_date')
-    distributions = FeedDistribution.objects.select_related('farmer', 'feed_stock', 'recorded_by')
+FEEDS_PAGE_SIZE = 25
 
-    query = request.GET.get('q')
-    distributions = FeedDistribution.objects.select_related('farmer', 'feed_stock', 'recorded_by')
 
+def _feed_tab_page(request, queryset, ordering, url=None):
+    """Keyset page for a lazy tab, plus the fragment URL (`url`, default this one) of the page after it."""
+    page = keyset_page(queryset, ordering, request.GET.get('cursor'), FEEDS_PAGE_SIZE)
+    start = request.GET.get('start', '')
+    start = int(start) if start.isdigit() else 0
+    next_url = None
+    if page.has_next:
+        params = request.GET.copy()
+        params['cursor'] = page.next_cursor
+        params['start'] = start + len(page)
+        next_url = f"{url or request.path}?{params.urlencode()}"
+    return page, start, next_url
+
+
+def _distributions_qs(query):
+    distributions = FeedDistribution.objects.select_related('farmer', 'feed_stock', 'recorded_by')
     if query:
         distributions = distributions.filter(
             Q(farmer__name__icontains=query) |
             Q(feed_stock__feed_type__icontains=query)
         )
-    
+    return distributions
+
+
+@login_required
+@query_budget(4)
+def feeds_view(request):
+    # The distribution and stock history tabs are fetched lazily (feeds_tab),
+    # so this page no longer grows with history.
+    query = request.GET.get('q') or ''
     context = {
-        'feed_stocks': feed_stocks,
-        'manufacturers': manufacturers,
-        'suppliers': suppliers,
-        'distributions': distributions,
+        'manufacturers': Manufacturer.objects.all(),
+        'suppliers': Supplier.objects.all(),
+        'q': query,
     }
-    
     return render(request, 'manager/feeds.html', context)
 
+
+@login_required
+@query_budget(3)
+def feeds_tab(request, tab):
+    """HTML rows for one lazily loaded tab of the feeds page, one keyset page at a time."""
+    if tab == 'distributions':
+        queryset = _distributions_qs(request.GET.get('q'))
+        ordering = ('-distribution_date', '-id')
+        template = 'manager/partials/distribution_rows.html'
+    elif tab == 'stock':
+        queryset = FeedStock.objects.select_related('manufacturer', 'supplier')
+        ordering = ('-arrival_date', '-id')
+        template = 'manager/partials/feed_stock_rows.html'
+    else:
+        raise Http404("Unknown tab")
+
+    page, start, next_url = _feed_tab_page(request, queryset, ordering)
+    return render(request, template, {'rows': page, 'start': start, 'next_url': next_url})
+
 @login_required
 def manage_feed_sources(request):
     if request.method == 'POST':
@@ -842,10 +676,14 @@ def delete_supplier(request, pk):
 
 
 @login_required
+@query_budget(3)
 def feed_stock_history(request):
-    feed_stocks = FeedStock.objects.select_related('manufacturer', 'supplier').order_by('-arrival_date')
+    feed_stocks = FeedStock.objects.select_related('manufacturer', 'supplier')
+    page, start, next_url = _feed_tab_page(request, feed_stocks, ('-arrival_date', '-id'))
     return render(request, 'manager/partials/feed_history.html', {
-        'feed_stocks': feed_stocks,
+        'rows': page,
+        'start': start,
+        'next_url': next_url,
     })
 
 
@@ -854,32 +692,52 @@ def feed_stock_history(request):
 #=======================================================
 # --- FEED REQUESTS (Manager) ---
 
-@login_required
-def review_feed_requests(request):
-    pending = (FeedRequest.objects
-               .filter(status='pending')
-               .select_related('farmer', 'requested_by')
-               .order_by('-submitted_on'))
+FEED_REQUEST_TABS = ('pending', 'approved', 'rejected', 'all')
 
-    approved = (FeedRequest.objects
-                .filter(status='approved')
-                .select_related('farmer', 'approved_by')
-                .order_by('-approved_on'))
 
-    rejected = (FeedRequest.objects
-                .filter(status='rejected')
-                .select_related('farmer', 'approved_by')
-                .order_by('-approved_on'))
+def _feed_requests_tab_qs(tab):
+    """(queryset, keyset ordering) behind one tab of review_feed_requests."""
+    if tab == 'pending':
+        qs = FeedRequest.objects.filter(status='pending').select_related('farmer', 'requested_by')
+        return qs, ('-submitted_on', '-id')
+    if tab in ('approved', 'rejected'):
+        # approved_on is nullable; fall back to submitted_on so the keyset stays total
+        qs = (FeedRequest.objects.filter(status=tab)
+              .select_related('farmer', 'approved_by')
+              .annotate(decided_on=Coalesce('approved_on', 'submitted_on')))
+        return qs, ('-decided_on', '-id')
+    qs = FeedRequest.objects.select_related('farmer', 'requested_by', 'approved_by')
+    return qs, ('-submitted_on', '-id')
 
-    all_requests = (FeedRequest.objects
-                    .select_related('farmer', 'requested_by', 'approved_by')
-                    .order_by('-submitted_on'))
 
+@login_required
+@query_budget(3)
+def review_feed_requests(request):
+    # Only the pending tab is rendered up front; the others are fetched from
+    # feed_requests_tab when first opened, one keyset page at a time.
+    queryset, ordering = _feed_requests_tab_qs('pending')
+    page, start, next_url = _feed_tab_page(request, queryset, ordering,
+                                           url=reverse('feed_requests_tab', args=['pending']))
     return render(request, 'manager/review_feed_requests.html', {
-        'pending_requests': pending,
-        'approved_requests': approved,
-        'rejected_requests': rejected,
-        'all_requests': all_requests,
+        'tab': 'pending',
+        'rows': page,
+        'start': start,
+        'next_url': next_url,
+    })
+
+
+@login_required
+@query_budget(3)
+def feed_requests_tab(request, tab):
+    if tab not in FEED_REQUEST_TABS:
+        raise Http404("Unknown tab")
+    queryset, ordering = _feed_requests_tab_qs(tab)
+    page, start, next_url = _feed_tab_page(request, queryset, ordering)
+    return render(request, 'manager/partials/feed_request_rows.html', {
+        'tab': tab,
+        'rows': page,
+        'start': start,
+        'next_url': next_url,
     })
 
 @login_required
@@ -918,26 +776,27 @@ def approve_reject_feed_request(request, request_id):
 # FARMERS ON THE MANAGER SIDE
 #==============================================
 @login_required
+@query_budget(5)  # the search path pages with a COUNT
 def farmers_view(request):
     q = (request.GET.get("q") or "").strip()
 
-    farmers = Farmer.objects.all()
     if q:
-        farmers = farmers.filter(
-            Q(name__icontains=q) |
-            Q(nin__icontains=q) |
-            Q(recommender__icontains=q) |
-            Q(recommender_nin__icontains=q) |
-            Q(contact__icontains=q)
-        )
-    farmers = farmers.order_by('name')
+        # ranked index search (sales/search.py); hits are bounded, so plain pages are fine
+        page = Paginator(search_farmers(q), 50).get_page(request.GET.get('page'))
+        results_count = page.paginator.count
+    else:
+        page = paginate(request, Farmer.objects.all(), ('name', 'id'), per_page=50, count=True)
+        results_count = page.count_label
 
     return render(request, 'manager/farmers.html', {
-        'farmers': farmers,
+        'farmers': page,
+        'page': page,
         'q': q,                     # so the input keeps its value
-        'results_count': farmers.count(),  # optional: show count
+        'results_count': results_count,  # optional: show count
     })
 
+
+@query_budget(2)
 def farmer_request_history(request, nin):
     farmer = get_object_or_404(Farmer, nin=nin)
     requests = ChickRequest.objects.filter(farmer=farmer).order_by('-submitted_on')
@@ -953,15 +812,54 @@ def farmer_request_history(request, nin):
 
 CHICK_PRICE = Decimal('1650')  # fixed price per chick
 
+
+def _report_date(value):
+    """YYYY-MM-DD from the report's period form (None when blank)."""
+    if not value:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(f"'{value}' is not a date (use YYYY-MM-DD).")
+    return parsed
+
+
+@replica_reads
+@query_budget(12)
 def sales_report(request):
+    """
+    Picked sales, cash in and initial feed receivables. Per-day figures
+    (pickups, payments, initial feed issued) come from the frozen daily
+    snapshots plus today's live figures (manager/snapshots.py), for all time,
+    this week, this month and the ?from=&to= range (default: this month).
+    The debtor ranking is merged the same way.
+    """
     today = date.today()
     week_start = today - timedelta(days=today.weekday())
     month_start = today.replace(day=1)
 
+    try:
+        if 'from' in request.GET or 'to' in request.GET:
+            # a blank "from" means since the beginning
+            start = _report_date(request.GET.get('from'))
+            end = min(_report_date(request.GET.get('to')) or today, today)
+        else:
+            start, end = month_start, today
+        if start and start > end:
+            raise ValueError("The start of the period is after its end.")
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect('manager_reports')
+
+    totals = report_totals({
+        'all': (None, None),
+        'week': (week_start, None),
+        'month': (month_start, None),
+        'period': (start, end),
+    }, today)
+
     # ----------------------------
     # 1) Chicks picked (expected revenue)
     # ----------------------------
-    picked = ChickRequest.objects.filter(is_picked=True)
 
     # Chicks expected (approved but not yet picked)
     chicks_expected = (
@@ -970,107 +868,42 @@ def sales_report(request):
         .aggregate(n=Sum('quantity'))['n'] or 0
     )
 
-    # Chicks currently available in stock (all batches summed)
-    chicks_in_stock = ChickStock.objects.aggregate(n=Sum('quantity'))['n'] or 0
-
+    # Chicks currently available in stock (summary table)
+    chicks_in_stock = sum(chick_stock_totals().values())
 
-    chicks_sold = picked.aggregate(n=Sum('quantity'))['n'] or 0
+    chicks_sold = totals['all']['chicks_picked']
     chick_expected_total = CHICK_PRICE * Decimal(chicks_sold)
 
-    chicks_this_week = picked.filter(picked_on__gte=week_start).aggregate(n=Sum('quantity'))['n'] or 0
-    chicks_this_month = picked.filter(picked_on__gte=month_start).aggregate(n=Sum('quantity'))['n'] or 0
+    chicks_this_week = totals['week']['chicks_picked']
+    chicks_this_month = totals['month']['chicks_picked']
 
     # ----------------------------
     # 2) Payments (actual cash in)
     # ----------------------------
-    total_chick_payments = Payment.objects.filter(payment_for='chicks').aggregate(s=Sum('amount'))['s'] or Decimal('0')
-    total_feed_payments  = Payment.objects.filter(payment_for='feeds').aggregate(s=Sum('amount'))['s'] or Decimal('0')
+    total_chick_payments = totals['all']['chick_payments']
+    total_feed_payments  = totals['all']['feed_payments']
     total_payments = total_chick_payments + total_feed_payments
 
     # ----------------------------
-    # 3) Initial 2-bag feeds receivables
+    # 3) Initial 2-bag feeds receivables (ledger; see sales/receivables.py)
     #    (value at issuance batch price vs what’s paid against that distribution)
     # ----------------------------
-    # Pull all initial allocations with their batch and farmer
-    initial_dists = list(
-        FeedDistribution.objects
-        .filter(distribution_type='initial')
-        .select_related('feed_stock', 'farmer')
-        .order_by('distribution_date', 'id')
-    )
+    initial_totals = receivable_totals()
+    total_initial_value = initial_totals['value']
+    total_initial_paid  = initial_totals['paid']
+    total_initial_balance = initial_totals['balance']
 
-    # Preload payments linked to those distributions (feeds only)
-    dist_ids = [fd.id for fd in initial_dists]
-    payments_by_dist = {}
-    if dist_ids:
-        rows = (Payment.objects
-                .filter(related_feed_distribution_id__in=dist_ids, payment_for='feeds')
-                .values('related_feed_distribution')
-                .annotate(total=Sum('amount')))
-        payments_by_dist = {row['related_feed_distribution']: row['total'] or Decimal('0') for row in rows}
-
-    total_initial_value = Decimal('0')
-    total_initial_paid  = Decimal('0')
-    total_initial_balance = Decimal('0')
-
-    overdue_count = 0
-    due_soon_count = 0
-
-    # Build farmer-level balances to get top debtors
-    farmer_balances = {}  # farmer_id -> {'farmer__name': ..., 'total_value': D, 'total_paid': D}
-    for fd in initial_dists:
-        # Skip if feed_stock missing (shouldn’t, but model allows null)
-        if not fd.feed_stock:
-            unit = Decimal('0')
-        else:
-            unit = fd.feed_stock.sale_price or Decimal('0')
-
-        value = unit * Decimal(fd.quantity_bags)
-        paid = payments_by_dist.get(fd.id, Decimal('0'))
-        balance = value - paid
-
-        total_initial_value += value
-        total_initial_paid  += paid
-        total_initial_balance += balance
-
-        # Due/overdue counts (only if something is outstanding)
-        if balance > 0 and fd.due_date:
-            if fd.due_date < today:
-                overdue_count += 1
-            elif today <= fd.due_date <= (today + timedelta(days=7)):
-                due_soon_count += 1
-
-        # Aggregate per farmer
-        fid = fd.farmer.id
-        if fid not in farmer_balances:
-            farmer_balances[fid] = {
-                'farmer__name': fd.farmer.name,
-                'total_value': Decimal('0'),
-                'total_paid':  Decimal('0'),
-            }
-        farmer_balances[fid]['total_value'] += value
-        farmer_balances[fid]['total_paid']  += paid
-
-    # Turn into list with balances and sort
-    debtors = []
-    for _, rec in farmer_balances.items():
-        balance = rec['total_value'] - rec['total_paid']
-        if balance > 0:
-            debtors.append({
-                'farmer__name': rec['farmer__name'],
-                'total_value': rec['total_value'],
-                'total_paid':  rec['total_paid'],
-                'balance':     balance,
-            })
-    debtors.sort(key=lambda d: d['balance'], reverse=True)
-    debtors = debtors[:10]
+    overdue_count = receivables_overdue_count(today)
+    due_soon_count = receivables_due_soon_count(today)
+
+    debtors = top_debtors(10)  # frozen ranking + farmers changed since (manager/snapshots.py)
 
     # ----------------------------
-    # 4) Recent payments (last 20)
+    # 4) Recent payments (20 per page, keyset-paginated)
     # ----------------------------
-    recent_payments = (Payment.objects
-                       .select_related('farmer', 'related_feed_distribution')
-                       .order_by('-payment_date', '-id')[:20])
+    recent_payments = paginate(request,
+                               Payment.objects.select_related('farmer', 'related_feed_distribution'),
+                               ('-payment_date', '-id'), per_page=20, param='payments')
 
     context = {
         # summary cards
@@ -1084,6 +917,11 @@ def sales_report(request):
         'chicks_expected': chicks_expected,
         'chicks_in_stock': chicks_in_stock,
 
+        # selected period
+        'period': totals['period'],
+        'period_start': start,
+        'period_end': end,
+
         # initial feeds receivables
         'total_initial_value': total_initial_value,
         'total_initial_paid': total_initial_paid,
@@ -1094,10 +932,41 @@ def sales_report(request):
         # tables
         'debtors': debtors,
         'recent_payments': recent_payments,
+
+        # export form
+        'export_types': {name: export_types(name) for name in EXPORTS},
     }
     return render(request, 'manager/sales_report.html', context)
 
 
+@login_required
+def export_data(request, dataset):
+    """
+    Stream a CSV/XLSX dump of payments, distributions or chick requests.
+    GET: from, to (YYYY-MM-DD, inclusive), type, format=csv|xlsx.
+    """
+    if dataset not in EXPORTS:
+        raise Http404("Unknown export")
+
+    fmt = request.GET.get('format', 'csv')
+    try:
+        start = parse_date(request.GET.get('from') or '')
+        end = parse_date(request.GET.get('to') or '')
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format '{fmt}'.")
+        # the rows are read after this view returns, so pick the replica explicitly
+        rows = export_rows(dataset, start, end, request.GET.get('type') or None, using=replica_alias())
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect('manager_reports')
+
+    content_type = ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+                    if fmt == 'xlsx' else 'text/csv; charset=utf-8')
+    response = StreamingHttpResponse(export_chunks(fmt, rows, dataset), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(dataset, fmt, start, end)}"'
+    return response
+
+
 
 #====================================
 # REGISTER NEW USERS FOR THE SYSTEM
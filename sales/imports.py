@@ -0,0 +1,272 @@
+"""
+Bulk farmer import from CSV / XLSX.
+
+`register_farmer` checks one farmer per POST with an exists() query each;
+for paper-form batches `import_farmers(rows)` instead works in chunks of
+IMPORT_CHUNK_SIZE rows:
+
+  1. every row is validated in Python (required fields, field lengths, date
+     of birth, age 18-30, gender, NIN format CM/CF + 14 characters,
+     duplicates within the file);
+  2. one `nin IN (...)` query finds the NINs already registered;
+  3. the remaining rows are inserted with a single bulk_create.
+
+The result is an ImportReport with the number created and one error per
+rejected row (by its line number in the file), so 50k rows take seconds and
+the clerk knows exactly which forms to fix. Rows are read lazily, so only one
+chunk is in memory at a time.
+
+Expected columns (header row, any order, case-insensitive):
+name, dob, gender, nin, contact, recommender, recommender_nin.
+"""
+import csv
+import io
+import zipfile
+from datetime import date, datetime, timedelta
+from itertools import islice
+from xml.etree.ElementTree import ParseError, iterparse
+
+from django.db import transaction
+
+from sales.models import Farmer
+
+
+IMPORT_CHUNK_SIZE = 1000
+COLUMNS = ('name', 'dob', 'gender', 'nin', 'contact', 'recommender', 'recommender_nin')
+HEADER_ALIASES = {'date_of_birth': 'dob', 'phone': 'contact'}
+MIN_AGE, MAX_AGE = 18, 30
+NIN_PREFIXES = ('CM', 'CF')
+NIN_LENGTH = 14
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y')
+EXCEL_EPOCH = date(1899, 12, 30)  # day 0 of spreadsheet date serials
+# characters allowed per column, from the Farmer fields (rows over it are rejected, not truncated);
+# gender is stored as its first letter, so "female" is fine
+MAX_LENGTHS = {c: Farmer._meta.get_field(c).max_length for c in COLUMNS if c != 'gender'}
+
+
+class ImportFileError(Exception):
+    """The upload can't be read at all (wrong type, missing columns, corrupt file)."""
+
+
+class ImportReport:
+    """Outcome of an import: how many farmers were created and why the rest were not."""
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []   # (line, nin, message), line as numbered in the file
+
+    @property
+    def rejected(self):
+        return len(self.errors)
+
+    def add_error(self, line, nin, message):
+        self.errors.append((line, nin, message))
+
+
+# -------------------- reading files --------------------
+
+def _normalize_header(value):
+    key = str(value or '').strip().lower().replace(' ', '_')
+    return HEADER_ALIASES.get(key, key)
+
+
+def _csv_rows(fh):
+    text = io.TextIOWrapper(fh, encoding='utf-8-sig', newline='')
+    try:
+        yield from csv.reader(text)
+    except UnicodeDecodeError:
+        raise ImportFileError("The CSV file is not UTF-8 encoded. Save it as \"CSV UTF-8\" and upload it again.")
+    except csv.Error as e:
+        raise ImportFileError(f"The CSV file can't be read: {e}.")
+
+
+def _column_index(ref):
+    # "AB12" -> 27 (0-based column of a cell reference)
+    n = 0
+    for ch in ref:
+        if not ch.isalpha():
+            break
+        n = n * 26 + ord(ch.upper()) - 64
+    return n - 1
+
+
+def _xlsx_rows(fh):
+    """Rows of the first worksheet, streamed with iterparse (values only, no styles)."""
+    try:
+        zf = zipfile.ZipFile(fh)
+    except zipfile.BadZipFile:
+        raise ImportFileError("The file is not a valid .xlsx workbook.")
+    ns = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+    try:
+        with zf:
+            shared = []
+            if 'xl/sharedStrings.xml' in zf.namelist():
+                with zf.open('xl/sharedStrings.xml') as fp:
+                    for _, el in iterparse(fp):
+                        if el.tag == f'{ns}si':
+                            shared.append(''.join(t.text or '' for t in el.iter(f'{ns}t')))
+                            el.clear()
+            sheets = sorted(n for n in zf.namelist() if n.startswith('xl/worksheets/sheet'))
+            if not sheets:
+                raise ImportFileError("The workbook has no worksheets.")
+            with zf.open(sheets[0]) as fp:
+                for _, el in iterparse(fp):
+                    if el.tag != f'{ns}row':
+                        continue
+                    row = []
+                    for cell in el.iter(f'{ns}c'):
+                        kind = cell.get('t')
+                        if kind == 'inlineStr':
+                            value = ''.join(t.text or '' for t in cell.iter(f'{ns}t'))
+                        else:
+                            v = cell.find(f'{ns}v')
+                            value = v.text if v is not None else ''
+                            if kind == 's' and value:
+                                value = shared[int(value)]
+                        col = _column_index(cell.get('r', '')) if cell.get('r') else len(row)
+                        row.extend([''] * (col - len(row)))
+                        row.append(value)
+                    yield row
+                    el.clear()
+    except (ParseError, zipfile.BadZipFile):
+        raise ImportFileError("The .xlsx workbook is damaged (its sheet can't be parsed).")
+    except (IndexError, ValueError, KeyError):
+        raise ImportFileError("The .xlsx workbook is damaged (a cell refers to a value that isn't there).")
+
+
+def read_rows(fh, filename):
+    """
+    Yield (line number, {column: value}) for every data row of an uploaded
+    CSV or XLSX file. Raises ImportFileError for unreadable files.
+    """
+    name = (filename or '').lower()
+    if name.endswith('.csv'):
+        raw = _csv_rows(fh)
+    elif name.endswith('.xlsx'):
+        raw = _xlsx_rows(fh)
+    else:
+        raise ImportFileError("Upload a .csv or .xlsx file.")
+
+    header = [_normalize_header(h) for h in next(raw, [])]
+    missing = [c for c in COLUMNS if c not in header]
+    if missing:
+        raise ImportFileError(f"Missing column(s): {', '.join(missing)}.")
+    for line, values in enumerate(raw, start=2):
+        if not any(str(v).strip() for v in values):
+            continue  # blank line
+        yield line, dict(zip(header, values))
+
+
+# -------------------- validation --------------------
+
+def _parse_dob(value):
+    value = str(value or '').strip()
+    if not value:
+        return None
+    try:
+        # spreadsheet date serial, e.g. 37000 or 37000.0
+        return EXCEL_EPOCH + timedelta(days=int(float(value)))
+    except (ValueError, OverflowError):
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def valid_nin(nin):
+    return nin.startswith(NIN_PREFIXES) and len(nin) == NIN_LENGTH
+
+
+def age_on(dob, today):
+    return today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+
+
+def validate_row(row, today):
+    """(unsaved Farmer, None) for a good row, or (None, reason) for a bad one."""
+    values = {c: str(row.get(c) or '').strip() for c in COLUMNS}
+    blank = [c for c in COLUMNS if not values[c]]
+    if blank:
+        return None, f"Missing {', '.join(blank)}."
+
+    too_long = [f"{c} (max {MAX_LENGTHS[c]})" for c in COLUMNS
+                if MAX_LENGTHS.get(c) and len(values[c]) > MAX_LENGTHS[c]]
+    if too_long:
+        return None, f"Too long: {', '.join(too_long)}."
+
+    nin = values['nin'].upper()
+    if not valid_nin(nin):
+        return None, "NIN must start with 'CM' or 'CF' and be exactly 14 characters."
+
+    dob = _parse_dob(values['dob'])
+    if dob is None:
+        return None, "Invalid date of birth. Use YYYY-MM-DD."
+    if not MIN_AGE <= age_on(dob, today) <= MAX_AGE:
+        return None, f"Farmer must be between {MIN_AGE} and {MAX_AGE} years old."
+
+    gender = values['gender'][:1].upper()
+    if gender not in dict(Farmer.GENDER_CHOICES):
+        return None, "Gender must be M or F."
+
+    return Farmer(
+        name=values['name'],
+        dob=dob,
+        gender=gender,
+        nin=nin,
+        contact=values['contact'],
+        recommender=values['recommender'],
+        recommender_nin=values['recommender_nin'].upper(),
+        farmer_type='starter',
+    ), None
+
+
+# -------------------- importing --------------------
+
+def _chunks(iterable, size):
+    it = iter(iterable)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def import_farmers(rows, chunk_size=IMPORT_CHUNK_SIZE, dry_run=False, today=None):
+    """
+    Validate and insert (line, row) pairs from read_rows(). Each chunk costs one
+    IN query plus one bulk INSERT. With dry_run nothing is written, but the
+    report is the same.
+    """
+    today = today or date.today()
+    report = ImportReport()
+    seen = set()  # NINs earlier in this file
+
+    for chunk in _chunks(rows, chunk_size):
+        candidates = []
+        for line, row in chunk:
+            farmer, error = validate_row(row, today)
+            if error:
+                report.add_error(line, str(row.get('nin') or '').strip().upper(), error)
+            elif farmer.nin in seen:
+                report.add_error(line, farmer.nin, "Duplicate NIN earlier in this file.")
+            else:
+                seen.add(farmer.nin)
+                candidates.append((line, farmer))
+
+        taken = set(Farmer.objects
+                    .filter(nin__in=[f.nin for _, f in candidates])
+                    .values_list('nin', flat=True))
+        new = []
+        for line, farmer in candidates:
+            if farmer.nin in taken:
+                report.add_error(line, farmer.nin, "A farmer with this NIN already exists.")
+            else:
+                new.append(farmer)
+
+        if new and not dry_run:
+            with transaction.atomic():
+                # bulk_create skips Farmer.save(), so NINs are uppercased above
+                Farmer.objects.bulk_create(new, batch_size=chunk_size)
+        report.created += len(new)
+
+    report.errors.sort()
+    return report
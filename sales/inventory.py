@@ -0,0 +1,133 @@
+"""
+FIFO stock allocation shared by the chick and feed pickup flows.
+
+Each deduction is a conditional UPDATE
+    UPDATE ... SET quantity = quantity - n WHERE id = ? AND quantity >= n
+so two sales reps picking at the same time can never take the same chicks
+or bags twice: the loser of the race updates 0 rows, re-reads the batch and
+moves on. Everything runs inside one transaction; if the demand cannot be
+met the whole allocation is rolled back and InsufficientStock is raised.
+
+queryset.update() and bulk_create() bypass model signals, so the stock
+summaries (manager.summaries), the receivables ledger (sales.receivables) and
+the cached farmer status page (home.cache) are updated here explicitly.
+"""
+from django.db import transaction
+from django.db.models import F
+
+from home.cache import invalidate, farmer_status_namespace
+from manager.models import ChickStock, ChickAllocation
+from manager.summaries import adjust_chick_stock, adjust_feed_stock
+from sales.models import FeedStock, FeedDistribution
+from sales.receivables import create_receivables
+
+
+FIFO_WINDOW = 20  # batches read per round; most pickups are served by the first one or two
+
+
+class InsufficientStock(Exception):
+    """Raised when a demand cannot be met from the remaining batches."""
+
+    def __init__(self, needed, short, label=''):
+        self.needed = needed
+        self.short = short
+        super().__init__(f"Not enough {label or 'stock'}: {short} of {needed} could not be allocated.")
+
+
+def _take_fifo(model, qty_field, type_field, filters, order_by, needed):
+    """
+    Deduct up to `needed` units FIFO across the batches matching `filters`.
+    Returns ([(batch_id, batch_type, taken), ...], shortfall).
+    """
+    taken = []
+    remaining = needed
+    exhausted = False
+    while remaining > 0 and not exhausted:
+        candidates = list(model.objects
+                          .filter(**filters, **{f'{qty_field}__gt': 0})
+                          .order_by(*order_by)
+                          .values_list('id', type_field, qty_field)[:FIFO_WINDOW])
+        exhausted = len(candidates) < FIFO_WINDOW
+        for batch_id, batch_type, available in candidates:
+            take = min(available, remaining)
+            claimed = (model.objects
+                       .filter(id=batch_id, **{f'{qty_field}__gte': take})
+                       .update(**{qty_field: F(qty_field) - take}))
+            if not claimed:
+                # Someone else took from this batch since we read it; re-read
+                exhausted = False
+                break
+            taken.append((batch_id, batch_type, take))
+            remaining -= take
+            if remaining == 0:
+                break
+    return taken, remaining
+
+
+@transaction.atomic
+def allocate_chicks(chick_request, quantity=None):
+    """
+    Deduct chicks FIFO (oldest recorded_on first) for `chick_request` and
+    record ChickAllocation rows. Raises InsufficientStock (nothing deducted).
+    """
+    quantity = chick_request.quantity if quantity is None else quantity
+    if quantity <= 0:
+        return []
+
+    taken, short = _take_fifo(
+        ChickStock, 'quantity', 'chick_type',
+        filters={'chick_type': chick_request.chick_type},
+        order_by=('recorded_on', 'id'),
+        needed=quantity,
+    )
+    if short:
+        raise InsufficientStock(quantity, short, chick_request.get_chick_type_display())
+
+    adjust_chick_stock(chick_request.chick_type, -quantity)
+    return ChickAllocation.objects.bulk_create([
+        ChickAllocation(request=chick_request, stock_id=batch_id, quantity=qty)
+        for batch_id, _, qty in taken
+    ])
+
+
+@transaction.atomic
+def allocate_feeds(farmer, bags, distribution_type, feed_type=None, allow_partial=False, **distribution_fields):
+    """
+    Deduct `bags` of feed FIFO (oldest arrival first, any type unless `feed_type`)
+    and record one FeedDistribution per batch used.
+
+    With allow_partial=True a shortfall is tolerated and the caller can read it
+    from the returned distributions; otherwise InsufficientStock is raised and
+    nothing is deducted.
+    """
+    filters = {'feed_type': feed_type} if feed_type else {}
+    taken, short = _take_fifo(
+        FeedStock, 'quantity_bags', 'feed_type',
+        filters=filters,
+        order_by=('arrival_date', 'id'),
+        needed=bags,
+    )
+    if short and not allow_partial:
+        raise InsufficientStock(bags, short, f"{feed_type or 'feed'} stock")
+
+    per_type = {}
+    for _, batch_type, qty in taken:
+        per_type[batch_type] = per_type.get(batch_type, 0) + qty
+    for batch_type, qty in per_type.items():
+        adjust_feed_stock(batch_type, -qty)
+
+    distributions = FeedDistribution.objects.bulk_create([
+        FeedDistribution(
+            farmer=farmer,
+            feed_stock_id=batch_id,
+            distribution_type=distribution_type,
+            quantity_bags=qty,
+            **distribution_fields,
+        )
+        for batch_id, _, qty in taken
+    ])
+    if distribution_type == 'initial':
+        create_receivables(distributions)
+    namespace = farmer_status_namespace(farmer.id)
+    transaction.on_commit(lambda: invalidate(namespace))
+    return distributions
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from sales.receivables import rebuild_receivables
+
+
+class Command(BaseCommand):
+    help = "Build the feed receivables ledger from existing FeedDistribution and Payment rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Rows per bulk insert")
+
+    def handle(self, *args, **opts):
+        created = rebuild_receivables(chunk_size=opts["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Feed receivables ledger rebuilt: {created} row(s)."))
@@ -0,0 +1,210 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from statistics import median
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum, OuterRef, Subquery
+from django.test.utils import setup_databases, teardown_databases
+
+from manager.models import ChickStock
+from sales.models import Farmer, ChickRequest, FeedRequest, FeedStock, FeedDistribution, Payment
+
+
+CHICK_TYPES = [key for key, _ in ChickStock.CHICK_TYPE_CHOICES]
+FEED_TYPES = [key for key, _ in FeedStock.FEED_TYPE_CHOICES]
+PAYMENT_FOR = [key for key, _ in Payment.PAYMENT_FOR_CHOICES]
+INDEXED_MODELS = [ChickRequest, FeedRequest, FeedStock, FeedDistribution, Payment, ChickStock]
+
+
+def hot_queries(today):
+    """The filters sales/views.py and manager/views.py run on every page load."""
+    week_start = today - timedelta(days=today.weekday())
+    some_farmer = Farmer.objects.order_by('id').values_list('id', flat=True).first()
+    return [
+        ("chick pickup queue (pickup_view / sales dashboard)",
+         lambda: list(ChickRequest.objects.filter(status='approved', is_picked=False)
+                      .order_by('approval_date', 'id')[:10])),
+        ("chick pickup queue totals",
+         lambda: ChickRequest.objects.filter(status='approved', is_picked=False)
+         .aggregate(n=Sum('quantity'))),
+        ("feed pickup queue (feed_pickup_view)",
+         lambda: list(FeedRequest.objects.filter(status='approved', pickup_status='not_picked')
+                      .order_by('approved_on', 'id')[:10])),
+        ("last request of a farmer (4-month rule)",
+         lambda: ChickRequest.objects.filter(farmer_id=some_farmer)
+         .order_by('-submitted_on', '-id').first()),
+        ("weekly chick cash",
+         lambda: Payment.objects.filter(payment_for='chicks', payment_date__gte=week_start)
+         .aggregate(s=Sum('amount'))),
+        ("payments linked to initial feeds",
+         lambda: list(Payment.objects.filter(related_feed_distribution__isnull=False, payment_for='feeds')
+                      .values('related_feed_distribution').annotate(s=Sum('amount'))[:100])),
+        ("history tab chick payments subquery",
+         lambda: list(ChickRequest.objects.filter(is_picked=True).annotate(
+             paid=Subquery(Payment.objects.filter(farmer=OuterRef('farmer'), payment_for='chicks',
+                                                  payment_date=OuterRef('picked_on'))
+                           .order_by().values('farmer').annotate(s=Sum('amount')).values('s')[:1])
+         ).order_by('-submitted_on', '-id')[:25])),
+        ("feed FIFO (starter)",
+         lambda: list(FeedStock.objects.filter(feed_type='starter', quantity_bags__gt=0)
+                      .order_by('arrival_date')[:5])),
+        ("feed FIFO (any type)",
+         lambda: list(FeedStock.objects.filter(quantity_bags__gt=0).order_by('arrival_date')[:5])),
+        ("chick FIFO (broiler_local)",
+         lambda: list(ChickStock.objects.filter(chick_type='broiler_local', quantity__gt=0)
+                      .order_by('recorded_on', 'id')[:5])),
+    ]
+
+
+def plan_for(run):
+    """EXPLAIN of the first query a callable issues."""
+    from django.test.utils import CaptureQueriesContext
+    with CaptureQueriesContext(connection) as ctx:
+        run()
+    sql = ctx.captured_queries[0]['sql']
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql)
+        return [" ".join(str(col) for col in row) for row in cursor.fetchall()]
+
+
+class Command(BaseCommand):
+    help = ("Seed a large synthetic dataset into a throwaway test database and compare hot-filter "
+            "query plans and timings with and without the composite/partial indexes.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000,
+                            help="Rows to seed in each hot table (ChickRequest, Payment); other tables scale from it")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per query (median reported)")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducibility")
+        parser.add_argument("--explain", action="store_true", help="Print query plans before and after")
+
+    def handle(self, *args, **opts):
+        if opts["rows"] < 1 or opts["repeat"] < 1:
+            raise CommandError("--rows and --repeat must be at least 1.")
+
+        # the rows are bulk-inserted past the summary/ledger signals and the indexes
+        # are dropped, so never touch the configured database
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            before, after, queries = self._benchmark(opts)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+        self.stdout.write("")
+        self.stdout.write(f"{'query':<55} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+        for name, _ in queries:
+            b, a = before[name], after[name]
+            speedup = f"{b / a:.1f}x" if a else "-"
+            self.stdout.write(f"{name:<55} {b:>10.2f} {a:>10.2f} {speedup:>8}")
+
+    def _benchmark(self, opts):
+        random.seed(opts["seed"])
+        self._seed(opts["rows"])
+        queries = hot_queries(date.today())
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Dropping hot-filter indexes…"))
+        self._set_indexes(present=False)
+        try:
+            before = self._measure(queries, opts["repeat"], opts["explain"])
+        finally:
+            self.stdout.write(self.style.MIGRATE_HEADING("Recreating hot-filter indexes…"))
+            self._set_indexes(present=True)
+        after = self._measure(queries, opts["repeat"], opts["explain"])
+        return before, after, queries
+
+    # -------------------- helpers --------------------
+
+    def _set_indexes(self, present):
+        with connection.schema_editor() as editor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    if present:
+                        editor.add_index(model, index)
+                    else:
+                        editor.remove_index(model, index)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def _measure(self, queries, repeat, explain):
+        timings = {}
+        for name, run in queries:
+            run()  # warm the page cache
+            samples = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                run()
+                samples.append((time.perf_counter() - started) * 1000)
+            timings[name] = median(samples)
+            if explain:
+                self.stdout.write(f"  {name}:")
+                for line in plan_for(run):
+                    self.stdout.write(f"      {line}")
+        return timings
+
+    def _bulk(self, model, make_row, count, chunk=5000):
+        """bulk_create `count` rows built by `make_row()`, one chunk in memory at a time."""
+        for offset in range(0, count, chunk):
+            model.objects.bulk_create([make_row() for _ in range(min(chunk, count - offset))])
+
+    def _seed(self, n):
+        today = date.today()
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Seeding ~{n:,} rows per hot table…"))
+        start_id = (Farmer.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+
+        farmer_count = max(n // 10, 1)
+        Farmer.objects.bulk_create([
+            Farmer(name=f"Bench Farmer {i}", dob=date(2000, 1, 1), gender='M', nin=f"CMB{i:011d}",
+                   recommender="Bench", recommender_nin="CM000000000000", contact="0700000000")
+            for i in range(start_id, start_id + farmer_count)
+        ], batch_size=5000)
+        farmer_ids = list(Farmer.objects.filter(nin__startswith='CMB').values_list('id', flat=True))
+
+        def day(back=365):
+            return today - timedelta(days=random.randint(0, back))
+
+        # ~95% of stock batches are depleted, as in a long-running deployment
+        self._bulk(ChickStock, lambda: ChickStock(
+            chick_type=random.choice(CHICK_TYPES), age_days=random.randint(1, 30), hatch_date=day(),
+            quantity=0 if random.random() < 0.95 else random.randint(1, 500),
+        ), max(n // 20, 1))
+        self._bulk(FeedStock, lambda: FeedStock(
+            feed_type=random.choice(FEED_TYPES), purchase_price=Decimal('80000'),
+            sale_price=Decimal('100000'), arrival_date=day(),
+            quantity_bags=0 if random.random() < 0.95 else random.randint(1, 100),
+        ), max(n // 20, 1))
+
+        def chick_request():
+            status = random.choices(['pending', 'approved', 'rejected'], [1, 8, 1])[0]
+            approved = status == 'approved'
+            picked = approved and random.random() < 0.97
+            return ChickRequest(
+                farmer_id=random.choice(farmer_ids), chick_type=random.choice(CHICK_TYPES),
+                quantity=random.randint(20, 500), status=status,
+                approval_date=day() if approved else None,
+                is_picked=picked, picked_on=day() if picked else None,
+            )
+        self._bulk(ChickRequest, chick_request, n)
+
+        self._bulk(FeedRequest, lambda: FeedRequest(
+            farmer_id=random.choice(farmer_ids), feed_type=random.choice(FEED_TYPES),
+            quantity_bags=random.randint(1, 10), status='approved',
+            pickup_status='picked' if random.random() < 0.97 else 'not_picked',
+        ), n // 2)
+
+        self._bulk(Payment, lambda: Payment(
+            farmer_id=random.choice(farmer_ids), amount=Decimal(random.randint(1000, 300000)),
+            payment_for=random.choice(PAYMENT_FOR),
+        ), n)
+
+        # payment_date is auto_now_add; spread it over the past year afterwards
+        with connection.cursor() as cursor:
+            table = Payment._meta.db_table
+            if connection.vendor == 'sqlite':
+                cursor.execute(f"UPDATE {table} SET payment_date = date('now', '-' || (id % 365) || ' days')")
+            else:
+                cursor.execute(f"UPDATE {table} SET payment_date = CURRENT_DATE - (id % 365)")
+        self.stdout.write(self.style.SUCCESS("Seeding complete."))
@@ -0,0 +1,207 @@
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+from queue import Empty, Queue
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from home.models import User
+from home.sqlite import current_pragmas
+from sales.models import ChickRequest
+
+
+REPORTED_PRAGMAS = ('journal_mode', 'synchronous', 'busy_timeout')
+
+
+class Command(BaseCommand):
+    help = ("Compare concurrent chick pickups (writers) and pickup/dashboard page loads (readers) "
+            "on SQLite with its default settings and with the tuned pragmas from settings.SQLITE_PRAGMAS. "
+            "Runs on throwaway copies of a freshly seeded database file.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pickups", type=int, default=200, help="Approved requests to pick up per run")
+        parser.add_argument("--writers", type=int, default=4, help="Threads confirming pickups")
+        parser.add_argument("--readers", type=int, default=4, help="Threads loading the pickup list and dashboard")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for the dataset")
+
+    def handle(self, *args, **opts):
+        if connection.vendor != 'sqlite':
+            raise CommandError("This benchmark is for SQLite databases only.")
+        if not settings.SQLITE_PRAGMAS:
+            raise CommandError("SQLITE_PRAGMAS is empty (SQLITE_TUNING=0); nothing to compare against.")
+
+        aliases = [alias for alias in connections if connections[alias].vendor == 'sqlite']
+        saved = {alias: dict(connections.settings[alias], OPTIONS=dict(connections.settings[alias]['OPTIONS']))
+                 for alias in aliases}
+        tuned_mode = saved['default']['OPTIONS'].get('transaction_mode')
+        tuned_pragmas = settings.SQLITE_PRAGMAS
+        tmp = Path(tempfile.mkdtemp(prefix='y4c-sqlite-bench-'))
+        serving = override_settings(DEBUG=False, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'])
+        serving.enable()
+        try:
+            base = tmp / 'base.sqlite3'
+            self.stdout.write(self.style.MIGRATE_HEADING(f"Seeding {opts['pickups']:,} approved requests…"))
+            self._use_database(aliases, base, pragmas={}, transaction_mode=None)
+            call_command('migrate', verbosity=0)
+            call_command('seed_demo', farmers=opts['pickups'], chick_requests=opts['pickups'],
+                         feed_requests=max(opts['pickups'] // 4, 1), status_mix='approved:1', pickup_rate=0,
+                         seed=opts['seed'], verbosity=0)
+            User.objects.get_or_create(username='peter', defaults={'role': 'sales_rep'})
+            User.objects.get_or_create(username='bench_manager', defaults={'role': 'brooder_manager'})
+
+            results = {}
+            for label, pragmas, mode in (('default', {}, None),
+                                         ('tuned', tuned_pragmas, tuned_mode)):
+                run = tmp / f'{label}.sqlite3'
+                self._close_all()
+                shutil.copy(base, run)
+                self._use_database(aliases, run, pragmas, mode)
+                connection.ensure_connection()
+                shown = current_pragmas(connection.connection, REPORTED_PRAGMAS)
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    f"Run '{label}': " + ", ".join(f"{k}={v}" for k, v in shown.items())
+                    + f", transaction_mode={mode or 'DEFERRED'}"))
+                results[label] = self._run(opts['writers'], opts['readers'])
+        finally:
+            self._close_all()
+            settings.SQLITE_PRAGMAS = tuned_pragmas
+            for alias, original in saved.items():
+                connections.settings[alias].clear()
+                connections.settings[alias].update(original)
+            serving.disable()
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        self._report(results)
+
+    # -------------------- helpers --------------------
+
+    def _close_all(self):
+        for conn in connections.all(initialized_only=True):
+            conn.close()
+
+    def _use_database(self, aliases, path, pragmas, transaction_mode):
+        """Point every SQLite alias (and the connections threads will open) at `path`."""
+        self._close_all()
+        for alias in aliases:
+            # connection wrappers share this dict, including those other threads create
+            db = connections.settings[alias]
+            db['NAME'] = str(path)
+            db['CONN_MAX_AGE'] = None  # keep each thread's connection for the whole run
+            if transaction_mode:
+                db['OPTIONS']['transaction_mode'] = transaction_mode
+            else:
+                db['OPTIONS'].pop('transaction_mode', None)
+        # new connections read the pragmas when they open
+        settings.SQLITE_PRAGMAS = pragmas
+
+    def _run(self, writers, readers):
+        pending = Queue()
+        for request_id in (ChickRequest.objects.filter(status='approved', is_picked=False)
+                           .order_by('id').values_list('id', flat=True)):
+            pending.put(request_id)
+        total = pending.qsize()
+        sales_user = User.objects.get(username='peter')
+        manager = User.objects.get(username='bench_manager')
+        self._close_all()
+
+        lock = threading.Lock()
+        stats = {'picked': 0, 'pick_errors': 0, 'reads': 0, 'read_errors': 0, 'latencies': []}
+        done = threading.Event()
+        start = threading.Barrier(writers + readers)
+
+        def bump(key, n=1):
+            with lock:
+                stats[key] += n
+
+        def writer():
+            client = Client()
+            try:
+                client.force_login(sales_user)
+                start.wait()
+                while True:
+                    try:
+                        request_id = pending.get_nowait()
+                    except Empty:
+                        return
+                    began = time.perf_counter()
+                    try:
+                        response = client.post(reverse('mark_request_as_picked', args=[request_id]),
+                                               {'paid_chicks': '1650', 'paid_feeds': '0'})
+                        ok = response.status_code == 302
+                    except OperationalError:  # "database is locked"
+                        ok = False
+                    if ok:
+                        with lock:
+                            stats['picked'] += 1
+                            stats['latencies'].append((time.perf_counter() - began) * 1000)
+                    else:
+                        bump('pick_errors')
+            finally:
+                connection.close()
+
+        def reader():
+            client = Client()
+            urls = [reverse('sales_pickup'), reverse('manager_dashboard')]
+            try:
+                client.force_login(manager)
+                start.wait()
+                i = 0
+                while not done.is_set():
+                    try:
+                        ok = client.get(urls[i % len(urls)]).status_code == 200
+                    except OperationalError:
+                        ok = False
+                    bump('reads' if ok else 'read_errors')
+                    i += 1
+            finally:
+                connection.close()
+
+        writer_threads = [threading.Thread(target=writer) for _ in range(writers)]
+        reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+        began = time.perf_counter()
+        for t in writer_threads + reader_threads:
+            t.start()
+        for t in writer_threads:
+            t.join()
+        elapsed = time.perf_counter() - began
+        done.set()
+        for t in reader_threads:
+            t.join()
+
+        latencies = sorted(stats.pop('latencies')) or [0]
+        stats.update(
+            attempted=total,
+            seconds=elapsed,
+            pickups_per_s=stats['picked'] / elapsed,
+            reads_per_s=stats['reads'] / elapsed,
+            p50_ms=statistics.median(latencies),
+            p95_ms=latencies[int(0.95 * (len(latencies) - 1))],
+        )
+        return stats
+
+    def _report(self, results):
+        rows = [
+            ("pickups confirmed", 'picked', "{:,}"),
+            ("pickups failed (locked)", 'pick_errors', "{:,}"),
+            ("pickups / s", 'pickups_per_s', "{:.1f}"),
+            ("pickup p50 ms", 'p50_ms', "{:.1f}"),
+            ("pickup p95 ms", 'p95_ms', "{:.1f}"),
+            ("page loads", 'reads', "{:,}"),
+            ("page loads failed", 'read_errors', "{:,}"),
+            ("page loads / s", 'reads_per_s', "{:.1f}"),
+            ("wall time s", 'seconds', "{:.1f}"),
+        ]
+        before, after = results['default'], results['tuned']
+        self.stdout.write("")
+        self.stdout.write(f"{'':<26} {'default':>10} {'tuned':>10}")
+        for title, key, fmt in rows:
+            self.stdout.write(f"{title:<26} {fmt.format(before[key]):>10} {fmt.format(after[key]):>10}")
@@ -0,0 +1,33 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sales.imports import IMPORT_CHUNK_SIZE, ImportFileError, import_farmers, read_rows
+
+
+class Command(BaseCommand):
+    help = "Register farmers in bulk from a CSV or XLSX file and print a per-row error report."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or XLSX file with a header row")
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE,
+                            help=f"Rows validated and inserted per batch (default {IMPORT_CHUNK_SIZE})")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only, don't insert anything")
+
+    def handle(self, *args, **opts):
+        path = opts["path"]
+        if not os.path.exists(path):
+            raise CommandError(f"No such file: {path}")
+
+        with open(path, "rb") as fh:
+            try:
+                report = import_farmers(read_rows(fh, path), chunk_size=opts["chunk_size"],
+                                        dry_run=opts["dry_run"])
+            except ImportFileError as e:
+                raise CommandError(str(e))
+
+        for line, nin, message in report.errors:
+            self.stdout.write(f"line {line}\t{nin or '-'}\t{message}")
+        verb = "would be created" if opts["dry_run"] else "created"
+        self.stdout.write(self.style.SUCCESS(
+            f"{report.created:,} farmer(s) {verb}, {report.rejected:,} row(s) rejected."))
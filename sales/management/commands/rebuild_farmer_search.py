@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from sales.search import install_search_index, drop_search_index
+
+
+class Command(BaseCommand):
+    help = ("Recreate the farmer search index (SQLite FTS5 table + triggers, or PostgreSQL "
+            "trigram indexes) and refill it from sales_farmer.")
+
+    def handle(self, *args, **opts):
+        drop_search_index(connection)
+        install_search_index(connection)
+        self.stdout.write(self.style.SUCCESS(f"Farmer search index rebuilt ({connection.vendor})."))
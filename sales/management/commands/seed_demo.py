@@ -1,298 +1,406 @@
+"""
+Deterministic, high-volume demo / benchmark data.
+
+    python manage.py seed_demo --farmers 200000 --chick-requests 1000000 --seed 7
+
+Rows are generated day by day from a single random.Random(seed) and written
+with bulk_create in chunks. Primary keys are assigned up front so related
+rows can point at each other without reading ids back. The same seed, end
+date and starting database always give the same rows.
+
+The data is consistent with what the app itself writes:
+  - approved chick requests carry ChickAllocation rows taken FIFO from chick
+    batches; a new batch is recorded whenever a type runs short, dated before
+    the request that needed it, so nothing is allocated before it arrived;
+  - picked requests get the 2-bag initial FeedDistribution (due in 60 days,
+    FIFO across feed batches), a chicks payment and sometimes the initial
+    feed payment, and the farmer becomes 'returning';
+  - picked feed requests get a purchase distribution of their feed type and
+    its payment.
+
+bulk_create skips signals, so the stock/revenue summaries and the feed
+receivables ledger are rebuilt at the end, and the sales report snapshots
+(manager.snapshots) are frozen again if they were in use.
+"""
 import random
-import string
-from datetime import timedelta, date
-
-from django.core.management.base import BaseCommand
-from django.db import transaction
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 
-try:
-    from faker import Faker
-    _FAKER = Faker("en_UG")
-except Exception:  # pragma: no cover
-    _FAKER = None
-
-# Import your models
+from home.models import Job
+from manager.models import ArchivedChickStock, ChickAllocation, ChickStock, DebtorSnapshot, ReportSnapshot
+from manager.snapshots import freeze_debtors, freeze_pending
+from manager.summaries import rebuild_summaries
 from sales.models import (
-    Farmer,
-    ChickRequest,
-    FeedRequest,
-    Payment,
-    FeedDistribution,
+    ChickRequest, Farmer, FeedDistribution, FeedReceivable, FeedRequest, FeedStock,
+    Manufacturer, Payment, Supplier,
 )
-
-# Optional models (exist in your project but guard just in case)
-try:
-    from sales.models import Manufacturer, Supplier, FeedStock
-except Exception:  # pragma: no cover
-    Manufacturer = Supplier = FeedStock = None
-
-FOUR_MONTHS_DAYS = 120  # simple, conservative window
-
-CHICK_TYPES = [
-    ("broiler_local", "Broiler - Local"),
-    ("broiler_exotic", "Broiler - Exotic"),
-    ("layer_local", "Layer - Local"),
-    ("layer_exotic", "Layer - Exotic"),
+from sales.receivables import rebuild_receivables
+
+
+CHICK_PRICE = Decimal('1650')
+INITIAL_FEED_BAGS = 2
+INITIAL_FEED_DUE_DAYS = 60
+FEED_PRICES = {  # feed_type: (purchase, sale) per bag
+    'starter': (Decimal('85000'), Decimal('100000')),
+    'grower': (Decimal('80000'), Decimal('95000')),
+    'finisher': (Decimal('78000'), Decimal('92000')),
+}
+
+FIRST_NAMES = ["Amina", "John", "Jane", "Brian", "Stella", "Grace", "Ivan", "Ruth", "Noah", "Mercy",
+               "Peter", "Sarah", "Moses", "Esther", "Joseph", "Faith", "Daniel", "Joan", "Isaac", "Prossy"]
+LAST_NAMES = ["Okello", "Namatovu", "Mugisha", "Kato", "Nankya", "Tumusiime", "Mukasa", "Ocen",
+              "Ssali", "Achieng", "Byaruhanga", "Nakato", "Opio", "Kizza", "Atim", "Waiswa"]
+MANUFACTURERS = ["KukuFeeds Ltd", "AgriMix Uganda", "GreenMaize Mills"]
+SUPPLIERS = [("Kisenyi Agri", "Kampala"), ("Wandegeya Farm Supply", "Kampala"), ("Kireka Agro", "Wakiso")]
+
+# auto_now_add fields the generator back-dates
+BACKDATED_FIELDS = [
+    (ChickRequest, 'submitted_on'), (FeedRequest, 'submitted_on'), (ChickStock, 'recorded_on'),
+    (ChickAllocation, 'allocated_on'), (FeedDistribution, 'distribution_date'), (Payment, 'payment_date'),
 ]
-FEED_TYPES = ["starter", "grower", "finisher"]
-FARMER_TYPES = ["starter", "returning"]
-
-
-def rand_name():
-    if _FAKER:
-        return _FAKER.name()
-    first = random.choice(["Amina", "John", "Jane", "Brian", "Stella", "Grace", "Ivan", "Ruth", "Noah", "Mercy"])  # noqa: E501
-    last = random.choice(["Okello", "Namatovu", "Mugisha", "Kato", "Nankya", "Tumusiime", "Mukasa", "Ocen"])  # noqa: E501
-    return f"{first} {last}"
-
-
-def rand_phone():
-    if _FAKER:
-        return _FAKER.msisdn()[0:10]
-    return "07" + str(random.randint(10000000, 99999999))
-
-
-def rand_nin(gender: str) -> str:
-    """Return a 14-character NIN. Males start with CM..., females with CF...; mix letters+digits."""
-    prefix = "CM" if gender == "M" else "CF"
-    tail = "".join(random.choice(string.ascii_uppercase + string.digits) for _ in range(12))
-    return prefix + tail
-
-
-def rand_dob_18_to_30():
-    """Random DOB such that age is between 18 and 30 (approx; 365-day years)."""
-    today = date.today()
-    years = random.randint(18, 30)
-    extra_days = random.randint(0, 364)
-    return today - timedelta(days=years * 365 + extra_days)
-
-
-def random_datetime_within_months(months_back=9):
-    """Return a random datetime within the last `months_back` months."""
-    now = timezone.now()
-    start = now - timedelta(days=30 * months_back)
-    delta = now - start
-    return start + timedelta(seconds=random.randint(0, int(delta.total_seconds())))
-
-
-def around_four_months_ago(variance_days=8, as_date=False):
-    base = timezone.now() - timedelta(days=FOUR_MONTHS_DAYS + random.randint(-variance_days, variance_days))
-    return base.date() if as_date else base
+# children first, for --wipe (manufacturers and suppliers are kept, so their ids stay put)
+# queued jobs and the report snapshots refer to these rows by id, so they go too
+WIPE_ORDER = [Job, ReportSnapshot, DebtorSnapshot,
+              Payment, FeedReceivable, FeedDistribution, ChickAllocation, ArchivedChickStock,
+              FeedRequest, ChickRequest, ChickStock, FeedStock, Farmer]
+
+
+def parse_mix(value, allowed):
+    """'approved:7,pending:1' -> ({'approved': 7.0, 'pending': 1.0}) restricted to `allowed` keys."""
+    mix = {}
+    for part in value.split(','):
+        key, _, weight = part.strip().partition(':')
+        if key not in allowed:
+            raise CommandError(f"Unknown value '{key}'. Choose from: {', '.join(allowed)}.")
+        try:
+            mix[key] = float(weight or 1)
+        except ValueError:
+            raise CommandError(f"Bad weight in '{part}'.")
+    if not any(mix.values()):
+        raise CommandError(f"'{value}' has no positive weight.")
+    return mix
+
+
+@contextmanager
+def backdating():
+    """Let bulk_create write our own dates into auto_now_add fields."""
+    fields = [model._meta.get_field(name) for model, name in BACKDATED_FIELDS]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class _Fifo:
+    """Batches of one chick/feed type that still hold stock, oldest first."""
+
+    def __init__(self, field):
+        self.field = field      # 'quantity' or 'quantity_bags'
+        self.open = deque()
+
+    def take(self, needed, new_batch):
+        """[(batch, qty)] covering `needed`, recording new batches via new_batch() when short."""
+        taken = []
+        while needed:
+            if not self.open:
+                self.open.append(new_batch())
+            batch = self.open[0]
+            qty = min(needed, getattr(batch, self.field))
+            setattr(batch, self.field, getattr(batch, self.field) - qty)
+            taken.append((batch, qty))
+            needed -= qty
+            if getattr(batch, self.field) == 0:
+                self.open.popleft()
+        return taken
 
 
 class Command(BaseCommand):
-    help = "Seed demo data: farmers, manufacturers, suppliers, feed stock, chick & feed requests, payments."
+    help = ("Generate a deterministic demo/benchmark dataset (farmers, stock batches, requests, "
+            "allocations, distributions, payments) with bulk_create.")
 
     def add_arguments(self, parser):
-        parser.add_argument("--farmers", type=int, default=60, help="How many farmers to create")
-        parser.add_argument("--chicks", type=int, default=90, help="How many chick requests to create")
-        parser.add_argument("--feeds", type=int, default=80, help="How many feed requests to create")
-        parser.add_argument("--payments", type=int, default=70, help="How many payments to create")
+        parser.add_argument("--farmers", type=int, default=60, help="Farmers to create")
+        parser.add_argument("--chick-requests", "--chicks", type=int, default=90, dest="chick_requests",
+                            help="Chick requests to create")
+        parser.add_argument("--feed-requests", "--feeds", type=int, default=80, dest="feed_requests",
+                            help="Feed requests to create")
+        parser.add_argument("--days", type=int, default=270, help="History window in days")
+        parser.add_argument("--end-date", help="Last day of the window (YYYY-MM-DD, default today)")
         parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducibility")
-        parser.add_argument("--wipe", action="store_true", help="Delete existing demo data before seeding")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Requests per bulk write")
+        parser.add_argument("--status-mix", default="pending:1,approved:7,rejected:2",
+                            help="Relative weights of request statuses")
+        parser.add_argument("--chick-mix", default="broiler_local:4,broiler_exotic:3,layer_local:2,layer_exotic:1",
+                            help="Relative weights of chick types")
+        parser.add_argument("--feed-mix", default="starter:5,grower:3,finisher:2",
+                            help="Relative weights of feed types in feed requests")
+        parser.add_argument("--pickup-rate", type=float, default=0.8,
+                            help="Share of approved requests that get picked up")
+        parser.add_argument("--feed-payment-rate", type=float, default=0.5,
+                            help="Share of pickups that pay the initial feed bags straight away")
+        parser.add_argument("--chick-batch-size", type=int, default=2000, help="Average chicks per stock batch")
+        parser.add_argument("--feed-batch-size", type=int, default=200, help="Average bags per feed batch")
+        parser.add_argument("--wipe", action="store_true", help="Delete existing farmers, stock, requests "
+                            "and payments first")
 
-    @transaction.atomic
     def handle(self, *args, **opts):
-        random.seed(opts["seed"])
-        if _FAKER:
-            _FAKER.seed_instance(opts["seed"])
-
-        self.stdout.write(self.style.MIGRATE_HEADING("Seeding demo data…"))
-
-        if opts["wipe"]:
-            self._wipe()
-
-        farmers = self._ensure_farmers(opts["farmers"])
-        manufs, sups = self._ensure_sources()
-        self._ensure_feed_stock(manufs, sups)
-
-        self._create_chick_requests(farmers, opts["chicks"])
-        self._create_feed_requests(farmers, opts["feeds"])
-        self._create_payments(farmers, opts["payments"])
-
-        self.stdout.write(self.style.SUCCESS("Done. Happy testing!"))
-
-    # -------------------- helpers --------------------
+        self.rng = random.Random(opts["seed"])
+        self.opts = opts
+        self.end = parse_date(opts["end_date"]) if opts["end_date"] else date.today()
+        if self.end is None:
+            raise CommandError("--end-date must look like 2025-01-31.")
+        if opts["days"] < 1 or opts["chunk_size"] < 1:
+            raise CommandError("--days and --chunk-size must be positive.")
+        if opts["farmers"] < 1 and opts["chick_requests"] + opts["feed_requests"]:
+            raise CommandError("Requests are spread over the new farmers: pass --farmers 1 or more.")
+        self.status_mix = parse_mix(opts["status_mix"], [k for k, _ in ChickRequest.STATUS_CHOICES])
+        self.chick_mix = parse_mix(opts["chick_mix"], [k for k, _ in ChickRequest.CHICK_TYPE_CHOICES])
+        self.feed_mix = parse_mix(opts["feed_mix"], [k for k, _ in FeedRequest.FEED_TYPE_CHOICES])
+
+        started = time.perf_counter()
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Seeding demo data (seed {opts['seed']})…"))
+        with transaction.atomic(), backdating():
+            # the new rows are spread over past days, so frozen report figures go stale
+            frozen = ReportSnapshot.objects.exists() or DebtorSnapshot.objects.exists()
+            if opts["wipe"]:
+                self._wipe()
+            self._start_ids()
+            self._sources()
+            self._farmers(opts["farmers"])
+            self._history(opts["chick_requests"], opts["feed_requests"], opts["days"])
+            self._promote_returning()
+            self._reset_sequences()
+
+            self.stdout.write("Rebuilding stock/revenue summaries and the receivables ledger…")
+            rebuild_summaries()
+            rebuild_receivables()
+            if frozen:
+                self.stdout.write("Re-freezing the sales report snapshots…")
+                freeze_pending(rebuild=True)
+                freeze_debtors()
+
+        for label, count in self.counts.items():
+            self.stdout.write(f"  {label:<20} {count:>12,}")
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.perf_counter() - started:.1f}s."))
+
+    # -------------------- setup --------------------
 
     def _wipe(self):
         self.stdout.write("Wiping existing demo rows…")
-        # Keep auth and contenttypes intact
-        models = [FeedDistribution, Payment, FeedRequest, ChickRequest, Farmer]
-        for m in models:
-            try:
-                m.objects.all().delete()
-            except Exception:
-                pass
-        if FeedStock:
-            FeedStock.objects.all().delete()
-        if Manufacturer:
-            Manufacturer.objects.all().delete()
-        if Supplier:
-            Supplier.objects.all().delete()
-
-    def _ensure_farmers(self, target):
-        count = Farmer.objects.count()
-        to_make = max(0, target - count)
-        farmers = list(Farmer.objects.all())
-        for _ in range(to_make):
-            gender = random.choice(["M", "F"])  # M → CM..., F → CF...
-            nin = rand_nin(gender)
-            while Farmer.objects.filter(nin=nin).exists():
-                nin = rand_nin(gender)
-
-            farmer = Farmer(
-                name=rand_name(),
-                dob=rand_dob_18_to_30(),
-                gender=gender,
-                nin=nin,
-                recommender=rand_name(),
-                recommender_nin=rand_nin(random.choice(["M", "F"])),
-                contact=rand_phone(),
-                farmer_type='starter',  # everyone starts as starter
-            )
-            farmer.save()
-            farmers.append(farmer)
-        self.stdout.write(f"Farmers: {len(farmers)}")
-        return farmers
-
-    def _ensure_sources(self):
-        manufs = []
-        sups = []
-        if Manufacturer:
-            if Manufacturer.objects.count() == 0:
-                for nm in ["KukuFeeds Ltd", "AgriMix Uganda", "GreenMaize Mills"]:
-                    manufs.append(Manufacturer.objects.create(name=nm))
-            else:
-                manufs = list(Manufacturer.objects.all())
-        if Supplier:
-            if Supplier.objects.count() == 0:
-                for nm in ["Kisenyi Agri", "Wandegeya Farm Supply", "Kireka Agro"]:
-                    sups.append(Supplier.objects.create(name=nm, contact=rand_phone()))
-            else:
-                sups = list(Supplier.objects.all())
-        self.stdout.write(f"Manufacturers: {len(manufs)} | Suppliers: {len(sups)}")
-        return manufs, sups
-
-    def _ensure_feed_stock(self, manufs, sups):
-        if not FeedStock:
-            self.stdout.write("FeedStock model not present — skipping stock seed.")
+        with connection.cursor() as cursor:
+            for model in WIPE_ORDER:
+                cursor.execute(f"DELETE FROM {model._meta.db_table}")
+
+    def _start_ids(self):
+        # next free primary key per model; rows get explicit ids from here on
+        self.next_id = {
+            model: (model.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+            for model in (Farmer, ChickStock, FeedStock, ChickRequest, FeedRequest,
+                          ChickAllocation, FeedDistribution, Payment)
+        }
+        self.counts = {}
+
+    def _new(self, model, **fields):
+        obj = model(id=self.next_id[model], **fields)
+        self.next_id[model] += 1
+        self.pending[model].append(obj)
+        return obj
+
+    def _sources(self):
+        self.manufacturers = [Manufacturer.objects.get_or_create(name=name)[0] for name in MANUFACTURERS]
+        self.suppliers = [Supplier.objects.get_or_create(name=name, defaults={'location': where})[0]
+                          for name, where in SUPPLIERS]
+
+    def _farmers(self, count):
+        rng = self.rng
+        first = self.next_id[Farmer]
+        for offset in range(0, count, self.opts["chunk_size"]):
+            rows = []
+            for farmer_id in range(first + offset, first + min(count, offset + self.opts["chunk_size"])):
+                gender = rng.choice("MF")
+                rows.append(Farmer(
+                    id=farmer_id,
+                    name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    dob=self.end - timedelta(days=rng.randint(18 * 365 + 5, 30 * 365 - 5)),
+                    gender=gender,
+                    nin=f"C{gender}D{farmer_id:011d}",  # 14 chars, unique per id
+                    recommender=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    recommender_nin=f"C{rng.choice('MF')}R{rng.randrange(10 ** 11):011d}",
+                    contact=f"07{rng.randrange(10 ** 8):08d}",
+                    farmer_type='starter',
+                ))
+            Farmer.objects.bulk_create(rows)
+        self.next_id[Farmer] = first + count
+        self.farmer_ids = (first, first + count - 1)
+        self.returning = set()
+        self.counts['farmers'] = count
+
+    # -------------------- history --------------------
+
+    def _history(self, chick_requests, feed_requests, days):
+        self.pending = {model: [] for model in self.next_id}
+        self.chick_fifo = {t: _Fifo('quantity') for t, _ in ChickRequest.CHICK_TYPE_CHOICES}
+        self.feed_fifo = {t: _Fifo('quantity_bags') for t, _ in FeedRequest.FEED_TYPE_CHOICES}
+        self.initial_fifo = _Fifo('quantity_bags')   # starter batches set aside for the initial 2 bags
+        self.carried = {ChickStock: [], FeedStock: []}
+
+        start = self.end - timedelta(days=days - 1)
+        for i in range(days):
+            day = start + timedelta(days=i)
+            for _ in range(self._spread(chick_requests, days, i)):
+                self._chick_request(day)
+            for _ in range(self._spread(feed_requests, days, i)):
+                self._feed_request(day)
+            if len(self.pending[ChickRequest]) + len(self.pending[FeedRequest]) >= self.opts["chunk_size"]:
+                self._flush()
+        self._flush()
+
+    @staticmethod
+    def _spread(total, days, i):
+        # even spread, remainder on the earliest days
+        return total // days + (1 if i < total % days else 0)
+
+    def _pick(self, mix):
+        return self.rng.choices(list(mix), weights=list(mix.values()))[0]
+
+    def _at(self, day, hour=9):
+        return timezone.make_aware(datetime(day.year, day.month, day.day, hour))
+
+    def _chick_batch(self, chick_type, day):
+        rng = self.rng
+        recorded = day - timedelta(days=rng.randint(0, 3))
+        age = rng.randint(1, 5)
+        size = self.opts["chick_batch_size"]
+        return self._new(ChickStock, chick_type=chick_type, quantity=rng.randint(size // 2, size * 3 // 2),
+                         age_days=age, hatch_date=recorded - timedelta(days=age), recorded_on=recorded,
+                         notes="Seeded batch")
+
+    def _feed_batch(self, feed_type, day):
+        rng = self.rng
+        purchase, sale = FEED_PRICES.get(feed_type, FEED_PRICES['starter'])
+        arrived = day - timedelta(days=rng.randint(0, 5))
+        size = self.opts["feed_batch_size"]
+        return self._new(FeedStock, feed_type=feed_type, quantity_bags=rng.randint(size // 2, size * 3 // 2),
+                         purchase_price=purchase, sale_price=sale, arrival_date=arrived,
+                         expiry_date=arrived + timedelta(days=180),
+                         manufacturer=rng.choice(self.manufacturers), supplier=rng.choice(self.suppliers),
+                         notes="Seeded batch")
+
+    def _chick_request(self, day):
+        rng = self.rng
+        farmer_id = rng.randint(*self.farmer_ids)
+        chick_type = self._pick(self.chick_mix)
+        status = self._pick(self.status_mix)
+        approved_on = day + timedelta(days=rng.randint(0, 3))
+        if status != 'pending' and approved_on > self.end:
+            status = 'pending'
+        cap = 500 if farmer_id in self.returning else 100
+        req = self._new(ChickRequest, farmer_id=farmer_id, chick_type=chick_type,
+                        quantity=rng.randint(20, cap), status=status, submitted_on=day, notes="Seeded")
+        if status == 'pending':
+            return
+        req.decision_at = self._at(approved_on, 10)
+        if status == 'rejected':
+            req.decision_note = "Seeded rejection"
             return
-        if FeedStock.objects.exists():
-            self.stdout.write("FeedStock already present — leaving as-is.")
+
+        req.approval_date = approved_on
+        # batches recorded before `day` (<= this and every later approval), so never backwards
+        for batch, qty in self.chick_fifo[chick_type].take(req.quantity, lambda: self._chick_batch(chick_type, day)):
+            self._new(ChickAllocation, request_id=req.id, stock_id=batch.id, quantity=qty,
+                      allocated_on=self._at(approved_on, 10))
+
+        picked_on = approved_on + timedelta(days=rng.randint(0, 7))
+        if picked_on > self.end or rng.random() >= self.opts["pickup_rate"]:
+            return
+        req.is_picked, req.picked_on = True, picked_on
+        self.returning.add(farmer_id)
+        self._new(Payment, farmer_id=farmer_id, amount=CHICK_PRICE * req.quantity, payment_for='chicks',
+                  payment_date=picked_on, notes=f"Paid for {req.quantity} chicks during pickup")
+
+        distributions = [
+            self._new(FeedDistribution, farmer_id=farmer_id, feed_stock_id=batch.id, distribution_type='initial',
+                      quantity_bags=qty, distribution_date=picked_on,
+                      due_date=picked_on + timedelta(days=INITIAL_FEED_DUE_DAYS),
+                      notes='Auto-issued during chick pickup')
+            for batch, qty in self.initial_fifo.take(INITIAL_FEED_BAGS, lambda: self._feed_batch('starter', day))
+        ]
+        if rng.random() < self.opts["feed_payment_rate"]:
+            amount = sum(FEED_PRICES['starter'][1] * d.quantity_bags for d in distributions)
+            self._new(Payment, farmer_id=farmer_id, amount=amount, payment_for='feeds',
+                      related_feed_distribution_id=distributions[0].id, payment_date=picked_on,
+                      notes="Initial 2-bag feed payment at pickup")
+
+    def _feed_request(self, day):
+        rng = self.rng
+        farmer_id = rng.randint(*self.farmer_ids)
+        feed_type = self._pick(self.feed_mix)
+        status = self._pick(self.status_mix)
+        approved_on = day + timedelta(days=rng.randint(0, 2))
+        if status != 'pending' and approved_on > self.end:
+            status = 'pending'
+        req = self._new(FeedRequest, farmer_id=farmer_id, feed_type=feed_type,
+                        quantity_bags=rng.randint(1, 10), status=status, submitted_on=self._at(day))
+        if status != 'approved':
+            return
+        req.approved_on = self._at(approved_on, 10)
+
+        picked_on = approved_on + timedelta(days=rng.randint(0, 5))
+        if picked_on > self.end or rng.random() >= self.opts["pickup_rate"]:
             return
-        # Seed some stock entries
-        for ft in FEED_TYPES:
-            FeedStock.objects.create(
-                feed_type=ft,
-                quantity_bags=random.randint(40, 120),
-                manufacturer=random.choice(manufs) if manufs else None,
-                supplier=random.choice(sups) if sups else None,
-                unit_cost=random.randint(25000, 45000) if hasattr(FeedStock, 'unit_cost') else None,
-                received_on=timezone.now().date() - timedelta(days=random.randint(0, 30)) if hasattr(FeedStock, 'received_on') else None,
-            )
-        self.stdout.write("FeedStock: seeded a few entries.")
-
-    def _create_chick_requests(self, farmers, how_many):
-        self.stdout.write("Creating chick requests…")
-        created = 0
-        for _ in range(how_many):
-            farmer = random.choice(farmers)
-            chick_type = random.choice([ct[0] for ct in CHICK_TYPES])
-            qty_cap = 100 if farmer.farmer_type == 'starter' else 500
-            quantity = random.randint(20, qty_cap)
-
-            # 30% exactly around four months ago, rest random last 9 months
-            if random.random() < 0.3:
-                submitted_on = around_four_months_ago(as_date=True)
-            else:
-                submitted_on = random_datetime_within_months(9).date()
-
-            cr = ChickRequest.objects.create(
-                farmer=farmer,
-                chick_type=chick_type,
-                quantity=quantity,
-                status=random.choice(['pending', 'approved', 'rejected']),
-                submitted_on=submitted_on,
-                notes=("Auto-seeded"),
-            )
-
-            # Simulate pickups for some approved requests
-            if cr.status == 'approved' and random.random() < 0.6:
-                cr.is_picked = True
-                cr.picked_on = submitted_on + timedelta(days=random.randint(1, 14))
-                cr.save(update_fields=["is_picked", "picked_on"])
-                # Promote starter -> returning on first pickup
-                if farmer.farmer_type == 'starter':
-                    farmer.farmer_type = 'returning'
-                    farmer.save(update_fields=["farmer_type"])
-                # Initial 2 bags allocation via FeedDistribution
-                try:
-                    FeedDistribution.objects.create(
-                        farmer=farmer,
-                        request=cr,
-                        distribution_type='initial',
-                        quantity_bags=2,
-                        notes='Initial allocation at pickup',
-                    )
-                except Exception:
-                    pass
-
-            created += 1
-        self.stdout.write(f"ChickRequests: {created}")
-
-    def _create_feed_requests(self, farmers, how_many):
-        self.stdout.write("Creating feed requests…")
-        created = 0
-        for _ in range(how_many):
-            farmer = random.choice(farmers)
-            # 30% around four months ago, rest random
-            if random.random() < 0.3:
-                submitted_on = around_four_months_ago()
-            else:
-                submitted_on = random_datetime_within_months(9)
-
-            fr = FeedRequest.objects.create(
-                farmer=farmer,
-                feed_type=random.choice(FEED_TYPES),
-                quantity_bags=random.randint(1, 10),
-                status=random.choice(['pending', 'approved', 'rejected']),
-                approval_notes='Auto-seeded',
-                submitted_on=submitted_on,
-            )
-            if fr.status == 'approved' and random.random() < 0.55:
-                fr.pickup_status = 'picked'
-                fr.picked_on = fr.submitted_on + timedelta(days=random.randint(1, 10))
-                fr.save(update_fields=['pickup_status', 'picked_on'])
-            created += 1
-        self.stdout.write(f"FeedRequests: {created}")
-
-    def _create_payments(self, farmers, how_many):
-        self.stdout.write("Creating payments…")
-        created = 0
-        for _ in range(how_many):
-            farmer = random.choice(farmers)
-            pfor = random.choice(['chicks', 'feeds', 'both', 'other'])
-
-            # Some payments 4 months back, others random recent
-            if random.random() < 0.35:
-                payment_date = around_four_months_ago(as_date=True)
-            else:
-                payment_date = random_datetime_within_months(9).date()
-
-            amt = random.randint(50000, 300000)
-            p = Payment.objects.create(
-                farmer=farmer,
-                amount=amt,
-                payment_for=pfor,
-                notes='Auto-seeded',
-            )
-            # override auto_now_add to desired date
-            try:
-                p.payment_date = payment_date
-                p.save(update_fields=['payment_date'])
-            except Exception:
-                pass
-
-            created += 1
-        self.stdout.write(f"Payments: {created}")
+        req.pickup_status, req.picked_on = 'picked', self._at(picked_on, 11)
+        sale = FEED_PRICES.get(feed_type, FEED_PRICES['starter'])[1]
+        for batch, qty in self.feed_fifo[feed_type].take(req.quantity_bags, lambda: self._feed_batch(feed_type, day)):
+            self._new(FeedDistribution, farmer_id=farmer_id, feed_stock_id=batch.id, distribution_type='purchase',
+                      quantity_bags=qty, distribution_date=picked_on, notes=f"Feed request #{req.id}")
+        self._new(Payment, farmer_id=farmer_id, amount=sale * req.quantity_bags, payment_for='feeds',
+                  payment_date=picked_on, notes=f"Feed request #{req.id}")
+
+    def _flush(self):
+        """Write everything generated so far, parents first."""
+        for model in (ChickStock, FeedStock, ChickRequest, FeedRequest, ChickAllocation, FeedDistribution, Payment):
+            rows = self.pending[model]
+            if rows:
+                model.objects.bulk_create(rows, batch_size=2000)
+                label = model._meta.verbose_name_plural
+                self.counts[label] = self.counts.get(label, 0) + len(rows)
+                self.pending[model] = []
+
+        # Batches are written with what they hold at flush time. The ones that were still
+        # open at the previous flush have been drawn from since, so store their new level;
+        # every other batch was used up before being written, or is new and written as is.
+        for model, field, fifos in self._fifos():
+            if self.carried[model]:
+                model.objects.bulk_update(self.carried[model], [field])
+            self.carried[model] = [batch for fifo in fifos for batch in fifo.open]
+
+    def _fifos(self):
+        return [
+            (ChickStock, 'quantity', list(self.chick_fifo.values())),
+            (FeedStock, 'quantity_bags', list(self.feed_fifo.values()) + [self.initial_fifo]),
+        ]
+
+    def _promote_returning(self):
+        ids = sorted(self.returning)
+        for offset in range(0, len(ids), 900):
+            Farmer.objects.filter(id__in=ids[offset:offset + 900]).update(farmer_type='returning')
+
+    def _reset_sequences(self):
+        # explicit ids don't advance PostgreSQL sequences (SQLite tracks them itself)
+        statements = connection.ops.sequence_reset_sql(no_style(), list(self.next_id))
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0008_chickrequest_decision_at_chickrequest_decision_by_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedReceivable',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('charged', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('paid', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('due_date', models.DateField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('paid', 'Paid')], default='open', max_length=10)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+                ('distribution', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='receivable', to='sales.feeddistribution')),
+                ('farmer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_receivables', to='sales.farmer')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'due_date'], name='receivable_status_due_idx'), models.Index(fields=['farmer', 'status'], name='receivable_farmer_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0009_feedreceivable'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chickrequest',
+            index=models.Index(fields=['status', 'is_picked', 'approval_date'], name='chickreq_status_pick_appr_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chickrequest',
+            index=models.Index(fields=['farmer', 'submitted_on'], name='chickreq_farmer_submitted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chickrequest',
+            index=models.Index(condition=models.Q(('is_picked', False), ('status', 'approved')), fields=['approval_date', 'id'], name='chickreq_pickup_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feeddistribution',
+            index=models.Index(fields=['farmer', 'distribution_type', 'distribution_date'], name='feeddist_farmer_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedrequest',
+            index=models.Index(fields=['status', 'pickup_status', 'approved_on'], name='feedreq_status_pick_appr_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedrequest',
+            index=models.Index(condition=models.Q(('pickup_status', 'not_picked'), ('status', 'approved')), fields=['approved_on', 'id'], name='feedreq_pickup_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedstock',
+            index=models.Index(fields=['feed_type', 'quantity_bags', 'arrival_date'], name='feedstock_type_qty_arrival_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedstock',
+            index=models.Index(condition=models.Q(('quantity_bags__gt', 0)), fields=['feed_type', 'arrival_date'], name='feedstock_fifo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedstock',
+            index=models.Index(condition=models.Q(('quantity_bags__gt', 0)), fields=['arrival_date'], name='feedstock_fifo_any_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['payment_for', 'payment_date'], name='payment_for_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['related_feed_distribution', 'payment_for'], name='payment_dist_for_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['farmer', 'payment_for', 'payment_date'], name='payment_farmer_for_date_idx'),
+        ),
+    ]
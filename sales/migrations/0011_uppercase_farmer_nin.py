@@ -0,0 +1,39 @@
+from collections import defaultdict
+
+from django.db import migrations
+
+
+def uppercase_nins(apps, schema_editor):
+    Farmer = apps.get_model('sales', 'Farmer')
+    holders = defaultdict(list)
+    for farmer_id, nin in Farmer.objects.order_by('id').values_list('id', 'nin'):
+        holders[nin.strip().upper()].append((farmer_id, nin))
+
+    # farmers whose NINs differ only in case or spacing would share one NIN; the
+    # lookup (nin=<uppercased>) can't tell them apart, so they are merged or
+    # corrected by hand before this runs
+    clashes = {nin: rows for nin, rows in holders.items() if len(rows) > 1}
+    if clashes:
+        listed = '\n'.join(
+            f'  {nin}: ' + ', '.join(f'farmer #{farmer_id} ({original!r})' for farmer_id, original in rows)
+            for nin, rows in sorted(clashes.items())
+        )
+        raise RuntimeError(
+            f'{len(clashes)} NIN(s) are held by more than one farmer once uppercased. '
+            f'Fix or merge these farmers, then migrate again:\n{listed}'
+        )
+
+    for normalized, [(farmer_id, nin)] in holders.items():
+        if nin != normalized:
+            Farmer.objects.filter(id=farmer_id).update(nin=normalized)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0010_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(uppercase_nins, migrations.RunPython.noop),
+    ]
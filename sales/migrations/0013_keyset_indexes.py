@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0012_farmer_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feeddistribution',
+            index=models.Index(fields=['distribution_date', 'id'], name='feeddist_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedrequest',
+            index=models.Index(fields=['status', 'submitted_on', 'id'], name='feedreq_status_submitted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedrequest',
+            index=models.Index(fields=['submitted_on', 'id'], name='feedreq_submitted_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedstock',
+            index=models.Index(fields=['arrival_date', 'id'], name='feedstock_arrival_id_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0014_list_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chickrequest',
+            index=models.Index(condition=models.Q(('is_picked', True)), fields=['picked_on'], name='chickreq_picked_on_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedreceivable',
+            index=models.Index(fields=['updated_on'], name='receivable_updated_idx'),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from datetime import date
 from django.conf import settings
 from manager.models import ChickStock
@@ -28,6 +28,18 @@ class Farmer(models.Model):
     contact = models.CharField(max_length=15)
     farmer_type = models.CharField(max_length=10, choices=FARMER_TYPE_CHOICES, default='starter')
 
+    class Meta:
+        indexes = [
+            # keyset pagination of the manager's farmer list
+            models.Index(fields=['name', 'id'], name='farmer_name_id_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # NINs are stored uppercased so lookups can hit the unique index with `nin=`
+        # instead of a case-insensitive scan
+        self.nin = (self.nin or '').strip().upper()
+        super().save(*args, **kwargs)
+
     @property
     def age(self):
         today = date.today()
@@ -81,6 +93,18 @@ class ChickRequest(models.Model):
     )
     decision_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'is_picked', 'approval_date'], name='chickreq_status_pick_appr_idx'),
+            models.Index(fields=['farmer', 'submitted_on'], name='chickreq_farmer_submitted_idx'),
+            models.Index(fields=['submitted_on', 'id'], name='chickreq_submitted_id_idx'),
+            # pickup queue: approved & not yet picked, oldest approval first
+            models.Index(fields=['approval_date', 'id'], name='chickreq_pickup_queue_idx',
+                         condition=models.Q(status='approved', is_picked=False)),
+            # pickups per day (sales report)
+            models.Index(fields=['picked_on'], name='chickreq_picked_on_idx', condition=models.Q(is_picked=True)),
+        ]
+
     def __str__(self):
         return f"Request #{self.id} - {self.farmer.name}"
 
@@ -123,9 +147,26 @@ class FeedStock(models.Model):
     expiry_date = models.DateField(blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['feed_type', 'quantity_bags', 'arrival_date'], name='feedstock_type_qty_arrival_idx'),
+            # FIFO scans only look at batches that still have bags
+            models.Index(fields=['feed_type', 'arrival_date'], name='feedstock_fifo_idx',
+                         condition=models.Q(quantity_bags__gt=0)),
+            models.Index(fields=['arrival_date'], name='feedstock_fifo_any_idx',
+                         condition=models.Q(quantity_bags__gt=0)),
+            # keyset pagination of the stock history tab
+            models.Index(fields=['arrival_date', 'id'], name='feedstock_arrival_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.get_feed_type_display()} - {self.quantity_bags} bags"
 
+    def save(self, *args, **kwargs):
+        # the stock summary is bumped by post_save (manager.signals); commit both or neither
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+
 
 
 # FeedDistribution model
@@ -143,6 +184,12 @@ class FeedDistribution(models.Model):
     recorded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
     notes = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['farmer', 'distribution_type', 'distribution_date'], name='feeddist_farmer_type_date_idx'),
+            models.Index(fields=['distribution_date', 'id'], name='feeddist_date_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.farmer.name} - {self.get_distribution_type_display()} - {self.quantity_bags} bags"
 
@@ -163,9 +210,23 @@ class Payment(models.Model):
     notes = models.TextField(blank=True, null=True)
     received_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['payment_for', 'payment_date'], name='payment_for_date_idx'),
+            models.Index(fields=['related_feed_distribution', 'payment_for'], name='payment_dist_for_idx'),
+            models.Index(fields=['farmer', 'payment_for', 'payment_date'], name='payment_farmer_for_date_idx'),
+            models.Index(fields=['payment_date', 'id'], name='payment_date_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.farmer.name} - {self.payment_for} - UGX {self.amount}"
 
+    def save(self, *args, **kwargs):
+        # revenue rollups, report snapshots and the receivables ledger follow in
+        # post_save (manager.signals, sales.signals); commit them with the payment
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+
 
 class FeedRequest(models.Model):
     FEED_TYPE_CHOICES = (
@@ -203,7 +264,44 @@ class FeedRequest(models.Model):
 
     class Meta:
         ordering = ['-submitted_on']
+        indexes = [
+            models.Index(fields=['status', 'pickup_status', 'approved_on'], name='feedreq_status_pick_appr_idx'),
+            models.Index(fields=['approved_on', 'id'], name='feedreq_pickup_queue_idx',
+                         condition=models.Q(status='approved', pickup_status='not_picked')),
+            # keyset pagination of the manager's request tabs
+            models.Index(fields=['status', 'submitted_on', 'id'], name='feedreq_status_submitted_idx'),
+            models.Index(fields=['submitted_on', 'id'], name='feedreq_submitted_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.farmer.name} - {self.quantity_bags} bags ({self.feed_type})"
 
+
+
+# Feed receivables ledger: one row per initial (deferred-payment) feed allocation.
+# Kept in sync by sales.signals; see sales/receivables.py.
+class FeedReceivable(models.Model):
+    STATUS_CHOICES = (
+        ('open', 'Open'),
+        ('paid', 'Paid'),
+    )
+
+    distribution = models.OneToOneField(FeedDistribution, on_delete=models.CASCADE, related_name='receivable')
+    farmer = models.ForeignKey(Farmer, on_delete=models.CASCADE, related_name='feed_receivables')
+    charged = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    paid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    due_date = models.DateField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='open')
+    updated_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'due_date'], name='receivable_status_due_idx'),
+            models.Index(fields=['farmer', 'status'], name='receivable_farmer_status_idx'),
+            # rows changed since the debtor snapshot (manager.snapshots)
+            models.Index(fields=['updated_on'], name='receivable_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.farmer.name} - UGX {self.balance} ({self.get_status_display()})"
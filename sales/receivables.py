@@ -0,0 +1,162 @@
+"""
+Feed receivables ledger.
+
+Every initial (2-bag, pay-later) FeedDistribution has one FeedReceivable row
+holding what was charged at the batch sale price, what has been paid against
+it, the balance, the due date and an open/paid status. Reports query the
+ledger with indexed filters instead of re-pricing every distribution.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum, F
+
+from sales.models import FeedDistribution, FeedReceivable, FeedStock, Payment
+
+
+ZERO = Decimal('0')
+
+
+def _charge_for(distribution):
+    unit = distribution.feed_stock.sale_price if distribution.feed_stock else ZERO
+    return (unit or ZERO) * Decimal(distribution.quantity_bags or 0)
+
+
+def _status_for(balance):
+    return 'open' if balance > 0 else 'paid'
+
+
+def refresh_receivable(distribution_id):
+    """Recompute the ledger row of one distribution (creates or removes it as needed)."""
+    distribution = (FeedDistribution.objects
+                    .select_related('feed_stock')
+                    .filter(id=distribution_id)
+                    .first())
+    if distribution is None or distribution.distribution_type != 'initial':
+        FeedReceivable.objects.filter(distribution_id=distribution_id).delete()
+        return None
+
+    paid = (Payment.objects
+            .filter(related_feed_distribution_id=distribution_id, payment_for='feeds')
+            .aggregate(s=Sum('amount'))['s'] or ZERO)
+    charged = _charge_for(distribution)
+    balance = charged - paid
+
+    receivable, _ = FeedReceivable.objects.update_or_create(
+        distribution=distribution,
+        defaults=dict(
+            farmer_id=distribution.farmer_id,
+            charged=charged,
+            paid=paid,
+            balance=balance,
+            due_date=distribution.due_date,
+            status=_status_for(balance),
+        ),
+    )
+    return receivable
+
+
+def create_receivables(distributions):
+    """Open ledger rows for freshly bulk-created initial distributions (no payments yet)."""
+    distributions = [d for d in distributions if d.distribution_type == 'initial']
+    prices = dict(FeedStock.objects
+                  .filter(id__in={d.feed_stock_id for d in distributions})
+                  .values_list('id', 'sale_price'))
+    rows = []
+    for d in distributions:
+        charged = (prices.get(d.feed_stock_id) or ZERO) * Decimal(d.quantity_bags or 0)
+        rows.append(FeedReceivable(
+            distribution_id=d.id,
+            farmer_id=d.farmer_id,
+            charged=charged,
+            balance=charged,
+            due_date=d.due_date,
+            status=_status_for(charged),
+        ))
+    return FeedReceivable.objects.bulk_create(rows)
+
+
+@transaction.atomic
+def rebuild_receivables(chunk_size=2000):
+    """Rebuild the whole ledger from FeedDistribution/Payment rows. Returns the row count."""
+    paid_by_dist = dict(
+        Payment.objects
+        .filter(related_feed_distribution__distribution_type='initial', payment_for='feeds')
+        .values('related_feed_distribution')
+        .annotate(s=Sum('amount'))
+        .values_list('related_feed_distribution', 's')
+    )
+
+    FeedReceivable.objects.all().delete()
+    batch = []
+    created = 0
+    distributions = (FeedDistribution.objects
+                     .filter(distribution_type='initial')
+                     .select_related('feed_stock')
+                     .order_by('id'))
+    for distribution in distributions.iterator(chunk_size=chunk_size):
+        charged = _charge_for(distribution)
+        paid = paid_by_dist.get(distribution.id) or ZERO
+        batch.append(FeedReceivable(
+            distribution_id=distribution.id,
+            farmer_id=distribution.farmer_id,
+            charged=charged,
+            paid=paid,
+            balance=charged - paid,
+            due_date=distribution.due_date,
+            status=_status_for(charged - paid),
+        ))
+        if len(batch) >= chunk_size:
+            FeedReceivable.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+    FeedReceivable.objects.bulk_create(batch)
+    return created + len(batch)
+
+
+# ---------------------- report queries ----------------------
+
+def open_receivables():
+    return FeedReceivable.objects.filter(status='open')
+
+
+def overdue_count(today):
+    return open_receivables().filter(due_date__lt=today).count()
+
+
+async def aoverdue_count(today):
+    return await open_receivables().filter(due_date__lt=today).acount()
+
+
+def due_soon_count(today, days=7):
+    return open_receivables().filter(due_date__gte=today, due_date__lte=today + timedelta(days=days)).count()
+
+
+def receivable_totals():
+    """Lifetime charged / paid / balance over all initial allocations."""
+    row = FeedReceivable.objects.aggregate(value=Sum('charged'), paid=Sum('paid'), balance=Sum('balance'))
+    return {key: value or ZERO for key, value in row.items()}
+
+
+def debtor_totals(receivables=None):
+    """Charged, paid and balance per farmer over `receivables` (default: the whole ledger)."""
+    receivables = FeedReceivable.objects.all() if receivables is None else receivables
+    return (receivables
+            .values('farmer_id', 'farmer__name')
+            .annotate(total_value=Sum('charged'), total_paid=Sum('paid'))
+            .annotate(balance=F('total_value') - F('total_paid')))
+
+
+def top_debtors(limit=10):
+    """Farmers with the largest outstanding initial-feed balance (net of overpayments)."""
+    rows = debtor_totals().filter(balance__gt=0).order_by('-balance')[:limit]
+    return [
+        {
+            'farmer__name': row['farmer__name'],
+            'total_value': row['total_value'],
+            'total_paid': row['total_paid'],
+            'balance': row['balance'],
+        }
+        for row in rows
+    ]
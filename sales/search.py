@@ -0,0 +1,183 @@
+"""
+Farmer search backed by a database-side index instead of icontains scans.
+
+SQLite: an FTS5 table `sales_farmer_fts` with the trigram tokenizer, kept in
+sync with sales_farmer by triggers (so bulk_create and raw SQL are covered).
+Every query word of 3+ characters must appear somewhere in the searched
+columns (substring, so prefixes match too); results are ranked by bm25. When
+nothing matches, the query falls back to a fuzzy pass: candidates sharing any
+trigram with the query are scored by trigram similarity, like pg_trgm does.
+
+PostgreSQL: pg_trgm GIN indexes on the searched columns, ranked by word
+similarity.
+
+Other backends (and queries shorter than 3 characters) use icontains.
+
+`search_farmers(q)` returns a Farmer queryset, best match first, ready for the
+Paginator. Django rebuilds SQLite tables on some ALTERs, which drops the
+triggers; run `manage.py rebuild_farmer_search` after such a migration.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Case, When, Value, IntegerField, Q
+
+from sales.models import Farmer
+
+
+SEARCH_FIELDS = ('name', 'nin', 'recommender', 'recommender_nin', 'contact')
+FTS_TABLE = 'sales_farmer_fts'
+MAX_RESULTS = 200        # ranked hits kept per search; nobody pages past this
+FUZZY_THRESHOLD = 0.3    # same default as pg_trgm.similarity_threshold
+
+
+# -------------------- index maintenance --------------------
+
+def _sqlite_index_sql():
+    table = Farmer._meta.db_table
+    cols = ', '.join(SEARCH_FIELDS)
+    new_cols = ', '.join(f'new.{c}' for c in SEARCH_FIELDS)
+    old_cols = ', '.join(f'old.{c}' for c in SEARCH_FIELDS)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"{cols}, content='{table}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, {cols}) VALUES (new.id, {new_cols}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {table} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+        f"INSERT INTO {FTS_TABLE}(rowid, {cols}) VALUES (new.id, {new_cols}); END",
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+    ]
+
+
+def _postgres_index_sql():
+    table = Farmer._meta.db_table
+    return ["CREATE EXTENSION IF NOT EXISTS pg_trgm"] + [
+        f"CREATE INDEX IF NOT EXISTS {table}_{field}_trgm ON {table} USING gin ({field} gin_trgm_ops)"
+        for field in SEARCH_FIELDS
+    ]
+
+
+def install_search_index(conn=connection):
+    """Create (or repair) the search index for the current backend and fill it."""
+    if conn.vendor == 'sqlite':
+        statements = _sqlite_index_sql()
+    elif conn.vendor == 'postgresql':
+        statements = _postgres_index_sql()
+    else:
+        return
+    with conn.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def drop_search_index(conn=connection):
+    table = Farmer._meta.db_table
+    if conn.vendor == 'sqlite':
+        statements = [f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}" for suffix in ('ai', 'ad', 'au')]
+        statements.append(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif conn.vendor == 'postgresql':
+        statements = [f"DROP INDEX IF EXISTS {table}_{field}_trgm" for field in SEARCH_FIELDS]
+    else:
+        return
+    with conn.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+# -------------------- querying --------------------
+
+def _words(q):
+    return [w for w in re.split(r'\s+', q.lower()) if w]
+
+
+def _phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _trigrams(word):
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(query, text):
+    """pg_trgm-style word similarity: each query word vs. its closest word in `text`."""
+    words = _words(query)
+    candidates = [_trigrams(w) for w in _words(text or '')]
+    if not words or not candidates:
+        return 0.0
+    total = 0.0
+    for word in words:
+        grams = _trigrams(word)
+        total += max(len(grams & c) / len(grams | c) for c in candidates)
+    return total / len(words)
+
+
+def _fts_ids(match):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY rank LIMIT %s",
+            [match, MAX_RESULTS],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _sqlite_ranked_ids(q):
+    words = _words(q)
+    if any(len(w) < 3 for w in words):
+        return None  # the trigram index can't look up 1-2 character words
+
+    ids = _fts_ids(' AND '.join(_phrase(w) for w in words))
+    if ids:
+        return ids
+
+    # fuzzy pass: anything sharing a trigram with the query, scored in Python
+    grams = {w[i:i + 3] for w in words for i in range(len(w) - 2)}
+    candidate_ids = _fts_ids(' OR '.join(_phrase(g) for g in sorted(grams)))
+    scored = []
+    for row in Farmer.objects.filter(id__in=candidate_ids).values_list('id', *SEARCH_FIELDS):
+        score = max(similarity(q, value) for value in row[1:])
+        if score >= FUZZY_THRESHOLD:
+            scored.append((-score, row[0]))
+    return [farmer_id for _, farmer_id in sorted(scored)]
+
+
+def _in_rank_order(ids):
+    if not ids:
+        return Farmer.objects.none()
+    order = Case(*[When(id=farmer_id, then=Value(pos)) for pos, farmer_id in enumerate(ids)],
+                 output_field=IntegerField())
+    return Farmer.objects.filter(id__in=ids).order_by(order)
+
+
+def _icontains(q):
+    condition = Q()
+    for field in SEARCH_FIELDS:
+        condition |= Q(**{f'{field}__icontains': q})
+    return Farmer.objects.filter(condition).order_by('name')
+
+
+def search_farmers(q):
+    """Farmers matching `q` on name, NIN, recommender or contact, best match first."""
+    q = (q or '').strip()
+    if not q:
+        return Farmer.objects.none()
+
+    if connection.vendor == 'sqlite':
+        ids = _sqlite_ranked_ids(q)
+        return _icontains(q) if ids is None else _in_rank_order(ids)
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramWordSimilarity
+        from django.db.models.functions import Greatest
+
+        rank = Greatest(*[TrigramWordSimilarity(q, field) for field in SEARCH_FIELDS])
+        matched = Q(search_rank__gte=FUZZY_THRESHOLD)
+        for field in SEARCH_FIELDS:
+            matched |= Q(**{f'{field}__icontains': q})
+        return (Farmer.objects.annotate(search_rank=rank)
+                .filter(matched).order_by('-search_rank', 'name'))
+
+    return _icontains(q)
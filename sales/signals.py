@@ -0,0 +1,38 @@
+"""
+Keep the feed receivables ledger (sales.receivables) in step with
+FeedDistribution and Payment writes.
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from sales.models import FeedDistribution, Payment
+from sales.receivables import refresh_receivable
+
+
+@receiver(post_save, sender=FeedDistribution)
+def distribution_saved(sender, instance, **kwargs):
+    if instance.distribution_type == 'initial' or not kwargs.get('created'):
+        refresh_receivable(instance.id)
+
+
+@receiver(pre_save, sender=Payment)
+def payment_pre_save(sender, instance, **kwargs):
+    instance._receivable_before = None
+    if not instance._state.adding and instance.pk:
+        instance._receivable_before = (Payment.objects
+                                       .filter(pk=instance.pk)
+                                       .values_list('related_feed_distribution_id', flat=True)
+                                       .first())
+
+
+@receiver(post_save, sender=Payment)
+def payment_saved(sender, instance, **kwargs):
+    affected = {instance.related_feed_distribution_id, getattr(instance, '_receivable_before', None)}
+    for distribution_id in affected - {None}:
+        refresh_receivable(distribution_id)
+
+
+@receiver(post_delete, sender=Payment)
+def payment_deleted(sender, instance, **kwargs):
+    if instance.related_feed_distribution_id:
+        refresh_receivable(instance.related_feed_distribution_id)
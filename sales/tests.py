@@ -1,3 +1,434 @@
-from django.test import TestCase
+import io
+import threading
+import time
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+from importlib import import_module
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection, transaction
+from django.db.models import F, Sum
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from manager.models import ChickAllocation, ChickStock, DebtorSnapshot, ReportSnapshot
+from manager.snapshots import report_totals, top_debtors as snapshot_top_debtors
+from home.models import Job, User
+from manager.summaries import chick_stock_totals, feed_stock_totals, rebuild_summaries
+from manager.exports import xlsx_chunks
+from sales.imports import import_farmers, read_rows
+from sales.inventory import allocate_chicks, allocate_feeds, InsufficientStock
+from sales.models import ChickRequest, Farmer, FeedDistribution, FeedReceivable, FeedStock, Payment
+from sales.receivables import (
+    rebuild_receivables, receivable_totals, top_debtors, overdue_count, due_soon_count
+)
+from sales.search import search_farmers
+from sales.views import peek_fifo_cost, peek_fifo_costs
+
+
+def make_farmer(n, **extra):
+    return Farmer.objects.create(
+        name=f'Farmer {n}', dob=date(2000, 1, 1), gender='F', nin=f'CF{n:012d}',
+        recommender='Stella', recommender_nin='CF999999999999', contact='0700000003', **extra
+    )
+
+
+def make_feed_stock(bags=50, feed_type='starter', sale_price='100000', arrival_date=None):
+    return FeedStock.objects.create(
+        feed_type=feed_type, quantity_bags=bags, purchase_price=Decimal('80000'),
+        sale_price=Decimal(sale_price), arrival_date=arrival_date or date.today(),
+    )
+
+
+class FeedReceivableLedgerTests(TestCase):
+
+    def setUp(self):
+        self.today = date.today()
+        self.stock = make_feed_stock()
+        self.farmer = make_farmer(1)
+
+    def issue(self, farmer, bags=2, due_in=60):
+        return FeedDistribution.objects.create(
+            farmer=farmer, feed_stock=self.stock, distribution_type='initial',
+            quantity_bags=bags, due_date=self.today + timedelta(days=due_in),
+        )
+
+    def test_ledger_follows_distributions_and_payments(self):
+        dist = self.issue(self.farmer)
+        receivable = dist.receivable
+        self.assertEqual(receivable.charged, Decimal('200000'))
+        self.assertEqual(receivable.status, 'open')
+
+        payment = Payment.objects.create(farmer=self.farmer, amount=Decimal('150000'),
+                                         payment_for='feeds', related_feed_distribution=dist)
+        receivable.refresh_from_db()
+        self.assertEqual(receivable.balance, Decimal('50000'))
+
+        Payment.objects.create(farmer=self.farmer, amount=Decimal('50000'),
+                               payment_for='feeds', related_feed_distribution=dist)
+        receivable.refresh_from_db()
+        self.assertEqual(receivable.status, 'paid')
+
+        payment.delete()
+        receivable.refresh_from_db()
+        self.assertEqual(receivable.balance, Decimal('150000'))
+
+        # purchases are paid upfront and never enter the ledger
+        FeedDistribution.objects.create(farmer=self.farmer, feed_stock=self.stock,
+                                        distribution_type='purchase', quantity_bags=3)
+        self.assertEqual(FeedReceivable.objects.count(), 1)
+
+    def test_report_queries_and_backfill(self):
+        other = make_farmer(2)
+        self.issue(self.farmer, due_in=-1)
+        self.issue(self.farmer, due_in=3)
+        paid_dist = self.issue(other, bags=1, due_in=-5)
+        Payment.objects.create(farmer=other, amount=Decimal('100000'),
+                               payment_for='feeds', related_feed_distribution=paid_dist)
+
+        self.assertEqual(overdue_count(self.today), 1)
+        self.assertEqual(due_soon_count(self.today), 1)
+        self.assertEqual(receivable_totals()['balance'], Decimal('400000'))
+        self.assertEqual([d['farmer__name'] for d in top_debtors()], ['Farmer 1'])
+
+        before = sorted(FeedReceivable.objects.values_list('distribution_id', 'balance', 'status'))
+        FeedReceivable.objects.all().delete()
+        self.assertEqual(rebuild_receivables(chunk_size=2), 3)
+        after = sorted(FeedReceivable.objects.values_list('distribution_id', 'balance', 'status'))
+        self.assertEqual(before, after)
+
+
+class PickupLedgerTests(TestCase):
+
+    def setUp(self):
+        self.sales = User.objects.create_user(username='peter', password='pw', role='sales_rep')
+        self.client.force_login(self.sales)
+        self.farmer = make_farmer(30)
+        ChickStock.objects.create(chick_type='broiler_local', quantity=100, age_days=1)
+        make_feed_stock(bags=10)
+        self.request = ChickRequest.objects.create(farmer=self.farmer, chick_type='broiler_local',
+                                                   quantity=20, status='approved')
+
+    def test_pickup_brings_the_ledger_up_to_date(self):
+        url = reverse('mark_request_as_picked', args=[self.request.id])
+        self.client.post(url, {'paid_chicks': '33000', 'paid_feeds': '50000'})
+        # the feed payment is on the ledger as soon as the pickup is recorded
+        receivable = FeedReceivable.objects.get()
+        self.assertEqual((receivable.charged, receivable.paid, receivable.balance),
+                         (Decimal('200000'), Decimal('50000'), Decimal('150000')))
+        # the only work left for the worker is the day's report snapshot freeze
+        self.assertEqual(list(Job.objects.values_list('name', flat=True)), ['manager.freeze_report_snapshots'])
+
+    def test_pickup_paid_in_full_is_settled(self):
+        url = reverse('mark_request_as_picked', args=[self.request.id])
+        self.client.post(url, {'paid_chicks': '33000', 'paid_feeds': '200000'})
+        self.assertEqual(FeedReceivable.objects.get().status, 'paid')
+        self.assertFalse(top_debtors())
+
+
+class FifoAllocatorTests(TestCase):
+
+    def setUp(self):
+        self.farmer = make_farmer(10)
+
+    def test_feeds_are_taken_oldest_first_across_batches(self):
+        old = make_feed_stock(bags=1, arrival_date=date.today() - timedelta(days=9))
+        new = make_feed_stock(bags=5)
+        dists = allocate_feeds(self.farmer, 2, 'initial', due_date=date.today())
+        self.assertEqual([(d.feed_stock_id, d.quantity_bags) for d in dists], [(old.id, 1), (new.id, 1)])
+        self.assertEqual(FeedReceivable.objects.filter(status='open').count(), 2)
+        self.assertEqual(feed_stock_totals()['starter'], 4)
+
+    def test_shortfall_rolls_everything_back(self):
+        batch = ChickStock.objects.create(chick_type='layer_local', quantity=5, age_days=1)
+        req = ChickRequest.objects.create(farmer=self.farmer, chick_type='layer_local', quantity=8)
+        with self.assertRaises(InsufficientStock):
+            allocate_chicks(req)
+        batch.refresh_from_db()
+        self.assertEqual(batch.quantity, 5)
+        self.assertFalse(ChickAllocation.objects.exists())
+        self.assertEqual(chick_stock_totals()['layer_local'], 5)
+
+
+class ConcurrentPickupStressTests(TransactionTestCase):
+    THREADS = 8
+    PICKUPS_PER_THREAD = 6
+
+    def test_concurrent_pickups_never_oversell(self):
+        farmer = make_farmer(20)
+        for _ in range(3):
+            ChickStock.objects.create(chick_type='broiler_local', quantity=100, age_days=1)
+        make_feed_stock(bags=40)
+        requests = [
+            ChickRequest.objects.create(farmer=farmer, chick_type='broiler_local', quantity=7, status='approved')
+            for _ in range(self.THREADS * self.PICKUPS_PER_THREAD)
+        ]
+        barrier = threading.Barrier(self.THREADS)
+        outcomes = []
+
+        def worker(batch):
+            barrier.wait()
+            try:
+                for req in batch:
+                    while True:
+                        try:
+                            with transaction.atomic():
+                                allocate_chicks(req)
+                                allocate_feeds(farmer, 2, 'initial', allow_partial=True)
+                            outcomes.append('ok')
+                            break
+                        except InsufficientStock:
+                            outcomes.append('short')
+                            break
+                        except OperationalError:
+                            time.sleep(0.001)  # SQLite writer lock; retry
+            finally:
+                connection.close()
+
+        chunks = [requests[i::self.THREADS] for i in range(self.THREADS)]
+        threads = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(outcomes), len(requests))
+        self.assertFalse(ChickStock.objects.filter(quantity__lt=0).exists())
+        self.assertFalse(FeedStock.objects.filter(quantity_bags__lt=0).exists())
+
+        allocated = ChickAllocation.objects.aggregate(n=Sum('quantity'))['n'] or 0
+        remaining = ChickStock.objects.aggregate(n=Sum('quantity'))['n']
+        self.assertEqual(allocated + remaining, 300)
+        self.assertEqual(allocated, 7 * outcomes.count('ok'))
+        self.assertEqual(outcomes.count('ok'), 300 // 7)
+
+        issued = FeedDistribution.objects.aggregate(n=Sum('quantity_bags'))['n']
+        self.assertEqual(issued, 40)
+        self.assertEqual(rebuild_summaries(apply=False), [])
+
+
+class FifoCostPeekTests(TestCase):
+
+    def setUp(self):
+        today = date.today()
+        self.oldest = make_feed_stock(bags=1, sale_price='90000', arrival_date=today - timedelta(days=20))
+        make_feed_stock(bags=3, sale_price='100000', arrival_date=today - timedelta(days=10))
+        make_feed_stock(bags=9, sale_price='120000', arrival_date=today)
+        make_feed_stock(bags=4, feed_type='grower', sale_price='70000', arrival_date=today - timedelta(days=30))
+        FeedStock.objects.create(feed_type='starter', quantity_bags=0, purchase_price=Decimal('1'),
+                                 sale_price=Decimal('1'), arrival_date=today - timedelta(days=40))
+
+    def test_single_type_fetches_only_consumed_batches(self):
+        with self.assertNumQueries(1):
+            enough, total, breakdown = peek_fifo_cost(3, feed_type='starter', with_breakdown=True)
+        self.assertTrue(enough)
+        self.assertEqual(total, Decimal('290000'))
+        self.assertEqual([b['bags'] for b in breakdown], [1, 2])
+
+    def test_any_type_and_shortfall(self):
+        self.assertEqual(peek_fifo_cost(2), (True, Decimal('140000'), []))
+        enough, total, _ = peek_fifo_cost(20, feed_type='starter')
+        self.assertFalse(enough)
+        self.assertEqual(total, Decimal('1470000'))
+
+    def test_batch_quote_in_one_query(self):
+        with self.assertNumQueries(1):
+            quotes = peek_fifo_costs([('starter', 2), ('grower', 5), ('finisher', 1), ('starter', 2)])
+        self.assertEqual(quotes['starter'], (True, Decimal('390000'), []))
+        self.assertEqual(quotes['grower'], (False, Decimal('280000'), []))
+        self.assertEqual(quotes['finisher'], (False, Decimal('0'), []))
+
+
+class FarmerSearchTests(TestCase):
+
+    def setUp(self):
+        self.grace = Farmer.objects.create(
+            name='Nakato Grace', dob=date(2001, 1, 1), gender='F', nin='CF123456789012',
+            recommender='Okello Simon', recommender_nin='CM999999999999', contact='0772123456')
+        self.gracious = Farmer.objects.create(
+            name='Gracious Atim', dob=date(2001, 1, 1), gender='F', nin='CF555555555555',
+            recommender='Nambi Ruth', recommender_nin='CF999999999999', contact='0701999888')
+        self.peter = Farmer.objects.create(
+            name='Mugisha Peter', dob=date(2001, 1, 1), gender='M', nin='CM777777777777',
+            recommender='Nakato Grace', recommender_nin='CF123456789012', contact='0755000111')
+
+    def names(self, q):
+        return [f.name for f in search_farmers(q)]
+
+    def test_prefix_and_multi_word_matches(self):
+        self.assertEqual(set(self.names('grac')), {'Nakato Grace', 'Gracious Atim', 'Mugisha Peter'})
+        self.assertEqual(self.names('nakato grace')[0], 'Nakato Grace')
+        self.assertEqual(self.names('okello'), ['Nakato Grace'])
+        self.assertEqual(self.names('0755'), ['Mugisha Peter'])
+        self.assertEqual(self.names('cm7777'), ['Mugisha Peter'])
+
+    def test_fuzzy_match_on_typos(self):
+        self.assertEqual(self.names('mugsha')[0], 'Mugisha Peter')
+        self.assertEqual(self.names('zzzzzz'), [])
+
+    def test_index_follows_inserts_updates_and_deletes(self):
+        Farmer.objects.bulk_create([Farmer(
+            name='Kato Brian', dob=date(2001, 1, 1), gender='M', nin='CM111111111111',
+            recommender='X', recommender_nin='CM000000000000', contact='0700000000')])
+        self.assertEqual(self.names('brian'), ['Kato Brian'])
+
+        self.peter.name = 'Mugisha Paul'
+        self.peter.save()
+        self.assertEqual(self.names('paul'), ['Mugisha Paul'])
+        self.assertEqual(self.names('peter'), [])
+
+        self.gracious.delete()
+        self.assertNotIn('Gracious Atim', self.names('gracious'))
+
+    def test_manager_farmers_view_uses_ranked_search(self):
+        manager = User.objects.create_user(username='manager', password='pw', role='brooder_manager')
+        self.client.force_login(manager)
+        response = self.client.get(reverse('manager_farmers'), {'q': 'okello'})
+        self.assertEqual([f.name for f in response.context['farmers']], ['Nakato Grace'])
+        self.assertEqual(response.context['results_count'], 1)
+
+
+class UppercaseNinMigrationTests(TestCase):
+    uppercase_nins = staticmethod(import_module('sales.migrations.0011_uppercase_farmer_nin').uppercase_nins)
+
+    def test_nins_are_uppercased_and_clashes_are_listed(self):
+        farmers = [make_farmer(n) for n in range(3)]
+        Farmer.objects.filter(id=farmers[0].id).update(nin='cf000000000000 ')
+        self.uppercase_nins(django_apps, None)
+        self.assertEqual(Farmer.objects.get(id=farmers[0].id).nin, 'CF000000000000')
+
+        Farmer.objects.filter(id=farmers[2].id).update(nin='cf000000000001')
+        with self.assertRaisesMessage(RuntimeError, f"farmer #{farmers[1].id} ('CF000000000001'), "
+                                                    f"farmer #{farmers[2].id} ('cf000000000001')"):
+            self.uppercase_nins(django_apps, None)
+        self.assertEqual(Farmer.objects.get(id=farmers[2].id).nin, 'cf000000000001')
+
+
+class FarmerListPaginationTests(TestCase):
+
+    def test_register_page_is_keyset_paginated_without_the_full_list(self):
+        for n in range(30):
+            make_farmer(n)
+        sales_rep = User.objects.create_user(username='rep', password='pw', role='sales_rep')
+        self.client.force_login(sales_rep)
+        response = self.client.get(reverse('register_farmer'))
+        self.assertNotIn('farmers', response.context)
+        page = response.context['page_obj']
+        self.assertEqual(len(page), 25)
+        self.assertEqual(page.count_label, '30')
+        response = self.client.get(reverse('register_farmer') + page.next_url)
+        self.assertEqual([f.name for f in response.context['page_obj']],
+                         [f'Farmer {n}' for n in range(4, -1, -1)])
+
+
+class FarmerImportTests(TestCase):
+    HEADER = 'name,dob,gender,nin,contact,recommender,recommender_nin'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='clerk', password='pw', role='sales_agent')
+        Farmer.objects.create(name='Existing', dob=date(2000, 1, 1), gender='F', nin='CF00000000000X',
+                              recommender='Ruth', recommender_nin='CF000000000009', contact='0700000000')
+        self.dob = date(date.today().year - 20, 1, 1).isoformat()
+
+    def csv(self, *lines):
+        return '\n'.join((self.HEADER,) + lines).encode()
+
+    def test_upload_reports_bad_rows_and_inserts_the_rest(self):
+        data = self.csv(
+            f'Good One,{self.dob},M,cm00000000000a,0700000001,Ruth,cf000000000009',
+            f'Good Two,{self.dob},female,CF00000000000B,0700000002,Ruth,CF000000000009',
+            f'Twin,{self.dob},M,CM00000000000A,0700000003,Ruth,CF000000000009',
+            f'Taken,{self.dob},F,CF00000000000X,0700000004,Ruth,CF000000000009',
+            f'Too Old,1950-01-01,M,CM00000000000C,0700000005,Ruth,CF000000000009',
+            f'Bad Nin,{self.dob},M,XX123,0700000006,Ruth,CF000000000009',
+            f'Long Contact,{self.dob},M,CM00000000000D,{"0" * 40},Ruth,CF000000000009',
+            f'{"N" * 101},{self.dob},M,CM00000000000E,0700000007,Ruth,CF000000000009',
+            '',
+        )
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('import_farmers'),
+                                    {'file': SimpleUploadedFile('farmers.csv', data)})
+        report = response.context['report']
+        self.assertEqual(report.created, 2)
+        self.assertEqual([line for line, _, _ in report.errors], [4, 5, 6, 7, 8, 9])
+        self.assertEqual(report.errors[4][2], 'Too long: contact (max 15).')
+        self.assertTrue(Farmer.objects.filter(nin='CM00000000000A', gender='M').exists())
+        self.assertTrue(Farmer.objects.filter(nin='CF00000000000B', gender='F').exists())
+        self.assertEqual(search_farmers('Good Two').get().nin, 'CF00000000000B')
+
+    def test_one_lookup_and_one_insert_per_chunk(self):
+        rows = [(i + 2, {'name': f'F{i}', 'dob': self.dob, 'gender': 'M', 'nin': f'CM{i:012d}',
+                         'contact': '0700000000', 'recommender': 'R', 'recommender_nin': 'CF000000000009'})
+                for i in range(250)]
+        with self.assertNumQueries(3 * 4):  # IN lookup + savepoint pair around the INSERT, 3 chunks
+            report = import_farmers(rows, chunk_size=100)
+        self.assertEqual(report.created, 250)
+
+    def test_xlsx_upload_and_dry_run(self):
+        workbook = b''.join(xlsx_chunks([
+            self.HEADER.split(','),
+            ['Excel Farmer', self.dob, 'F', 'CF00000000000E', '0700000009', 'Ruth', 'CF000000000009'],
+        ]))
+        report = import_farmers(read_rows(io.BytesIO(workbook), 'farmers.xlsx'), dry_run=True)
+        self.assertEqual((report.created, report.rejected), (1, 0))
+        self.assertFalse(Farmer.objects.filter(nin='CF00000000000E').exists())
+
+    def test_unreadable_uploads_are_reported_not_crashed_on(self):
+        def workbook(sheet):
+            buf = io.BytesIO()
+            with zipfile.ZipFile(buf, 'w') as zf:
+                zf.writestr('xl/sharedStrings.xml', '<sst xmlns="http://schemas.openxmlformats.org/'
+                                                    'spreadsheetml/2006/main"><si><t>name</t></si></sst>')
+                zf.writestr('xl/worksheets/sheet1.xml', sheet)
+            return buf.getvalue()
+
+        sheet = ('<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                 '<row><c r="A1" t="s"><v>{}</v></c></row></sheetData></worksheet>')
+        uploads = {
+            'cp1252.csv': f'{self.HEADER}\nZoë Nakato,{self.dob},F,CF00000000000Z,0700000001,Ruth,CF000000000009'
+                          .encode('cp1252'),
+            'broken.xlsx': workbook('<worksheet><sheetData><row>'),
+            'dangling.xlsx': workbook(sheet.format(7)),
+        }
+        self.client.force_login(self.user)
+        for name, data in uploads.items():
+            with self.subTest(name):
+                response = self.client.post(reverse('import_farmers'), {'file': SimpleUploadedFile(name, data)},
+                                            follow=True)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.context['messages']), 1)
+                self.assertIn('damaged' if name.endswith('.xlsx') else 'UTF-8',
+                              str(list(response.context['messages'])[0]))
+        self.assertFalse(Farmer.objects.filter(nin='CF00000000000Z').exists())
+
+
+class SeedDemoTests(TestCase):
+
+    def test_generates_consistent_data(self):
+        call_command('seed_demo', '--farmers', '20', '--chick-requests', '200', '--feed-requests', '100',
+                     '--days', '60', '--chick-batch-size', '300', stdout=io.StringIO())
+        self.assertEqual(ChickRequest.objects.count(), 200)
+
+        approved = ChickRequest.objects.filter(status='approved').annotate(allocated=Sum('allocations__quantity'))
+        self.assertTrue(approved.exists())
+        self.assertFalse(approved.exclude(allocated=F('quantity')).exists())
+        self.assertFalse(ChickAllocation.objects.filter(stock__recorded_on__gt=F('request__approval_date')).exists())
+        self.assertEqual(FeedReceivable.objects.count(),
+                         FeedDistribution.objects.filter(distribution_type='initial').count())
+        self.assertEqual(rebuild_summaries(apply=False), [])
+
+    def test_wipe_refreezes_the_report_snapshots(self):
+        args = ['--farmers', '20', '--chick-requests', '100', '--feed-requests', '20', '--days', '30']
+        call_command('seed_demo', *args, stdout=io.StringIO())
+        call_command('build_report_snapshots', stdout=io.StringIO())
+        call_command('seed_demo', *args, '--wipe', '--seed', '7', stdout=io.StringIO())
+
+        periods = {'all': (None, None)}
+        picked = ChickRequest.objects.filter(is_picked=True).aggregate(n=Sum('quantity'))['n']
+        self.assertEqual(report_totals(periods)['all']['chicks_picked'], picked)
+        self.assertGreater(ReportSnapshot.objects.count(), 0)
+        self.assertFalse(DebtorSnapshot.objects.exclude(farmer__in=Farmer.objects.all()).exists())
+        self.assertEqual(snapshot_top_debtors(), top_debtors())
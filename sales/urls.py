@@ -1,13 +1,14 @@
 from django.urls import path
 from sales.views import (
     sales_dashboard_view, submit_chick_request,
-    history_view, pickup_view, register_farmer,
+    history_view, pickup_view, register_farmer, import_farmers_view,
     edit_farmer, delete_farmer, mark_request_as_picked, feed_pickup_view, mark_feed_request_as_picked
 )
 
 urlpatterns = [
     path('', sales_dashboard_view, name='sales_dashboard'),
     path('farmers/', register_farmer, name='register_farmer'),
+    path('farmers/import/', import_farmers_view, name='import_farmers'),
     path('request/', submit_chick_request, name='submit_chick_request'),
     path('history/', history_view, name='sales_history'),
     path('pickup/', pickup_view, name='sales_pickup'),
@@ -5,22 +5,32 @@ from decimal import Decimal
 # Django
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.core.paginator import Paginator
 from django.utils import timezone
 from django.contrib.auth.decorators import login_required
 from django.urls import reverse
-from django.db.models import Sum
+from django.db import transaction
+from django.db.models import Sum, F, Case, When, Value, Window
 
 # Local apps
+from home.aio import alist, arender, gather
+from home.cache import invalidate, farmer_status_namespace
 from home.models import User  # TODO: drop when auth wiring is complete
-from manager.models import ChickStock
+from home.pagination import paginate
+from home.profiling import query_budget
+from manager.snapshots import queue_freeze
+from manager.summaries import achick_stock_totals, afeed_stock_totals, arevenue_totals
 from sales.models import (
     Farmer, ChickRequest, FeedRequest, FeedDistribution, FeedStock, Payment
 )
+from sales.imports import ImportFileError, import_farmers, read_rows
+from sales.inventory import allocate_chicks, allocate_feeds, InsufficientStock
+from sales.search import search_farmers
+from sales.receivables import aoverdue_count as receivables_aoverdue_count
 
 
 @login_required
-def sales_dashboard_view(request):
+@query_budget(13)
+async def sales_dashboard_view(request):
     today = date.today()
     week_start = today - timedelta(days=today.weekday())
 
@@ -34,48 +44,42 @@ def sales_dashboard_view(request):
                        .select_related('farmer')
                        .order_by('approved_on', 'id'))
 
-    pending_chick_count = pending_chick_qs.count()
-    pending_chick_qty   = pending_chick_qs.aggregate(n=Sum('quantity'))['n'] or 0
+    # every card is an independent read, so they are all started at once
+    reads = await gather(
+        pending_chick_count=pending_chick_qs.acount(),
+        pending_chick_qty=pending_chick_qs.aaggregate(n=Sum('quantity')),
+        pending_feed_count=pending_feed_qs.acount(),
+        pending_feed_bags=pending_feed_qs.aaggregate(n=Sum('quantity_bags')),
+        # --- Cash collected (today & this week) ---
+        today_cash=arevenue_totals(start=today, end=today),
+        week_cash=arevenue_totals(start=week_start),
+        # --- Quick stock snapshot (summary tables) ---
+        chick_stock=achick_stock_totals(),
+        feed_stock=afeed_stock_totals(),
+        # --- Overdue initial-feeds follow-ups (receivables ledger) ---
+        overdue_followups=receivables_aoverdue_count(today),
+        # small tables (limit to 10 rows each)
+        next_chick_pickups=alist(pending_chick_qs[:10]),
+        next_feed_pickups=alist(pending_feed_qs[:10]),
+    )
+
+    pending_chick_count = reads['pending_chick_count']
+    pending_chick_qty   = reads['pending_chick_qty']['n'] or 0
 
-    pending_feed_count = pending_feed_qs.count()
-    pending_feed_bags  = pending_feed_qs.aggregate(n=Sum('quantity_bags'))['n'] or 0
+    pending_feed_count = reads['pending_feed_count']
+    pending_feed_bags  = reads['pending_feed_bags']['n'] or 0
 
-    # --- Cash collected (today & this week) ---
-    today_chick_cash = Payment.objects.filter(payment_for='chicks', payment_date=today).aggregate(s=Sum('amount'))['s'] or Decimal('0')
-    today_feed_cash  = Payment.objects.filter(payment_for='feeds',  payment_date=today).aggregate(s=Sum('amount'))['s'] or Decimal('0')
+    today_chick_cash = reads['today_cash']['chicks']
+    today_feed_cash  = reads['today_cash']['feeds']
     today_total_cash = today_chick_cash + today_feed_cash
 
-    week_chick_cash = Payment.objects.filter(payment_for='chicks', payment_date__gte=week_start).aggregate(s=Sum('amount'))['s'] or Decimal('0')
-    week_feed_cash  = Payment.objects.filter(payment_for='feeds',  payment_date__gte=week_start).aggregate(s=Sum('amount'))['s'] or Decimal('0')
+    week_chick_cash = reads['week_cash']['chicks']
+    week_feed_cash  = reads['week_cash']['feeds']
     week_total_cash = week_chick_cash + week_feed_cash
 
-    # --- Quick stock snapshot ---
-    chicks_in_stock = ChickStock.objects.aggregate(n=Sum('quantity'))['n'] or 0
-    feed_bags_in_stock = FeedStock.objects.aggregate(n=Sum('quantity_bags'))['n'] or 0
-
-    # --- Overdue initial-feeds follow-ups (simple & readable) ---
-    # Value (bags * sale_price) vs paid (payments linked to that distribution)
-    initial_dists = (FeedDistribution.objects
-                     .filter(distribution_type='initial')
-                     .select_related('feed_stock', 'farmer'))
-    # preload payments for those distributions
-    dist_ids = list(initial_dists.values_list('id', flat=True))
-    paid_map = {}
-    if dist_ids:
-        for row in (Payment.objects
-                    .filter(related_feed_distribution_id__in=dist_ids, payment_for='feeds')
-                    .values('related_feed_distribution')
-                    .annotate(s=Sum('amount'))):
-            paid_map[row['related_feed_distribution']] = row['s'] or Decimal('0')
-
-    overdue_followups = 0
-    for fd in initial_dists:
-        unit = (fd.feed_stock.sale_price if fd.feed_stock and fd.feed_stock.sale_price else Decimal('0'))
-        value = unit * Decimal(fd.quantity_bags or 0)
-        paid  = paid_map.get(fd.id, Decimal('0'))
-        balance = value - paid
-        if balance > 0 and fd.due_date and fd.due_date < today:
-            overdue_followups += 1
+    chicks_in_stock = sum(reads['chick_stock'].values())
+    feed_bags_in_stock = sum(reads['feed_stock'].values())
+    overdue_followups = reads['overdue_followups']
 
     context = dict(
         # cards
@@ -94,10 +98,10 @@ def sales_dashboard_view(request):
         overdue_followups=overdue_followups,
 
         # small tables (limit to 10 rows each)
-        next_chick_pickups=pending_chick_qs[:10],
-        next_feed_pickups=pending_feed_qs[:10],
+        next_chick_pickups=reads['next_chick_pickups'],
+        next_feed_pickups=reads['next_feed_pickups'],
     )
-    return render(request, 'sales/dashboard.html', context)
+    return await arender(request, 'sales/dashboard.html', context)
 
 @login_required
 def register_farmer(request):
@@ -109,7 +113,7 @@ def register_farmer(request):
         dob = form_data['dob']
         gender = form_data['gender']
         contact = form_data['contact']
-        nin = form_data['nin']
+        nin = form_data['nin'].strip().upper()
         recommender = form_data['recommender']
         recommender_nin = form_data['recommender_nin'].strip().upper()
 
@@ -158,17 +162,39 @@ def register_farmer(request):
     
     
     
-    # On GET request, render the form
-    all_farmers = Farmer.objects.all().order_by('-id')
-    paginator = Paginator(all_farmers, 25)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # On GET request, render the form (newest farmers first, keyset-paginated)
+    page_obj = paginate(request, Farmer.objects.all(), ('-id',), count=True)
 
     return render(request, 'sales/register.html', {
-        'farmers': all_farmers,
         'page_obj': page_obj,
         })
 
+
+@login_required
+def import_farmers_view(request):
+    """Bulk registration from a CSV/XLSX of paper forms, with a per-row error report."""
+    report = None
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        if not upload:
+            messages.error(request, "Choose a .csv or .xlsx file to import.")
+            return redirect('import_farmers')
+        try:
+            report = import_farmers(read_rows(upload, upload.name),
+                                    dry_run=bool(request.POST.get('dry_run')))
+        except ImportFileError as e:
+            messages.error(request, str(e))
+            return redirect('import_farmers')
+
+        verb = "would be registered" if request.POST.get('dry_run') else "registered"
+        messages.success(request, f"{report.created} farmer{'s' if report.created != 1 else ''} {verb}; "
+                                  f"{report.rejected} row{'s' if report.rejected != 1 else ''} rejected.")
+
+    return render(request, 'sales/import_farmers.html', {
+        'report': report,
+        'errors': report.errors[:500] if report else [],
+        })
+
 def edit_farmer(request, farmer_id):
     farmer = get_object_or_404(Farmer, id=farmer_id)
     errors = {}
@@ -178,7 +204,7 @@ def edit_farmer(request, farmer_id):
         dob = request.POST.get('dob', '')
         gender = request.POST.get('gender', '')
         contact = request.POST.get('phone', '')
-        nin = request.POST.get('youth_nin', '').strip()
+        nin = request.POST.get('youth_nin', '').strip().upper()
         recommender = request.POST.get('recommender_name', '').strip()
         recommender_nin = request.POST.get('recommender_nin', '').strip()
 
@@ -298,12 +324,17 @@ def submit_chick_request(request):
             messages.success(request, f"Request for {quantity_bags} bags of {feed_type} feed submitted successfully.")
             return redirect(reverse('submit_chick_request') + '?tab=feed')
 
-    all_requests = ChickRequest.objects.all().order_by('-submitted_on')
+    # both lists are keyset-paginated; links keep the user on the tab they paged
+    chick_params = request.GET.copy()
+    chick_params['tab'] = 'chick'
+    all_requests = paginate(request, ChickRequest.objects.select_related('farmer'),
+                            ('-submitted_on', '-id'), param='requests', params=chick_params)
 
     # temporary: filter by default user until auth is ready
-    from home.models import User
-    default_user = User.objects.get(username=request.user)
-    feed_requests = FeedRequest.objects.filter(requested_by=request.user).order_by('-submitted_on')
+    feed_params = request.GET.copy()
+    feed_params['tab'] = 'feed'
+    feed_requests = paginate(request, FeedRequest.objects.filter(requested_by=request.user).select_related('farmer'),
+                             ('-submitted_on', '-id'), param='feed_requests', params=feed_params)
 
     return render(request, 'sales/submit_request.html', {
         'farmers': farmers,
@@ -313,7 +344,7 @@ def submit_chick_request(request):
 
 def history_view(request):
     """
-    Search a farmer by NIN (exact, case-insensitive) or by name (icontains),
+    Search a farmer by NIN (exact, stored uppercased) or via the search index,
     then show their chick + feed request history.
     """
     q = (request.GET.get('q') or '').strip()
@@ -322,11 +353,11 @@ def history_view(request):
     feed_requests = []
 
     if q:
-        # Prefer exact NIN match first
-        farmer = Farmer.objects.filter(nin__iexact=q).first()
+        # Prefer exact NIN match first (NINs are stored uppercased)
+        farmer = Farmer.objects.filter(nin=q.upper()).first()
         if not farmer:
-            # Fallback: partial name match (first result)
-            farmer = Farmer.objects.filter(name__icontains=q).order_by('name').first()
+            # Fallback: best ranked match from the farmer search index
+            farmer = search_farmers(q).first()
 
         if farmer:
             chick_requests = (ChickRequest.objects
@@ -345,6 +376,7 @@ def history_view(request):
     return render(request, 'sales/history.html', context)
 
 
+@query_budget(1)
 def pickup_view(request):
     approved_unpicked = (
         ChickRequest.objects
@@ -355,25 +387,28 @@ def pickup_view(request):
     return render(request, 'sales/pickup.html', {'requests': approved_unpicked})
 
 
-def peek_fifo_cost(qty_needed, feed_type=None, with_breakdown=False):
+def _fifo_window(qs, partition_by=None):
     """
-    Generic FIFO cost peek.
-    Returns (enough: bool, total: Decimal, breakdown: list[dict])
+    Annotate FeedStock rows with `consumed_before`: bags in older batches
+    (same partition), computed with SUM() OVER (ORDER BY arrival_date, id).
     """
+    running = Window(
+        expression=Sum('quantity_bags'),
+        partition_by=[F(partition_by)] if partition_by else None,
+        order_by=[F('arrival_date').asc(), F('id').asc()],
+    )
+    return qs.annotate(consumed_before=running - F('quantity_bags'))
+
+
+def _price_batches(batches, qty_needed, with_breakdown):
+    """Walk the (already trimmed) FIFO batches and price `qty_needed` bags."""
     remaining = int(qty_needed or 0)
     total = Decimal('0')
     breakdown = []
-
-    qs = FeedStock.objects.filter(quantity_bags__gt=0).order_by('arrival_date')
-    if feed_type:
-        qs = qs.filter(feed_type=feed_type)
-
-    for s in qs:
-        if remaining <= 0:
-            break
+    for s in batches:
         take = min(s.quantity_bags, remaining)
         if take <= 0:
-            continue
+            break
         unit = s.sale_price  # Decimal
         subtotal = unit * Decimal(take)
         total += subtotal
@@ -387,10 +422,53 @@ def peek_fifo_cost(qty_needed, feed_type=None, with_breakdown=False):
                 'supplier': getattr(s.supplier, 'name', None),
             })
         remaining -= take
-
     return (remaining == 0, total, breakdown if with_breakdown else [])
 
 
+def peek_fifo_costs(demands, with_breakdown=False):
+    """
+    Batch FIFO quote: price several (feed_type, qty) demands in one query.
+    Only the batches each demand would actually consume are fetched.
+    Returns {feed_type: (enough, total, breakdown)}; repeated feed types are summed.
+    """
+    needed = {}
+    for feed_type, qty in demands:
+        needed[feed_type] = needed.get(feed_type, 0) + int(qty or 0)
+    if not needed:
+        return {}
+
+    qs = _fifo_window(
+        FeedStock.objects.filter(quantity_bags__gt=0, feed_type__in=list(needed)),
+        partition_by='feed_type',
+    )
+    qs = qs.filter(consumed_before__lt=Case(
+        *[When(feed_type=ft, then=Value(qty)) for ft, qty in needed.items()],
+        default=Value(0),
+    ))
+    if with_breakdown:
+        qs = qs.select_related('manufacturer', 'supplier')
+
+    by_type = {ft: [] for ft in needed}
+    for s in qs.order_by('feed_type', 'arrival_date', 'id'):
+        by_type[s.feed_type].append(s)
+    return {ft: _price_batches(by_type[ft], qty, with_breakdown) for ft, qty in needed.items()}
+
+
+def peek_fifo_cost(qty_needed, feed_type=None, with_breakdown=False):
+    """
+    Generic FIFO cost peek.
+    Returns (enough: bool, total: Decimal, breakdown: list[dict])
+    """
+    if feed_type:
+        return peek_fifo_costs([(feed_type, qty_needed)], with_breakdown)[feed_type]
+
+    qs = _fifo_window(FeedStock.objects.filter(quantity_bags__gt=0))
+    qs = qs.filter(consumed_before__lt=int(qty_needed or 0))
+    if with_breakdown:
+        qs = qs.select_related('manufacturer', 'supplier')
+    return _price_batches(qs.order_by('arrival_date', 'id'), qty_needed, with_breakdown)
+
+
 def _peek_fifo_feed_cost(bags_needed=2):
     """Back-compat shim: use the new peek_fifo_cost but keep old call sites working."""
     enough, total, _ = peek_fifo_cost(qty_needed=bags_needed, feed_type=None, with_breakdown=False)
@@ -422,92 +500,76 @@ def mark_request_as_picked(request, request_id):
         except Exception:
             paid_feeds = Decimal('0')
 
-        # Step 1: Deduct chick stock (FIFO)
-        remaining_chicks = chick_request.quantity
-        chick_stocks = ChickStock.objects.filter(
-            chick_type=chick_request.chick_type, quantity__gt=0
-        ).order_by('recorded_on')
-
-        for stock in chick_stocks:
-            if remaining_chicks == 0:
-                break
-            deduct = min(stock.quantity, remaining_chicks)
-            stock.quantity -= deduct
-            remaining_chicks -= deduct
-            stock.save()
-
-        if remaining_chicks > 0:
-            messages.error(request, f"Not enough chick stock available for {chick_request.get_chick_type_display()}.")
-            return redirect('sales_pickup')
-
-        # Step 2: Allocate 2 bags of feed (mandatory, deferred by policy)
-        feed_bags_needed = 2
-        feed_stocks = FeedStock.objects.filter(quantity_bags__gt=0).order_by('arrival_date')
-
         # Use a single recorded_by for all entries (until auth)
         default_user = User.objects.get(username='peter')  # replace with request.user when ready
 
-        created_distributions = []
-        for stock in feed_stocks:
-            if feed_bags_needed == 0:
-                break
-            take = min(stock.quantity_bags, feed_bags_needed)
-            if take <= 0:
-                continue
-            stock.quantity_bags -= take
-            stock.save()
-
-            fd = FeedDistribution.objects.create(
-                farmer=farmer,
-                feed_stock=stock,
-                distribution_type='initial',
-                quantity_bags=take,
-                due_date=date.today() + timedelta(days=60),  # 2 months deferral
-                recorded_by=request.user,  # request.user
-                notes='Auto-issued during chick pickup',
-            )
-            created_distributions.append(fd)
-            feed_bags_needed -= take
-
-        if feed_bags_needed > 0:
-            messages.warning(request, f"Only partial feed allocation completed. {feed_bags_needed} bag(s) could not be issued due to low stock.")
-
-        # Step 3: Save Payment(s)
-        # Chicks — expected to be paid now
-        if paid_chicks > 0:
-            Payment.objects.create(
-                farmer=farmer,
-                amount=paid_chicks,
-                payment_for='chicks',
-                payment_date=date.today(),
-                received_by=default_user,  # request.user
-                notes=f"Paid for {chick_request.quantity} chicks during pickup",
-            )
+        try:
+            with transaction.atomic():
+                # Step 1: Claim the request (a second, concurrent pickup claims nothing)
+                claimed = (ChickRequest.objects
+                           .filter(id=chick_request.id, status='approved', is_picked=False)
+                           .update(is_picked=True, picked_on=timezone.now().date(), pickup_notes=notes))
+                if not claimed:
+                    messages.error(request, f"Request #{chick_request.id} has already been picked.")
+                    return redirect('sales_pickup')
+                # update() skips signals; refresh the farmer's public status page ourselves
+                status_ns = farmer_status_namespace(chick_request.farmer_id)
+                transaction.on_commit(lambda: invalidate(status_ns))
+                # the day's report snapshot freeze runs in the background (manage.py run_jobs)
+                queue_freeze()
+
+                # Step 2: Deduct chick stock (FIFO). Chicks already reserved by batch
+                # allocations at approval are not deducted a second time.
+                reserved = chick_request.allocations.aggregate(n=Sum('quantity'))['n'] or 0
+                allocate_chicks(chick_request, quantity=chick_request.quantity - reserved)
+
+                # Step 3: Allocate 2 bags of feed (mandatory, deferred by policy)
+                feed_bags_needed = 2
+                created_distributions = allocate_feeds(
+                    farmer, feed_bags_needed, 'initial',
+                    allow_partial=True,
+                    due_date=date.today() + timedelta(days=60),  # 2 months deferral
+                    recorded_by=request.user,  # request.user
+                    notes='Auto-issued during chick pickup',
+                )
+                feed_bags_needed -= sum(fd.quantity_bags for fd in created_distributions)
+
+                # Step 4: Save Payment(s)
+                # Chicks — expected to be paid now
+                if paid_chicks > 0:
+                    Payment.objects.create(
+                        farmer=farmer,
+                        amount=paid_chicks,
+                        payment_for='chicks',
+                        payment_date=date.today(),
+                        received_by=default_user,  # request.user
+                        notes=f"Paid for {chick_request.quantity} chicks during pickup",
+                    )
 
-        # Initial feeds — OPTIONAL at pickup (allowed to be 0)
-        if paid_feeds > 0:
-            # Optionally link to the first distribution we just created (if any)
-            related_fd = created_distributions[0] if created_distributions else None
-            Payment.objects.create(
-                farmer=farmer,
-                amount=paid_feeds,
-                payment_for='feeds',
-                related_feed_distribution=related_fd,
-                payment_date=date.today(),
-                received_by=default_user,  # request.user
-                notes="Initial 2-bag feed payment at pickup",
-            )
+                # Initial feeds — OPTIONAL at pickup (allowed to be 0)
+                if paid_feeds > 0:
+                    # Optionally link to the first distribution we just created (if any)
+                    related_fd = created_distributions[0] if created_distributions else None
+                    Payment.objects.create(
+                        farmer=farmer,
+                        amount=paid_feeds,
+                        payment_for='feeds',
+                        related_feed_distribution=related_fd,
+                        payment_date=date.today(),
+                        received_by=default_user,  # request.user
+                        notes="Initial 2-bag feed payment at pickup",
+                    )
 
-        # Step 4: Mark as picked
-        chick_request.is_picked = True
-        chick_request.picked_on = timezone.now().date()
-        chick_request.pickup_notes = notes
-        chick_request.save()
+                # Step 5: Promote starter -> returning
+                if farmer.farmer_type == 'starter':
+                    farmer.farmer_type = 'returning'
+                    farmer.save(update_fields=['farmer_type'])
+        except InsufficientStock:
+            messages.error(request, f"Not enough chick stock available for {chick_request.get_chick_type_display()}.")
+            return redirect('sales_pickup')
 
-        # Step 5: Promote starter -> returning
-        if farmer.farmer_type == 'starter':
-            farmer.farmer_type = 'returning'
-            farmer.save()
+        if feed_bags_needed > 0:
+            messages.warning(request, f"Only partial feed allocation completed. {feed_bags_needed} bag(s) could not be issued due to low stock.")
 
         messages.success(request, f"Request #{chick_request.id} marked as picked. Stock updated and payments recorded.")
         return redirect('sales_pickup')
@@ -523,6 +585,7 @@ def mark_request_as_picked(request, request_id):
 
 
 
+@query_budget(1)
 def feed_pickup_view(request):
     """List approved & not picked feed requests for pickup."""
     to_pick = (FeedRequest.objects
@@ -563,53 +626,40 @@ def mark_feed_request_as_picked(request, request_id):
             )
             return redirect('mark_feed_request_as_picked', request_id=feed_req.id)
 
-        # 2) Deduct stock FIFO and create FeedDistribution purchase records
-        remaining = feed_req.quantity_bags
-        stocks = FeedStock.objects.filter(
-            feed_type=feed_req.feed_type, quantity_bags__gt=0
-        ).order_by('arrival_date')
-
         default_user = User.objects.get(username='peter')  # replace with request.user later
 
-        for stock in stocks:
-            if remaining <= 0:
-                break
-            take = min(stock.quantity_bags, remaining)
-            if take <= 0:
-                continue
-
-            stock.quantity_bags -= take
-            stock.save()
-
-            FeedDistribution.objects.create(
-                farmer=farmer,
-                feed_stock=stock,
-                distribution_type='purchase',
-                quantity_bags=take,
-                recorded_by=request.user,  # request.user
-                notes=f"Purchase for FeedRequest #{feed_req.id}" + (f". {notes}" if notes else "")
-            )
-            remaining -= take
+        try:
+            with transaction.atomic():
+                # 2) Claim the request, then deduct stock FIFO and create FeedDistribution purchase records
+                claimed = (FeedRequest.objects
+                           .filter(id=feed_req.id, status='approved', pickup_status='not_picked')
+                           .update(pickup_status='picked', picked_on=timezone.now()))
+                if not claimed:
+                    messages.error(request, f"FeedRequest #{feed_req.id} has already been picked.")
+                    return redirect('sales_feed_pickup')
+                status_ns = farmer_status_namespace(feed_req.farmer_id)
+                transaction.on_commit(lambda: invalidate(status_ns))
+
+                allocate_feeds(
+                    farmer, feed_req.quantity_bags, 'purchase',
+                    feed_type=feed_req.feed_type,
+                    recorded_by=request.user,  # request.user
+                    notes=f"Purchase for FeedRequest #{feed_req.id}" + (f". {notes}" if notes else ""),
+                )
 
-        if remaining > 0:
+                # 3) Record payment
+                Payment.objects.create(
+                    farmer=farmer,
+                    amount=paid_feeds,
+                    payment_for='feeds',
+                    payment_date=date.today(),
+                    received_by=default_user,  # request.user
+                    notes=f"Payment for {feed_req.quantity_bags} bag(s) {feed_req.feed_type} at pickup (FeedRequest #{feed_req.id})"
+                )
+        except InsufficientStock:
             messages.error(request, "Unexpected stock shortfall during deduction. No changes recorded.")
             return redirect('sales_feed_pickup')
 
-        # 3) Record payment
-        Payment.objects.create(
-            farmer=farmer,
-            amount=paid_feeds,
-            payment_for='feeds',
-            payment_date=date.today(),
-            received_by=default_user,  # request.user
-            notes=f"Payment for {feed_req.quantity_bags} bag(s) {feed_req.feed_type} at pickup (FeedRequest #{feed_req.id})"
-        )
-
-        # 4) Mark feed request as picked
-        feed_req.pickup_status = 'picked'
-        feed_req.picked_on = timezone.now()
-        feed_req.save(update_fields=['pickup_status', 'picked_on'])
-
         messages.success(
             request,
             f"FeedRequest #{feed_req.id} picked. UGX {int(paid_feeds):,} received and stock updated."
@@ -12,5 +12,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'young4chicks.settings')
+# Under ASGI each request's ORM calls run on a thread of their own, so a
+# persistent connection is never reused by the next request and just lingers.
+# Use DB_POOL=1 on PostgreSQL to reuse connections instead.
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
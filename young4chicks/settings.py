@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from django.contrib.messages import constants as messages
 
@@ -47,6 +48,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'home.profiling.QueryProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -78,12 +80,134 @@ WSGI_APPLICATION = 'young4chicks.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SQLite by default. DB_ENGINE=postgres switches to PostgreSQL, configured with
+# DB_NAME / DB_USER / DB_PASSWORD / DB_HOST / DB_PORT:
+#   - connections are kept for DB_CONN_MAX_AGE seconds and health-checked
+#     before reuse;
+#   - DB_POOL=1 uses psycopg's connection pool instead (needs
+#     `psycopg[pool]`; Django requires CONN_MAX_AGE = 0 with it);
+#   - DB_REPLICA_HOST (and DB_REPLICA_PORT) adds a 'replica' alias for
+#     dashboard/report reads (home/replicas.py).
+# Locally the 'replica' alias is a second connection to the same SQLite file,
+# so the router is exercised in development and tests.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+# SQLite: WAL, busy timeout and cache pragmas on every connection (home/sqlite.py);
+# SQLITE_TUNING=0 keeps SQLite's defaults
+SQLITE_TUNING = os.environ.get('SQLITE_TUNING', '1') == '1'
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -32000,  # negative = KiB, so ~32 MB
+    'temp_store': 'MEMORY',
+} if SQLITE_TUNING else {}
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'young4chicks'),
+            'USER': os.environ.get('DB_USER', 'young4chicks'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
     }
-}
+    if os.environ.get('DB_POOL') == '1':
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+    if os.environ.get('DB_REPLICA_HOST'):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'HOST': os.environ['DB_REPLICA_HOST'],
+            'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+            'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        },
+    }
+    if SQLITE_TUNING:
+        # take the write lock at BEGIN, so concurrent pickups queue on busy_timeout instead of failing
+        DATABASES['default']['OPTIONS']['transaction_mode'] = 'IMMEDIATE'
+    DATABASES['replica'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['home.replicas.ReplicaRouter']
+
+
+# Cache
+# Local memory by default; set CACHE_BACKEND=file or CACHE_BACKEND=redis (with
+# CACHE_LOCATION=redis://host:6379/1, needs the `redis` package) to share it
+# between worker processes.
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', 'redis://127.0.0.1:6379/1'),
+        }
+    }
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'young4chicks',
+        }
+    }
+
+# Seconds the public homepage fragments stay cached (edits invalidate them sooner)
+HOMEPAGE_CACHE_TIMEOUT = int(os.environ.get('HOMEPAGE_CACHE_TIMEOUT', 300))
+# Per-farmer public status page. Payment/request changes invalidate it, but with
+# locmem only in the process that made the change; the others keep their copy
+# until it expires, so keep it short unless the cache is shared.
+FARMER_STATUS_CACHE_TIMEOUT = int(os.environ.get('FARMER_STATUS_CACHE_TIMEOUT',
+                                                 60 if CACHE_BACKEND == 'locmem' else 3600))
+
+# Empty chick batches older than this many days are moved to the archive table
+# (manage.py archive_chick_stock)
+CHICK_STOCK_ARCHIVE_DAYS = int(os.environ.get('CHICK_STOCK_ARCHIVE_DAYS', 90))
+
+# Query-count / SQL-time headers on every response (always on when DEBUG)
+QUERY_PROFILING_HEADERS = os.environ.get('QUERY_PROFILING_HEADERS') == '1'
+
+# /metrics (Prometheus): scrapers send "Authorization: Bearer <METRICS_TOKEN>";
+# without a token only staff users can read it. Stock/queue series are
+# recomputed at most this often.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_REFRESH_SECONDS = int(os.environ.get('METRICS_REFRESH_SECONDS', 60))
+
+# Background jobs (home.jobs, run by manage.py run_jobs): attempts before a job
+# is marked failed, the first retry delay (doubled each attempt) and how long a
+# running job may go before it's considered abandoned by its worker.
+JOBS_MAX_ATTEMPTS = int(os.environ.get('JOBS_MAX_ATTEMPTS', 5))
+JOBS_RETRY_DELAY_SECONDS = int(os.environ.get('JOBS_RETRY_DELAY_SECONDS', 10))
+JOBS_LOCK_TIMEOUT_SECONDS = int(os.environ.get('JOBS_LOCK_TIMEOUT_SECONDS', 600))
 
 
 # Password validation